@@ -54,6 +54,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.QueryInstrumentationMiddleware',
+    'blog.replicas.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -90,13 +92,23 @@ AUTH_USER_MODEL = 'accounts.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'blog.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
+    # orjson when installed, same output as DRF's JSONRenderer/JSONParser
+    'DEFAULT_RENDERER_CLASSES': (
+        'blog.renderers.StreamingJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'blog.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 # JWT Settings
@@ -108,6 +120,79 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': True,
+    # Tokens carry role claims and a token version; see accounts.authentication
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.ClaimsTokenRefreshSerializer',
+}
+
+# Token versions and user rows cached by accounts.authentication.ClaimsJWTAuthentication.
+# Revocations reach other processes at once only with a shared CACHES backend.
+ACCOUNTS_USER_CACHE = {
+    'timeout': 300,
+}
+
+# Blog performance settings
+# Anonymous GET responses cached per action; see blog.cache.AnonymousResponseCacheMixin.
+# Invalidation bumps version keys in the default cache, so deployments with
+# several processes need a shared CACHES backend (Redis/Memcached), not LocMem.
+BLOG_RESPONSE_CACHE = {
+    'list': {'timeout': 60, 'stale_timeout': 0},
+    'retrieve': {'timeout': 300, 'stale_timeout': 0},
+}
+# Per-request SQL instrumentation; see blog.middleware.QueryInstrumentationMiddleware.
+# Every request is instrumented in development, 1% in production; raise it while profiling.
+BLOG_QUERY_INSTRUMENTATION = {
+    'sample_rate': 1.0 if DEBUG else 0.01,
+    'slow_request_ms': 500,
+    'max_queries': 30,
+    'duplicate_threshold': 5,
+}
+# Ranking of /posts/popular/: score = age in half-lives + log2(1 + weighted engagement).
+# Run `python manage.py recompute_trending` after changing these.
+BLOG_TRENDING = {
+    'half_life_hours': 24,
+    'weights': {'like': 1.0, 'comment': 2.0, 'save': 3.0},
+}
+
+# Render post lists from values() rows instead of PostListSerializer (same JSON, less CPU)
+BLOG_FAST_SERIALIZERS = True
+# GET list responses of at least min_items items are streamed chunk_items at a time;
+# see blog.renderers.StreamingListMixin.
+BLOG_STREAMING_JSON = {
+    'min_items': 100,
+    'chunk_items': 25,
+}
+# Most posts one /posts/batch/ or /posts/engagement/ request may ask for
+BLOG_MULTI_GET_LIMIT = 100
+# Post, comment, category and tag reads (list, retrieve, popular, saved) go to a random replica
+# alias; see blog.replicas. Reads stay on the primary for sticky_seconds after the user writes
+# or the data they read changes, so keep it above the replication lag.
+BLOG_READ_REPLICAS = {
+    'replicas': [],
+    'sticky_seconds': 5,
+}
+# Resized WebP/JPEG copies of post images and avatars (longest side in pixels per size), rendered
+# after upload by a background thread; see blog.images. Run `python manage.py backfill_image_variants`
+# for existing images, with --force after changing these.
+BLOG_IMAGE_VARIANTS = {
+    'sizes': {
+        'posts': {'card': 480, 'large': 1200},
+        'avatars': {'small': 64, 'medium': 192},
+    },
+    'formats': ['webp', 'jpeg'],
+    'quality': 80,
+    'background': True,
+}
+# Write-behind buffer for like/save events; see blog.engagement.EngagementBuffer for
+# the durability trade-offs. Buffers are per process, set 'journal' to keep events
+# across crashes (e.g. '/var/lib/blog/engagement-{pid}.log'; workers replay the
+# journals of dead pids on start).
+BLOG_ENGAGEMENT_BUFFER = {
+    'enabled': False,
+    'flush_interval': 1.0,
+    'max_pending': 500,
+    'journal': None,
+    'fsync': False,
 }
 
 ROOT_URLCONF = 'Backend.urls'
@@ -137,9 +222,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Local stand-in for a read replica, refreshed from default by `python manage.py sync_replicas`.
+    # Unused until listed in BLOG_READ_REPLICAS['replicas'].
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+    },
 }
 
+DATABASE_ROUTERS = ['blog.replicas.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenUser
+from .tokens import TOKEN_VERSION_CLAIM
+
+User = get_user_model()
+
+DEFAULT_USER_CACHE = {
+    'timeout': 300,     # seconds a token version or user row is kept without changes
+}
+
+
+def get_user_cache_settings():
+    config = dict(DEFAULT_USER_CACHE)
+    config.update(getattr(settings, 'ACCOUNTS_USER_CACHE', {}))
+    return config
+
+
+def _version_key(pk):
+    return f'accounts:token-version:{pk}'
+
+
+def _user_key(pk):
+    return f'accounts:user:{pk}'
+
+
+def get_token_version(pk):
+    """Current token version of a user, None if there is no such user"""
+    key = _version_key(pk)
+    version = cache.get(key)
+    if version is None:
+        versions = User.objects.filter(pk=pk).values_list('token_version', flat=True)
+        version = versions.first()
+        if version is not None:
+            cache.set(key, version, get_user_cache_settings()['timeout'])
+            # A revocation between the read and the set may have forgotten the
+            # key before the old version was written back; read it again
+            current = versions.first()
+            if current != version:
+                cache.delete(key)
+                version = current
+    return version
+
+
+def get_cached_user(pk):
+    """The user row (without its password hash) as a read-only ``TokenUser``,
+    None if there is no such user. Up to ``timeout`` seconds old; never save it."""
+    key = _user_key(pk)
+    user = cache.get(key)
+    if user is None:
+        user = TokenUser.objects.defer('password').filter(pk=pk).first()
+        if user is not None:
+            cache.set(key, user, get_user_cache_settings()['timeout'])
+    return user
+
+
+def forget_user(pk):
+    """Drop the cached token version and row of a user after it changed"""
+    cache.delete_many([_version_key(pk), _user_key(pk)])
+
+
+def token_user(validated_token, user_id):
+    """A ``TokenUser`` with the fields carried by the token loaded"""
+    loaded = {field: validated_token[field] for field in User.TOKEN_CLAIM_FIELDS}
+    loaded[User._meta.pk.attname] = user_id
+    loaded['token_version'] = validated_token[TOKEN_VERSION_CLAIM]
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in loaded]
+    # from_db() expects the values in field order
+    return TokenUser.from_db(router.db_for_read(User), names, [loaded[name] for name in names])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that doesn't query the user on every request.
+
+    Tokens issued by ``ClaimsRefreshToken`` carry the user's role fields and
+    token version. The version is checked against the cached current one, so
+    bumping it (password, role or active status change, logout) revokes the
+    user's tokens. Read requests (safe methods) get a ``TokenUser`` built from
+    the claims; write requests get the ``User`` freshly loaded, since they may
+    save it and a cached copy would write stale columns back. Tokens without
+    claims, issued before, load the user as ``JWTAuthentication`` does.
+
+    The cache must be shared between processes (Redis/Memcached) for a
+    revocation to reach all of them at once; with a per-process cache it
+    takes up to ``ACCOUNTS_USER_CACHE['timeout']`` seconds.
+    """
+    read_only = False
+
+    def authenticate(self, request):
+        self.read_only = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        version = get_token_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if version != validated_token[TOKEN_VERSION_CLAIM]:
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+
+        if self.read_only:
+            try:
+                return token_user(validated_token, user_id)
+            except KeyError as e:
+                raise InvalidToken(_('Token is missing user claims')) from e
+        user = User.objects.defer('password').filter(pk=user_id).first()
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        return user
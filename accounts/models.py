@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -7,16 +8,50 @@ class User(AbstractUser):
         ('author', 'Author'),
         ('admin', 'Admin'),
     )
+    # Carried in access tokens (see accounts.authentication); changing any of
+    # them, or the password, revokes the user's tokens
+    TOKEN_CLAIM_FIELDS = ('role', 'is_staff', 'is_superuser', 'is_active')
     
     email = models.EmailField(unique=True)
     bio = models.TextField(blank=True, null=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # Resized copies of the avatar, rendered by blog.images
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     social_links = models.JSONField(default=dict, blank=True)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='reader')
+    token_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.username
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(cls.TOKEN_CLAIM_FIELDS) <= set(field_names):
+            instance._loaded_claims = instance.token_claims()
+        return instance
+    
+    def token_claims(self):
+        return tuple(getattr(self, field) for field in self.TOKEN_CLAIM_FIELDS)
+    
+    def save(self, *args, **kwargs):
+        loaded_claims = getattr(self, '_loaded_claims', None)
+        password_changed = self._password is not None and not self._state.adding
+        if password_changed or (loaded_claims is not None and loaded_claims != self.token_claims()):
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.token_claims()
+    
+    def revoke_tokens(self):
+        """Invalidate every access and refresh token issued to the user so far"""
+        User.objects.filter(pk=self.pk).update(token_version=F('token_version') + 1)
+        self.refresh_from_db(fields=['token_version'])
+        from .authentication import forget_user
+        forget_user(self.pk)
+    
     def is_admin_role(self):
         return self.role == 'admin' or self.is_staff or self.is_superuser
     
@@ -24,4 +59,37 @@ class User(AbstractUser):
         return self.role in ['author', 'admin'] or self.is_staff or self.is_superuser
     
     def can_edit_post(self, post):
-        return self.is_admin_role() or post.author == self
+        return self.is_admin_role() or post.author_id == self.pk
+
+
+class TokenUser(User):
+    """``request.user`` of read requests, built from access token claims.
+
+    Only the claim fields are loaded; reading any other field loads them all
+    at once from the cached user (``accounts.authentication.get_cached_user``)
+    instead of querying one field at a time. The password hash isn't cached
+    and is queried if read. A proxy of ``User``, so it
+    compares equal to it and can be used in queries; it is never saved.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        deferred = self.get_deferred_fields()
+        if fields is None or not set(fields) <= deferred:
+            return super().refresh_from_db(using, fields, **kwargs)
+        from .authentication import get_cached_user
+        user = get_cached_user(self.pk)
+        if user is None:
+            raise User.DoesNotExist(f'User {self.pk} no longer exists')
+        # The cached row leaves out the password hash
+        uncached = user.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred and field.attname not in uncached:
+                setattr(self, field.attname, getattr(user, field.attname))
+        if uncached & set(fields):
+            super().refresh_from_db(using, fields, **kwargs)
+
+    def save(self, *args, **kwargs):
+        raise TypeError('TokenUser is read-only; load the User to change it')
@@ -1,6 +1,12 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from blog.images import ImageVariantsField
+from .authentication import get_token_version
+from .tokens import TOKEN_VERSION_CLAIM, ClaimsRefreshToken
 
 User = get_user_model()
 
@@ -39,6 +45,30 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
 class UserListSerializer(serializers.ModelSerializer):
     """Simplified serializer for listing users"""
+    avatar_variants = ImageVariantsField('avatar', 'avatar_variants')
+
     class Meta:
         model = User
-        fields = ('id', 'username', 'first_name', 'last_name', 'avatar', 'role')
\ No newline at end of file
+        fields = ('id', 'username', 'first_name', 'last_name', 'avatar', 'avatar_variants', 'role')
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login issuing tokens with the user's claims (see ClaimsRefreshToken)"""
+    token_class = ClaimsRefreshToken
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that rejects refresh tokens revoked by a token version bump.
+
+    Refresh tokens issued before the claims carry no version, so a
+    revocation can't be checked; they are rejected rather than rotated into
+    new tokens, and their users log in again.
+    """
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if TOKEN_VERSION_CLAIM not in refresh:
+            raise InvalidToken('Token has no version; log in again')
+        user_id = User._meta.pk.to_python(refresh[jwt_settings.USER_ID_CLAIM])
+        if get_token_version(user_id) != refresh[TOKEN_VERSION_CLAIM]:
+            raise InvalidToken('Token has been revoked')
+        return super().validate(attrs)
@@ -1,3 +1,156 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from blog.models import Post
+from .authentication import get_cached_user, get_token_version, token_user
+from .models import TokenUser
+from .tokens import ClaimsRefreshToken
+
+User = get_user_model()
+
+
+class ClaimsAuthenticationTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.draft = Post.objects.create(title='Draft', content='Content', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, username='author', password='pass'):
+        response = self.client.post('/api/v1/accounts/auth/login/', {'username': username, 'password': password})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def get(self, url, access):
+        return self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_reads_do_not_query_the_user(self):
+        access = self.login()['access']
+        url = f'/api/v1/blog/posts/{self.draft.slug}/?fields=id,title'
+        self.assertEqual(self.get(url, access).status_code, 200)  # caches the token version
+        # Only the post itself: the author's draft is visible without loading the user
+        with self.assertNumQueries(1):
+            response = self.get(url, access)
+        self.assertEqual(response.data, {'id': self.draft.pk, 'title': 'Draft'})
+
+    def test_token_user_loads_other_fields_once(self):
+        access = self.login()['access']
+        self.get('/api/v1/accounts/users/me/', access)
+        with self.assertNumQueries(0):
+            response = self.get('/api/v1/accounts/users/me/', access)
+        self.assertEqual(response.data['email'], 'author@example.com')
+        self.assertEqual(response.data['role'], 'author')
+
+    def test_writes_get_the_full_user(self):
+        access = self.login()['access']
+        response = self.client.patch(
+            '/api/v1/accounts/users/me/', {'bio': 'Hello'}, HTTP_AUTHORIZATION=f'Bearer {access}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(User.objects.get(pk=self.author.pk).bio, 'Hello')
+        # A profile edit doesn't revoke tokens
+        self.assertEqual(self.get('/api/v1/accounts/users/me/', access).data['bio'], 'Hello')
+
+    def test_writes_do_not_save_a_stale_user(self):
+        access = self.login()['access']
+        self.get('/api/v1/accounts/users/me/', access)
+        get_cached_user(self.author.pk)
+        # Revoked by another process: this one's cache still has the old version and row
+        User.objects.filter(pk=self.author.pk).update(token_version=F('token_version') + 1, role='reader')
+        response = self.client.patch(
+            '/api/v1/accounts/users/me/', {'bio': 'Hello'}, HTTP_AUTHORIZATION=f'Bearer {access}'
+        )
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.get(pk=self.author.pk)
+        self.assertEqual((user.bio, user.role), ('Hello', 'reader'))
+        self.assertEqual(user.token_version, self.author.token_version + 1)
+        cache.clear()
+        self.assertEqual(self.get('/api/v1/accounts/users/me/', access).status_code, 401)
+
+    def test_cached_users_are_read_only(self):
+        with self.assertRaises(TypeError):
+            get_cached_user(self.author.pk).save()
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        tokens = self.login()
+        response = self.client.post('/api/v1/accounts/auth/logout/', HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        self.assertEqual(response.status_code, 204)
+        response = self.get('/api/v1/accounts/users/me/', tokens['access'])
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'token_revoked')
+        response = self.client.post('/api/v1/accounts/auth/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.get('/api/v1/accounts/users/me/', self.login()['access']).status_code, 200)
+
+    def test_role_and_password_changes_revoke_tokens(self):
+        access = self.login()['access']
+        self.assertEqual(self.get('/api/v1/accounts/users/me/', access).status_code, 200)
+        user = User.objects.get(pk=self.author.pk)
+        user.role = 'reader'
+        user.save(update_fields=['role'])
+        self.assertEqual(self.get('/api/v1/accounts/users/me/', access).status_code, 401)
+
+        access = self.login()['access']
+        user = User.objects.get(pk=self.author.pk)
+        user.last_name = 'Lovelace'
+        user.save()
+        self.assertEqual(self.get('/api/v1/accounts/users/me/', access).status_code, 200)
+        user.set_password('new-pass')
+        user.save()
+        self.assertEqual(self.get('/api/v1/accounts/users/me/', access).status_code, 401)
+        self.login(password='new-pass')
+
+    def test_refresh_keeps_claims(self):
+        refresh = self.login()['refresh']
+        response = self.client.post('/api/v1/accounts/auth/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get('/api/v1/accounts/users/me/', response.data['access']).status_code, 200)
+
+    def test_refresh_tokens_without_claims_are_rejected(self):
+        refresh = str(RefreshToken.for_user(self.author))
+        response = self.client.post('/api/v1/accounts/auth/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_a_revocation_racing_a_version_load_is_not_undone(self):
+        author = User.objects.get(pk=self.author.pk)
+        cache_set = cache.set
+
+        def set_after_revocation(key, value, timeout):
+            # Another request logs out between this one's read and its cache write
+            author.revoke_tokens()
+            cache_set(key, value, timeout)
+
+        with mock.patch.object(cache, 'set', side_effect=set_after_revocation):
+            self.assertEqual(get_token_version(author.pk), author.token_version)
+        self.assertEqual(get_token_version(author.pk), author.token_version)
+        self.assertEqual(cache.get(f'accounts:token-version:{author.pk}'), author.token_version)
+
+    def test_tokens_without_claims_still_work(self):
+        access = str(RefreshToken.for_user(self.author).access_token)
+        response = self.get('/api/v1/accounts/users/me/', access)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], 'author')
+
+    def test_token_user_behaves_like_the_user(self):
+        user = token_user(ClaimsRefreshToken.for_user(self.author).access_token, self.author.pk)
+        self.assertIsInstance(user, TokenUser)
+        self.assertEqual(user.get_deferred_fields(), {
+            field.attname for field in User._meta.concrete_fields
+        } - {'id', 'role', 'is_staff', 'is_superuser', 'is_active', 'token_version'})
+        self.assertEqual(user, self.author)
+        self.assertTrue(user.can_edit_post(self.draft))
+        self.assertFalse(user.is_admin_role())
+        self.assertEqual(Post.objects.filter(author=user).get(), self.draft)
+        get_cached_user(self.author.pk)
+        with self.assertNumQueries(1):  # the cached row has no password hash
+            self.assertTrue(user.check_password('pass'))
+        with self.assertRaises(TypeError):
+            user.save()
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import RefreshToken
+
+TOKEN_VERSION_CLAIM = 'token_version'
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token carrying the user's role fields and token version.
+
+    Access tokens made from it copy the claims, so
+    ``accounts.authentication.ClaimsJWTAuthentication`` can authenticate
+    them without loading the user.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for field in get_user_model().TOKEN_CLAIM_FIELDS:
+            token[field] = getattr(user, field)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import UserRegistrationView, UserProfileViewSet, CustomTokenObtainPairView
+from .views import UserRegistrationView, UserProfileViewSet, CustomTokenObtainPairView, LogoutView
 
 router = DefaultRouter()
 router.register(r'users', UserProfileViewSet, basename='user')
@@ -11,6 +11,7 @@ urlpatterns = [
     path('auth/register/', UserRegistrationView.as_view(), name='user-register'),
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='token-obtain-pair'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
+    path('auth/logout/', LogoutView.as_view(), name='token-logout'),
     
     # User profile endpoints
     path('', include(router.urls)),
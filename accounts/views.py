@@ -1,6 +1,7 @@
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
@@ -75,6 +76,14 @@ class UserProfileViewSet(ModelViewSet):
             return self.request.user
         return super().get_object()
 
+class LogoutView(APIView):
+    """Log out everywhere: revoke every access and refresh token of the current user"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        request.user.revoke_tokens()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Custom login view that returns user data along with tokens"""
     
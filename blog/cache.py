@@ -0,0 +1,260 @@
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+# Version scopes. Cached responses embed the versions they were built from;
+# bumping a scope invalidates every dependent entry without touching them.
+GLOBAL_SCOPE = 'global'     # users, categories and tags shown inside posts
+LISTING_SCOPE = 'posts'     # any post list (membership, order or counts)
+TAXONOMY_SCOPE = 'taxonomy'  # categories and tags themselves
+
+
+def post_scope(pk):
+    return f'post:{pk}'
+
+
+def user_scope(pk):
+    """A user's own likes and saves, which only their responses show"""
+    return f'user:{pk}'
+
+
+def _version_key(scope):
+    return f'blog:version:{scope}'
+
+
+def _changed_key(scope):
+    return f'blog:changed:{scope}'
+
+
+def get_versions(*scopes):
+    """Return the current version of each scope, creating missing ones.
+
+    New versions start from the clock rather than 1 so a version evicted
+    from the cache can never come back with a value old entries still use.
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return tuple(versions)
+
+
+def bump_versions(*scopes):
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    now = time.time()
+    cache.set_many({_changed_key(scope): now for scope in scopes}, None)
+
+
+def get_last_modified(*scopes):
+    """Unix time of the latest bump of any of ``scopes``.
+
+    A scope without a recorded bump (new, or evicted) counts as changed
+    now, so an unknown history never answers "not modified".
+    """
+    keys = [_changed_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time(), None)
+            found[key] = cache.get(key)
+    return max(found.values())
+
+
+def slug_key(slug):
+    return f'blog:post-slug:{slug}'
+
+
+DEFAULT_RESPONSE_CACHE = {
+    'list': {'timeout': 60, 'stale_timeout': 0},
+    'retrieve': {'timeout': 300, 'stale_timeout': 0},
+}
+
+_stats = Counter()     # (action, 'HIT'/'STALE'/'MISS') -> responses, in this process
+_stats_lock = threading.Lock()
+
+
+def record_response_cache(action, state):
+    with _stats_lock:
+        _stats[(action, state)] += 1
+
+
+def response_cache_stats():
+    """Per-action HIT/STALE/MISS counts of this process, with the share served from the cache"""
+    with _stats_lock:
+        counts = dict(_stats)
+    actions = {}
+    for (action, state), count in sorted(counts.items()):
+        actions.setdefault(action, {'HIT': 0, 'STALE': 0, 'MISS': 0})[state] = count
+    for entry in actions.values():
+        served = entry['HIT'] + entry['STALE']
+        entry['hit_ratio'] = round(served / (served + entry['MISS']), 3) if served + entry['MISS'] else 0.0
+    return actions
+
+
+def reset_response_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def get_response_cache_settings(action):
+    config = getattr(settings, 'BLOG_RESPONSE_CACHE', DEFAULT_RESPONSE_CACHE)
+    return config.get(action)
+
+
+class AnonymousResponseCacheMixin:
+    """Cache anonymous GET responses of the actions in ``BLOG_RESPONSE_CACHE``.
+
+    Each action maps to ``{'timeout': seconds, 'stale_timeout': seconds}``.
+    One entry is kept per URL, tagged with the version scopes it depends on:
+    ``retrieve`` on the global and per-post scopes, every other action on the
+    global and listing scopes. An entry is served while its versions are
+    current; after a bump it may still be served for ``stale_timeout``
+    seconds from when it was stored. Responses carry ``X-Cache``.
+
+    ``retrieve`` finds the post's scope through a slug-to-id mapping that
+    :meth:`remember_post` records, for as long as a ``retrieve`` entry lives.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        self.response_cache_state = None
+        self.mapped_post_pk = None
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_response_cache_scopes(self):
+        if self.action == 'retrieve':
+            self.mapped_post_pk = cache.get(slug_key(self.kwargs.get(self.lookup_field)))
+            if self.mapped_post_pk is None:
+                return None
+            return (GLOBAL_SCOPE, post_scope(self.mapped_post_pk))
+        return (GLOBAL_SCOPE, LISTING_SCOPE)
+
+    def remember_post(self, post):
+        """Map the retrieved post's slug to its id, checking the mapping this request used.
+
+        A mapping to another id (the slug was reused without a delete
+        signal) is replaced, and the response built on it is not cached.
+        """
+        if self.mapped_post_pk != post.pk:
+            config = get_response_cache_settings('retrieve') or {}
+            cache.set(slug_key(post.slug), post.pk, config.get('timeout', 60))
+            self.mapped_post_pk = None
+
+    def response_cache_key(self, request):
+        digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f'blog:response:{self.action}:{digest}'
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        config = get_response_cache_settings(self.action)
+        if not config or request.method != 'GET' or request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        scopes = self.get_response_cache_scopes()
+        versions = get_versions(*scopes) if scopes else None
+        key = self.response_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None and versions is not None:
+            state = None
+            if entry['versions'] == versions:
+                state = 'HIT'
+            elif time.time() - entry['stored_at'] <= config.get('stale_timeout', 0):
+                state = 'STALE'
+            if state:
+                record_response_cache(self.action, state)
+                response = Response(entry['data'])
+                response['X-Cache'] = state
+                return response
+
+        record_response_cache(self.action, 'MISS')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and versions is not None and (
+            self.action != 'retrieve' or self.mapped_post_pk is not None
+        ):
+            cache.set(key, {
+                'versions': versions,
+                'data': response.data,
+                'stored_at': time.time(),
+            }, config.get('timeout', 60))
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class ConditionalResponse(Exception):
+    """Carries a 304/412 response out of ``initial()``, before the handler runs"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Answer repeated GET requests with ``304 Not Modified`` before any query runs.
+
+    ``get_validator_scopes()`` names the version scopes the current action's
+    response is built from, or returns None to skip validation. The ``ETag``
+    hashes their versions with the URL, the accepted media type and the
+    user, whose own ``user_scope`` is added; ``Last-Modified`` is the latest
+    bump of any of them, rounded up to the second and only sent once that
+    second is over, so a later bump always moves it forward. They are checked right after authentication and
+    content negotiation, so a match costs a few cache reads and neither the
+    main query nor the serializer. Validated responses are ``no-cache``:
+    clients revalidate instead of guessing freshness from ``Last-Modified``.
+    """
+
+    def get_validator_scopes(self):
+        return None
+
+    def initial(self, request, *args, **kwargs):
+        self.response_validators = None
+        self.data_changed_at = None
+        super().initial(request, *args, **kwargs)
+        scopes = self.get_validator_scopes() if request.method == 'GET' else None
+        if scopes is None:
+            return
+        if request.user.is_authenticated:
+            scopes = (*scopes, user_scope(request.user.pk))
+        versions = get_versions(*scopes)
+        identity = repr((request.get_full_path(), request.accepted_media_type, request.user.pk, versions))
+        etag = f'W/"{hashlib.md5(identity.encode()).hexdigest()}"'
+        self.data_changed_at = get_last_modified(*scopes)
+        last_modified = math.ceil(self.data_changed_at)
+        if last_modified > time.time():
+            # Another bump this second would share the date: ETag only for now
+            last_modified = None
+        self.response_validators = (etag, last_modified)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            raise ConditionalResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ConditionalResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'response_validators', None)
+        if validators is not None and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, no_cache=True, private=request.user.is_authenticated)
+            patch_vary_headers(response, ('Authorization',))
+        return response
@@ -0,0 +1,71 @@
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Comment
+
+
+def get_tree_limits(request=None):
+    """Return ``(max_depth, max_replies)`` from query params or settings.
+
+    ``max_depth`` counts comment levels (1 renders top-level comments without
+    replies) and ``max_replies`` caps the replies rendered under each comment.
+    ``None`` means unlimited.
+    """
+    limits = []
+    for param, setting in (('max_depth', 'BLOG_COMMENT_TREE_MAX_DEPTH'),
+                           ('max_replies', 'BLOG_COMMENT_TREE_MAX_REPLIES')):
+        value = getattr(settings, setting, None)
+        if request is not None and param in request.query_params:
+            try:
+                value = max(int(request.query_params[param]), 0)
+            except ValueError:
+                pass
+        limits.append(value)
+    return tuple(limits)
+
+
+def _fetch_children(post_ids):
+    """Load every comment of the given posts in one query, grouped by parent id"""
+    children = defaultdict(list)
+    comments = Comment.objects.filter(post_id__in=post_ids).select_related('user')
+    # Sorted here: ORDER BY id over several posts would need a temporary B-tree
+    for comment in sorted(comments, key=lambda comment: comment.pk):
+        children[comment.parent_id].append(comment)
+    return children
+
+
+def _attach(comments, children, depth, max_depth, max_replies):
+    for comment in comments:
+        replies = children.get(comment.pk, [])
+        if max_depth is not None and depth >= max_depth:
+            replies = []
+        elif max_replies is not None:
+            replies = replies[:max_replies]
+        comment.reply_tree = replies
+        _attach(replies, children, depth + 1, max_depth, max_replies)
+
+
+def build_comment_tree(post, max_depth=None, max_replies=None):
+    """Return the top-level comments of ``post``, newest first, with replies attached.
+
+    All comments of the post and their users are fetched in a single query and
+    the tree is assembled in memory; each comment gets a ``reply_tree`` list
+    that ``CommentSerializer`` renders instead of querying ``replies``.
+    """
+    children = _fetch_children([post.pk])
+    roots = sorted(children.get(None, []), key=lambda c: c.created_at, reverse=True)
+    _attach(roots, children, 1, max_depth, max_replies)
+    return roots
+
+
+def attach_replies(comments, max_depth=None, max_replies=None):
+    """Attach ``reply_tree`` to already loaded comments (e.g. a page of results).
+
+    Replies for all of their posts are loaded together in one query.
+    """
+    comments = list(comments)
+    if comments:
+        children = _fetch_children({comment.post_id for comment in comments})
+        _attach(comments, children, 1, max_depth, max_replies)
+    return comments
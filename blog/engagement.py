@@ -0,0 +1,420 @@
+import atexit
+import glob
+import itertools
+import json
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+
+from .cache import bump_versions, user_scope
+from .models import Post, Comment, Like, SavedPost
+from .signals import invalidate_posts
+from .trending import adjust_trending
+
+logger = logging.getLogger(__name__)
+
+# Buffered event kinds: (row model, target column, target model, column that must be NULL)
+KINDS = {
+    'post_like': (Like, 'post_id', Post, 'comment'),
+    'comment_like': (Like, 'comment_id', Comment, 'post'),
+    'save': (SavedPost, 'post_id', Post, None),
+}
+COUNTED_KINDS = ('post_like', 'comment_like')
+# Buffered kinds feeding the trending score, by trending event kind
+TRENDING_KINDS = {'post_like': 'like', 'save': 'save'}
+
+DEFAULT_ENGAGEMENT_BUFFER = {
+    'enabled': False,
+    'flush_interval': 1.0,   # seconds between background flushes
+    'max_pending': 500,      # flush early once this many (user, target) pairs are pending
+    'journal': None,         # optional append-only file, "{pid}" is replaced by the process id
+    'fsync': False,          # fsync the journal on every event
+}
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # someone else's process
+    return True
+
+
+def orphaned_journals(template):
+    """Paths of the journals ``template`` names for processes that are gone.
+
+    Covers both a dead worker's journal and journals it had adopted but not
+    yet merged (``<journal>.adopted-<n>``).
+    """
+    prefix, marker, suffix = template.partition('{pid}')
+    if not marker:
+        return []
+    orphaned = []
+    for path in sorted(glob.glob(f'{glob.escape(prefix)}*{glob.escape(suffix)}*')):
+        rest = path[len(prefix):]
+        pid = rest[:len(rest) - len(rest.lstrip('0123456789'))]
+        tail = rest[len(pid):]
+        if not pid:
+            continue
+        if tail == suffix:
+            if int(pid) != os.getpid() and not _process_alive(int(pid)):
+                orphaned.append(path)
+        elif tail.startswith(f'{suffix}.adopted-'):
+            # Left behind by a crash mid-adoption, possibly under a reused pid
+            if int(pid) == os.getpid() or not _process_alive(int(pid)):
+                orphaned.append(path)
+    return orphaned
+
+
+def _insert(model, **fields):
+    """INSERT a row, treating a unique constraint conflict as already present.
+
+    Returns True if the row was created. The savepoint keeps a conflict from
+    breaking an enclosing transaction; counters are updated by the model's
+    post_save signal in the same transaction.
+    """
+    try:
+        with transaction.atomic():
+            model.objects.create(**fields)
+    except IntegrityError:
+        return False
+    return True
+
+
+def _lookup(kind, user_id, target_id):
+    model, field, _, null_field = KINDS[kind]
+    lookup = {'user_id': user_id, field: target_id}
+    if null_field:
+        lookup[f'{null_field}__isnull'] = True
+    return model.objects.filter(**lookup)
+
+
+def _delete(rows):
+    """DELETE like or save rows; returns True if there were any.
+
+    Every unlike and unsave goes through here, buffered or not, so the
+    post_delete signal shifts the counters and trending scores.
+    """
+    deleted, _ = rows.delete()
+    return bool(deleted)
+
+
+def set_like(user, target_model, target_id, liked):
+    """Like (``liked=True``) or unlike a post or comment, idempotently.
+
+    Concurrent requests for the same user and target are settled by the
+    unique constraints on ``Like`` instead of a read-then-write. Returns the
+    target's ``likes_count`` after the change, read from its counter column.
+    """
+    kind = 'post_like' if target_model is Post else 'comment_like'
+    buffer = get_engagement_buffer()
+    if buffer is not None:
+        buffer.set(kind, user.pk, target_id, liked)
+        # The user's own responses overlay the pending state right away
+        bump_versions(user_scope(user.pk))
+    elif liked:
+        _insert(Like, user=user, **{KINDS[kind][1]: target_id})
+    else:
+        _delete(_lookup(kind, user.pk, target_id))
+    likes_count = target_model.objects.filter(pk=target_id).values_list('likes_count', flat=True).first() or 0
+    if buffer is not None:
+        likes_count = max(likes_count + buffer.pending_delta(kind, target_id), 0)
+    return likes_count
+
+
+def set_saved(user, post_id, saved):
+    """Save (``saved=True``) or unsave a post, idempotently"""
+    buffer = get_engagement_buffer()
+    if buffer is not None:
+        buffer.set('save', user.pk, post_id, saved)
+        bump_versions(user_scope(user.pk))
+    elif saved:
+        _insert(SavedPost, user=user, post_id=post_id)
+    else:
+        _delete(_lookup('save', user.pk, post_id))
+    return saved
+
+
+def pending_state(kind, user_id, target_id):
+    """Buffered like/save state of a user for a target, None if nothing is pending"""
+    buffer = get_engagement_buffer()
+    if buffer is None or user_id is None:
+        return None
+    return buffer.state(kind, user_id, target_id)
+
+
+def pending_likes_delta(kind, target_id):
+    """Buffered change to a target's ``likes_count`` that is not written yet"""
+    buffer = get_engagement_buffer()
+    return buffer.pending_delta(kind, target_id) if buffer is not None else 0
+
+
+def flush_pending_for(user):
+    """Write the user's buffered events before reading their likes or saves from the database"""
+    buffer = get_engagement_buffer()
+    if buffer is not None and user.is_authenticated and buffer.has_pending(user.pk):
+        buffer.flush()
+
+
+class EngagementBuffer:
+    """Write-behind buffer for like and save events.
+
+    Events are coalesced per (kind, user, target): only the last set/unset
+    is kept, and the state before the first pending event comes from the
+    database. A background thread writes them every ``flush_interval``
+    seconds, or sooner once ``max_pending`` pairs are waiting, in one
+    transaction. That transaction inserts the new rows in bulk, shifting the
+    counters and trending scores per target instead of through post_save,
+    deletes the removed ones like a direct unlike (their post_delete signal
+    shifts them) and bumps the response cache versions.
+
+    Pending events live in process memory: a crash loses up to one flush
+    interval of acknowledged events unless ``journal`` is set. Each event is
+    then appended to the journal before the request returns. It survives a
+    process crash, and with ``fsync`` a power loss too. A restarted worker
+    gets a new pid, so on start a buffer adopts the journals of processes
+    that are gone: each is claimed with an atomic rename, so only one worker
+    replays it, merged into its own journal and deleted. Replaying is safe
+    because flushes are idempotent.
+    A like inserted by another process between a flush's read and write is
+    counted twice; ``reconcile_counters`` repairs such drift.
+    """
+
+    def __init__(self, flush_interval=1.0, max_pending=500, journal=None, fsync=False):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.pending = {}           # (kind, user_id, target_id) -> active
+        self.deltas = Counter()     # (kind, target_id) -> likes_count change
+        # Events being written; still visible to readers until committed
+        self.in_flight = {}
+        self.in_flight_deltas = Counter()
+        self.thread = None
+        self.journal_path = journal.replace('{pid}', str(os.getpid())) if journal else None
+        self.journal = None
+        if self.journal_path:
+            self.replay_journal(self.journal_path)
+            adopted = self.adopt_journals(journal)
+            self.journal = open(self.journal_path, 'a', encoding='utf-8')
+            if adopted:
+                # Our journal holds their events before theirs are removed
+                self.rewrite_journal()
+                for path in adopted:
+                    os.remove(path)
+            if self.pending:
+                self.start()
+
+    def set(self, kind, user_id, target_id, active):
+        """Buffer a set/unset event; a no-op if the state would not change"""
+        key = (kind, user_id, target_id)
+        self.start()
+        with self.lock:
+            current = self._state(key)
+            if current is None:
+                current = _lookup(kind, user_id, target_id).exists()
+            if current == active:
+                return
+            self.pending[key] = active
+            if kind in COUNTED_KINDS:
+                self.deltas[(kind, target_id)] += 1 if active else -1
+            if self.journal is not None:
+                self.journal.write(json.dumps([kind, user_id, target_id, active]) + '\n')
+                self.journal.flush()
+                if self.fsync:
+                    os.fsync(self.journal.fileno())
+            if len(self.pending) >= self.max_pending:
+                self.wake.set()
+
+    def _state(self, key):
+        if key in self.pending:
+            return self.pending[key]
+        return self.in_flight.get(key)
+
+    def state(self, kind, user_id, target_id):
+        with self.lock:
+            return self._state((kind, user_id, target_id))
+
+    def pending_delta(self, kind, target_id):
+        key = (kind, target_id)
+        with self.lock:
+            return self.deltas.get(key, 0) + self.in_flight_deltas.get(key, 0)
+
+    def has_pending(self, user_id):
+        with self.lock:
+            return any(key[1] == user_id for key in (*self.pending, *self.in_flight))
+
+    def start(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='engagement-buffer', daemon=True)
+                self.thread.start()
+                atexit.register(self.flush)
+
+    def run(self):
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Write all pending events; returns how many were written"""
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+                self.in_flight, self.in_flight_deltas = batch, self.deltas
+                self.deltas = Counter()
+            if not batch:
+                return 0
+            try:
+                self.write(batch)
+            except Exception:
+                logger.exception(f'Flushing {len(batch)} engagement events failed; retrying on the next flush')
+                with self.lock:
+                    # Events recorded meanwhile are newer and win
+                    for key, active in batch.items():
+                        self.pending.setdefault(key, active)
+                    self.deltas.update(self.in_flight_deltas)
+                    self.in_flight, self.in_flight_deltas = {}, Counter()
+                return 0
+            with self.lock:
+                self.in_flight, self.in_flight_deltas = {}, Counter()
+                self.rewrite_journal()
+            return len(batch)
+
+    def write(self, batch):
+        events = defaultdict(dict)
+        for (kind, user_id, target_id), active in batch.items():
+            events[kind][(user_id, target_id)] = active
+        changed_posts = set()
+        with transaction.atomic():
+            for kind, kind_events in events.items():
+                changed_posts |= self.write_kind(kind, kind_events)
+            if changed_posts:
+                transaction.on_commit(lambda: invalidate_posts(*changed_posts))
+
+    def write_kind(self, kind, events):
+        """Apply one kind's events against the current rows; returns the affected post ids"""
+        model, field, target_model, null_field = KINDS[kind]
+        user_ids = {user_id for user_id, _ in events}
+        target_ids = {target_id for _, target_id in events}
+        rows = model.objects.filter(user_id__in=user_ids, **{f'{field}__in': target_ids})
+        if null_field:
+            rows = rows.filter(**{f'{null_field}__isnull': True})
+        existing = {(user_id, target_id): pk for pk, user_id, target_id in rows.values_list('pk', 'user_id', field)}
+        # Targets or users deleted since the event was buffered are skipped
+        live_targets = set(target_model.objects.filter(pk__in=target_ids).values_list('pk', flat=True))
+        live_users = set(get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+
+        inserts = [
+            model(user_id=user_id, **{field: target_id})
+            for (user_id, target_id), active in events.items()
+            if active and (user_id, target_id) not in existing
+            and user_id in live_users and target_id in live_targets
+        ]
+        deletes = {key: pk for key, pk in existing.items() if events.get(key) is False}
+        # bulk_create sends no post_save; the inserts are counted below
+        model.objects.bulk_create(inserts, ignore_conflicts=True)
+        if deletes:
+            _delete(model.objects.filter(pk__in=deletes.values()))
+
+        inserted = Counter(getattr(row, field) for row in inserts)
+        by_delta = defaultdict(list)
+        for target_id, delta in inserted.items():
+            by_delta[delta].append(target_id)
+        for delta, ids in by_delta.items():
+            if kind in COUNTED_KINDS:
+                target_model.objects.filter(pk__in=ids).update(likes_count=F('likes_count') + delta)
+            if kind in TRENDING_KINDS:
+                adjust_trending(ids, TRENDING_KINDS[kind], delta)
+
+        changed = set(inserted) | {target_id for _, target_id in deletes}
+        if kind in ('post_like', 'save'):
+            return changed
+        if kind == 'comment_like' and changed:
+            return set(Comment.objects.filter(pk__in=changed).values_list('post_id', flat=True))
+        return set()
+
+    def adopt_journals(self, template):
+        """Claim and replay the journals of dead processes; returns the claimed paths"""
+        adopted = []
+        names = (f'{self.journal_path}.adopted-{n}' for n in itertools.count())
+        for path in orphaned_journals(template):
+            claimed = next(name for name in names if name == path or not os.path.exists(name))
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue  # another worker claimed it first
+            self.replay_journal(claimed)
+            adopted.append(claimed)
+        return adopted
+
+    def replay_journal(self, path):
+        try:
+            with open(path, encoding='utf-8') as journal:
+                lines = journal.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                kind, user_id, target_id, active = json.loads(line)
+            except ValueError:
+                continue  # a torn last line from a crash mid-write
+            if kind in KINDS:
+                self.pending[(kind, user_id, target_id)] = active
+        if self.pending:
+            logger.info(f'Replayed {len(self.pending)} buffered engagement events from {path}')
+
+    def rewrite_journal(self):
+        """Replace the journal with the events still pending (caller holds the lock)"""
+        if self.journal is None:
+            return
+        temporary = f'{self.journal_path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as journal:
+            for (kind, user_id, target_id), active in self.pending.items():
+                journal.write(json.dumps([kind, user_id, target_id, active]) + '\n')
+            journal.flush()
+            if self.fsync:
+                os.fsync(journal.fileno())
+        self.journal.close()
+        os.replace(temporary, self.journal_path)
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_engagement_buffer():
+    """The process-wide buffer, or None unless ``BLOG_ENGAGEMENT_BUFFER['enabled']``"""
+    global _buffer
+    if _buffer is not None:
+        return _buffer
+    config = dict(DEFAULT_ENGAGEMENT_BUFFER)
+    config.update(getattr(settings, 'BLOG_ENGAGEMENT_BUFFER', {}))
+    if not config['enabled']:
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = EngagementBuffer(
+                flush_interval=config['flush_interval'],
+                max_pending=config['max_pending'],
+                journal=config['journal'],
+                fsync=config['fsync'],
+            )
+    return _buffer
@@ -0,0 +1,99 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from .engagement import pending_likes_delta, pending_state
+from .images import file_url, variant_urls
+from .models import Category, Post, Tag
+
+User = get_user_model()
+
+# Columns read for PostListSerializer's fields, in its field order
+POST_COLUMNS = (
+    'id', 'title', 'slug', 'image', 'image_variants', 'created_at', 'updated_at', 'status', 'comments_count', 'likes_count',
+)
+AUTHOR_COLUMNS = ('id', 'username', 'first_name', 'last_name', 'avatar', 'avatar_variants', 'role')
+
+# DRF's own field, so timezone handling and DATETIME_FORMAT match exactly
+_datetime = serializers.DateTimeField()
+_post_image_storage = Post._meta.get_field('image').storage
+_avatar_storage = User._meta.get_field('avatar').storage
+
+
+def post_rows(queryset):
+    """``values()`` of a post queryset with its author's columns and every annotation.
+
+    Prefetches are dropped; :func:`render_post_rows` loads categories and
+    tags for the page it renders.
+    """
+    author_columns = [f'author__{column}' for column in AUTHOR_COLUMNS]
+    return queryset.prefetch_related(None).values(
+        *POST_COLUMNS, *author_columns, *queryset.query.annotations
+    )
+
+
+def related_map(model, post_ids):
+    """``{post id: [{'id', 'name', 'slug'}]}`` of categories or tags.
+
+    Same join and filter as ``prefetch_related('categories')``, so the
+    items come back in the same order.
+    """
+    related = defaultdict(list)
+    rows = model.objects.filter(post__in=post_ids).values_list('post', 'id', 'name', 'slug')
+    for post_id, pk, name, slug in rows:
+        related[post_id].append({'id': pk, 'name': name, 'slug': slug})
+    return related
+
+
+def render_post_rows(rows, request):
+    """Render :func:`post_rows` rows exactly like ``PostListSerializer(many=True).data``"""
+    rows = list(rows)
+    post_ids = [row['id'] for row in rows]
+    categories = related_map(Category, post_ids) if rows else {}
+    tags = related_map(Tag, post_ids) if rows else {}
+    user = getattr(request, 'user', None)
+    user_id = user.pk if user is not None and user.is_authenticated else None
+
+    data = []
+    for row in rows:
+        pk = row['id']
+        is_saved = False
+        if user_id is not None:
+            is_saved = pending_state('save', user_id, pk)
+            if is_saved is None:
+                is_saved = row['is_saved']
+        likes_count = row['likes_count']
+        delta = pending_likes_delta('post_like', pk)
+        if delta:
+            likes_count = max(likes_count + delta, 0)
+        item = {
+            'id': pk,
+            'title': row['title'],
+            'slug': row['slug'],
+            'image': file_url(row['image'], _post_image_storage, request),
+            'image_variants': variant_urls(row['image'], row['image_variants'], _post_image_storage, request),
+            'author': {
+                'id': row['author__id'],
+                'username': row['author__username'],
+                'first_name': row['author__first_name'],
+                'last_name': row['author__last_name'],
+                'avatar': file_url(row['author__avatar'], _avatar_storage, request),
+                'avatar_variants': variant_urls(
+                    row['author__avatar'], row['author__avatar_variants'], _avatar_storage, request
+                ),
+                'role': row['author__role'],
+            },
+            'created_at': _datetime.to_representation(row['created_at']),
+            'updated_at': _datetime.to_representation(row['updated_at']),
+            'status': row['status'],
+            'categories': categories.get(pk, []),
+            'tags': tags.get(pk, []),
+            'comments_count': row['comments_count'],
+            'likes_count': likes_count,
+            'is_saved': is_saved,
+        }
+        if row.get('search_snippet') is not None:
+            item['snippet'] = row['search_snippet']
+        data.append(item)
+    return data
@@ -0,0 +1,253 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+# Image fields with variants: kind -> (model, image field, field recording the variants)
+IMAGE_FIELDS = {
+    'posts': ('blog.Post', 'image', 'image_variants'),
+    'avatars': ('accounts.User', 'avatar', 'avatar_variants'),
+}
+# Pillow format and file extension of each variant format
+FORMATS = {'webp': ('WEBP', 'webp'), 'jpeg': ('JPEG', 'jpg')}
+
+DEFAULT_IMAGE_VARIANTS = {
+    'sizes': {},                    # kind -> {size name: longest side in pixels}
+    'formats': ['webp', 'jpeg'],
+    'quality': 80,
+    'background': True,            # render in a background thread, not the committing request
+}
+
+
+def get_image_variant_settings():
+    config = dict(DEFAULT_IMAGE_VARIANTS)
+    config.update(getattr(settings, 'BLOG_IMAGE_VARIANTS', {}))
+    return config
+
+
+def image_field(kind):
+    """``(model, image field name, variants field name)`` of a kind of image"""
+    label, field, variants_field = IMAGE_FIELDS[kind]
+    return apps.get_model(label), field, variants_field
+
+
+def file_url(name, storage, request):
+    """Same output as DRF's FileField/ImageField for a stored file name"""
+    if not name:
+        return None
+    if not api_settings.UPLOADED_FILES_USE_URL:
+        return name
+    url = storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def variant_urls(name, variants, storage, request):
+    """``{size: {'width', 'height', format: url}}`` of the image ``name``.
+
+    Empty until the variants of that very file are rendered: a record left
+    from a replaced image is ignored.
+    """
+    if not name or not variants or variants.get('source') != name:
+        return {}
+    return {
+        size: {
+            key: file_url(value, storage, request) if key in FORMATS else value
+            for key, value in variant.items()
+        }
+        for size, variant in variants['sizes'].items()
+    }
+
+
+class ImageVariantsField(serializers.Field):
+    """Read-only :func:`variant_urls` of a model's image field"""
+
+    def __init__(self, image_field, variants_field, **kwargs):
+        self.image_field = image_field
+        self.variants_field = variants_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        image = getattr(instance, self.image_field)
+        variants = getattr(instance, self.variants_field)
+        return variant_urls(image.name, variants, image.storage, self.context.get('request'))
+
+
+def variant_name(name, size, extension):
+    """``posts/cover.jpg`` -> ``posts/cover.card.webp``, next to the original"""
+    root, _ = os.path.splitext(name)
+    return f'{root}.{size}.{extension}'
+
+
+def _prepare(image, extension):
+    """``image`` in a mode the format can encode; JPEG has no alpha channel"""
+    if image.mode == 'P':
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    if extension == 'jpg' and image.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        return image.convert('RGB')
+    return image
+
+
+def render_variants(kind, name, config=None):
+    """Write the resized variants of the stored image ``name``; returns their record.
+
+    Each size fits the image in a ``size`` x ``size`` box, never enlarging
+    it, and is saved in every format next to the original, replacing
+    earlier renders. Returns None if the file is missing or not an image.
+    Touches only the storage, so it can run in another process.
+    """
+    config = config or get_image_variant_settings()
+    model, field, _ = image_field(kind)
+    storage = model._meta.get_field(field).storage
+    try:
+        with storage.open(name) as file:
+            original = ImageOps.exif_transpose(Image.open(file))
+            original.load()
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.warning(f'No variants for {kind} image {name!r}: {exc}')
+        return None
+
+    sizes = {}
+    for size, pixels in config['sizes'].get(kind, {}).items():
+        image = original.copy()
+        image.thumbnail((pixels, pixels), Image.Resampling.LANCZOS)
+        variant = {'width': image.width, 'height': image.height}
+        for fmt in config['formats']:
+            pillow_format, extension = FORMATS[fmt]
+            buffer = BytesIO()
+            options = {'method': 4} if fmt == 'webp' else {'optimize': True, 'progressive': True}
+            _prepare(image, extension).save(buffer, pillow_format, quality=config['quality'], **options)
+            path = variant_name(name, size, extension)
+            if storage.exists(path):
+                storage.delete(path)
+            variant[fmt] = storage.save(path, ContentFile(buffer.getvalue()))
+        sizes[size] = variant
+    return {'source': name, 'sizes': sizes}
+
+
+def store_variants(kind, pk, record):
+    """Record rendered variants on their row and invalidate the responses showing them.
+
+    Skipped (returns False) if the image was replaced meanwhile; the newer
+    image has variants of its own coming.
+    """
+    model, field, variants_field = image_field(kind)
+    updated = model.objects.filter(pk=pk, **{field: record['source']}).update(**{variants_field: record})
+    if not updated:
+        return False
+    # update() skips the model signals
+    if kind == 'posts':
+        from .signals import invalidate_posts
+        invalidate_posts(pk)
+    else:
+        from accounts.authentication import forget_user
+        from .cache import GLOBAL_SCOPE, bump_versions
+        forget_user(pk)
+        bump_versions(GLOBAL_SCOPE)
+    return True
+
+
+def variant_paths(record):
+    """Stored file names listed by a variants record"""
+    return {
+        value
+        for variant in (record or {}).get('sizes', {}).values()
+        for key, value in variant.items() if key in FORMATS
+    }
+
+
+def delete_variants(kind, paths):
+    """Delete variant files from the kind's storage; missing ones are skipped"""
+    model, field, _ = image_field(kind)
+    storage = model._meta.get_field(field).storage
+    for path in paths:
+        storage.delete(path)
+
+
+def replace_variants(kind, pk, record, replaced=None):
+    """Record a render (None if it failed) and delete the variant files it supersedes.
+
+    ``replaced`` is the record of the image the row held before. If the row
+    was changed or deleted meanwhile, the render's own files are deleted
+    instead, except those the row lists now. Returns whether ``record`` was
+    stored.
+    """
+    if record is not None and not store_variants(kind, pk, record):
+        model, _, variants_field = image_field(kind)
+        current = model.objects.filter(pk=pk).values_list(variants_field, flat=True).first()
+        delete_variants(kind, variant_paths(record) - variant_paths(current))
+        return False
+    delete_variants(kind, variant_paths(replaced) - variant_paths(record))
+    return record is not None
+
+
+def build_variants(kind, pk, name, replaced=None):
+    """Render and record the variants of row ``pk``'s image ``name``, deleting
+    those of the image it replaced"""
+    replace_variants(kind, pk, render_variants(kind, name), replaced)
+
+
+def needs_variants(kind, instance):
+    """Whether ``instance``'s image has no variants rendered for the current file"""
+    _, field, variants_field = image_field(kind)
+    if not get_image_variant_settings()['sizes'].get(kind):
+        return False
+    if variants_field in instance.get_deferred_fields():
+        return False
+    name = getattr(instance, field).name
+    return bool(name) and (getattr(instance, variants_field) or {}).get('source') != name
+
+
+def schedule_variants(kind, pk, name, replaced=None):
+    """Build the variants of an image once the current transaction commits,
+    in the background thread unless ``background`` is off"""
+    if get_image_variant_settings()['background']:
+        transaction.on_commit(lambda: _get_executor().submit(_build_in_background, kind, pk, name, replaced))
+    else:
+        transaction.on_commit(lambda: build_variants(kind, pk, name, replaced))
+
+
+def schedule_variant_deletion(kind, record):
+    """Delete the files of a variants record once the current transaction commits"""
+    paths = variant_paths(record)
+    if paths:
+        transaction.on_commit(lambda: delete_variants(kind, paths))
+
+
+def _build_in_background(kind, pk, name, replaced):
+    try:
+        build_variants(kind, pk, name, replaced)
+    except Exception:
+        logger.exception(f'Building the variants of {kind} image {name!r} failed; backfill_image_variants retries it')
+    finally:
+        close_old_connections()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """The process-wide variant thread; one, so renders don't compete with requests for CPU"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-variants')
+    return _executor
@@ -0,0 +1,87 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+
+from blog.images import IMAGE_FIELDS, get_image_variant_settings, image_field, render_variants, replace_variants
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the BLOG_IMAGE_VARIANTS of existing post images and avatars that have none '
+        'for their current file, in a pool of worker processes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kinds', nargs='*',
+            help=f'Kinds of images to render (default: {", ".join(IMAGE_FIELDS)})'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Number of worker processes (default: one per CPU)'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Render every image again, e.g. after changing the sizes, formats or quality'
+        )
+
+    def handle(self, *args, **options):
+        config = get_image_variant_settings()
+        kinds = options['kinds'] or [kind for kind in IMAGE_FIELDS if config['sizes'].get(kind)]
+        if not kinds:
+            raise CommandError('No image variant sizes configured in BLOG_IMAGE_VARIANTS')
+        workers = max(options['workers'], 1)
+
+        for kind in kinds:
+            if kind not in IMAGE_FIELDS:
+                raise CommandError(f'Unknown image kind {kind!r}; choose from {", ".join(IMAGE_FIELDS)}')
+            if not config['sizes'].get(kind):
+                raise CommandError(f'No {kind} sizes configured in BLOG_IMAGE_VARIANTS')
+            images = self.pending_images(kind, options['force'])
+            self.stdout.write(f'🖼️  Rendering {len(images)} {kind} images with {workers} processes...')
+            started = time.monotonic()
+            rendered, failed = self.render(kind, images, config, workers)
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {kind}: {rendered} rendered, {failed} unreadable in {time.monotonic() - started:.1f}s'
+            ))
+
+    def pending_images(self, kind, force):
+        """``[(pk, name, variants record)]`` of the images without variants of their current file"""
+        model, field, variants_field = image_field(kind)
+        rows = model.objects.exclude(Q(**{f'{field}__isnull': True}) | Q(**{field: ''}))
+        return [
+            (pk, name, variants) for pk, name, variants in rows.values_list('pk', field, variants_field).iterator()
+            if force or (variants or {}).get('source') != name
+        ]
+
+    def render(self, kind, images, config, workers):
+        """Render in worker processes, recording each result from this one; returns
+        ``(rendered, failed)``. At most a few renders per worker are queued at a time."""
+        rendered = failed = 0
+        # Forked workers must not share this process's database connections
+        connections.close_all()
+        queue = iter(images)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while True:
+                for pk, name, variants in queue:
+                    running[pool.submit(render_variants, kind, name, config)] = (pk, variants)
+                    if len(running) >= workers * 4:
+                        break
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pk, replaced = running.pop(future)
+                    record = future.result()
+                    # Also deletes the files of a replaced image's variants
+                    replace_variants(kind, pk, record, replaced)
+                    if record is None:
+                        failed += 1
+                    else:
+                        rendered += 1
+        return rendered, failed
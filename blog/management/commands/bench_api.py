@@ -0,0 +1,372 @@
+import json
+import math
+import platform
+import time
+from io import StringIO
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+from accounts.tokens import ClaimsRefreshToken
+from blog.middleware import QueryRecorder
+from blog.models import Category, Tag, Post, Comment, Like, SavedPost
+
+User = get_user_model()
+
+ACCOUNTS = '/api/v1/accounts'
+BLOG = '/api/v1/blog'
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'sql_ms')
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of ``values``"""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def route_names(patterns):
+    """All view names reachable from ``patterns``"""
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every blog and accounts API route on a seeded test database: '
+        'latency percentiles, SQL query count and SQL time per endpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=200,
+            help='Number of users in the benchmark dataset (default: 200)'
+        )
+        parser.add_argument(
+            '--posts', type=int, default=2000,
+            help='Number of posts in the benchmark dataset (default: 2000)'
+        )
+        parser.add_argument(
+            '--comments', type=int, default=8000,
+            help='Number of comments in the benchmark dataset (default: 8000)'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=42,
+            help='Random seed of the dataset (default: 42)'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=30,
+            help='Measured requests per endpoint (default: 30)'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Unmeasured requests per endpoint before measuring (default: 3)'
+        )
+        parser.add_argument(
+            '--only', default=None,
+            help='Only run endpoints whose name contains this text'
+        )
+        parser.add_argument(
+            '--no-response-cache', action='store_true',
+            help='Disable the anonymous response cache while benchmarking'
+        )
+        parser.add_argument(
+            '--json', dest='json_path', default=None,
+            help='Write the results as JSON to this file'
+        )
+        parser.add_argument(
+            '--baseline', default=None,
+            help='Compare against results previously saved with --json'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=20.0,
+            help='Percent p95 slowdown reported as a regression (default: 20)'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error when the baseline comparison finds regressions'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read baseline {options["baseline"]}: {exc}')
+
+        overrides = {'BLOG_RESPONSE_CACHE': {}} if options['no_response_cache'] else {}
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(**overrides):
+                self.stdout.write(
+                    f'🌱 Seeding {options["users"]} users, {options["posts"]} posts, '
+                    f'{options["comments"]} comments (seed {options["seed"]})...'
+                )
+                call_command(
+                    'create_extensive_data', bulk=True, users=options['users'],
+                    posts=options['posts'], comments=options['comments'],
+                    seed=options['seed'], stdout=StringIO()
+                )
+                results = self.run_scenarios(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'users': options['users'],
+                'posts': options['posts'],
+                'comments': options['comments'],
+                'seed': options['seed'],
+                'requests': options['requests'],
+                'response_cache': not options['no_response_cache'],
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            },
+            'results': results,
+        }
+        self.print_results(results)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'💾 Results written to {options["json_path"]}')
+
+        if baseline is not None:
+            regressions = self.compare(report, baseline, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} endpoint(s) regressed: {", ".join(regressions)}')
+
+    def build_scenarios(self):
+        """Return ``(name, method, path, data, token)`` tuples.
+
+        ``data`` and ``token`` may be callables of the request number, for
+        endpoints that need a fresh target or token on every request. Toggle
+        endpoints (like/save) alternate between setting and unsetting.
+        """
+        post = (
+            Post.objects.filter(status='published')
+            .order_by('-comments_count', '-likes_count').first()
+        )
+        if post is None:
+            raise CommandError('The benchmark dataset has no published posts')
+        comment = Comment.objects.filter(post=post, parent__isnull=True).order_by('-likes_count').first()
+        category = Category.objects.annotate(total=Count('post')).order_by('-total').first()
+        tag = Tag.objects.annotate(total=Count('post')).order_by('-total').first()
+        feed = list(Post.objects.filter(status='published').order_by('-created_at')[:20])
+        feed_slugs = ','.join(post.slug for post in feed)
+        feed_ids = ','.join(str(post.pk) for post in feed)
+
+        # The reader with the largest saved list exercises the heaviest personal pages
+        reader = User.objects.annotate(total=Count('savedpost')).order_by('-total').first()
+        author = User.objects.get(username='author')
+        admin = User.objects.get(username='admin')
+        like = Like.objects.filter(user=reader).first()
+        saved_post = SavedPost.objects.filter(user=reader).first()
+        token = str(ClaimsRefreshToken.for_user(reader).access_token)
+        author_token = str(ClaimsRefreshToken.for_user(author).access_token)
+        admin_token = str(ClaimsRefreshToken.for_user(admin).access_token)
+        leaving = User.objects.exclude(pk__in=[reader.pk, author.pk, admin.pk]).order_by('pk').first()
+        refresh_tokens = {}
+
+        def refresh_data(i):
+            # Refresh tokens rotate, so every request needs an unused one
+            refresh_tokens[i] = str(ClaimsRefreshToken.for_user(reader))
+            return {'refresh': refresh_tokens[i]}
+
+        def logout_token(i):
+            # Logging out revokes the user's tokens, so every request needs a new one
+            return str(ClaimsRefreshToken.for_user(User.objects.get(pk=leaving.pk)).access_token)
+
+        anonymous_reads = [
+            ('blog root', f'{BLOG}/'),
+            ('post list', f'{BLOG}/posts/'),
+            ('post list cursor', f'{BLOG}/posts/?cursor='),
+            ('post list by category', f'{BLOG}/posts/?categories={category.pk}'),
+            ('post list by tag', f'{BLOG}/posts/?tags={tag.pk}'),
+            ('post search', f'{BLOG}/posts/?search=python'),
+            ('post detail', f'{BLOG}/posts/{post.slug}/'),
+            ('post popular', f'{BLOG}/posts/popular/'),
+            ('post batch', f'{BLOG}/posts/batch/?slugs={feed_slugs}'),
+            ('post engagement', f'{BLOG}/posts/engagement/?ids={feed_ids}'),
+            ('category list', f'{BLOG}/categories/'),
+            ('category detail', f'{BLOG}/categories/{category.slug}/'),
+            ('tag list', f'{BLOG}/tags/'),
+            ('tag detail', f'{BLOG}/tags/{tag.slug}/'),
+            ('comment list', f'{BLOG}/comments/?post={post.pk}'),
+            ('comment detail', f'{BLOG}/comments/{comment.pk}/'),
+            ('accounts root', f'{ACCOUNTS}/'),
+            ('user list', f'{ACCOUNTS}/users/'),
+        ]
+        scenarios = [
+            (f'anon {name}', 'get', path, None, None) for name, path in anonymous_reads
+        ]
+        scenarios += [
+            (f'auth {name}', 'get', path, None, token) for name, path in anonymous_reads
+        ]
+        scenarios += [
+            ('auth post saved', 'get', f'{BLOG}/posts/saved/', None, token),
+            ('auth post my_posts', 'get', f'{BLOG}/posts/my_posts/', None, author_token),
+            ('auth like list', 'get', f'{BLOG}/likes/', None, token),
+            ('auth like detail', 'get', f'{BLOG}/likes/{like.pk}/', None, token),
+            ('auth saved-post list', 'get', f'{BLOG}/saved-posts/', None, token),
+            ('auth saved-post detail', 'get', f'{BLOG}/saved-posts/{saved_post.pk}/', None, token),
+            ('auth user me', 'get', f'{ACCOUNTS}/users/me/', None, token),
+            ('auth user detail', 'get', f'{ACCOUNTS}/users/{reader.pk}/', None, token),
+            ('admin query stats', 'get', f'{BLOG}/stats/queries/', None, admin_token),
+            ('auth post like toggle', 'post', f'{BLOG}/posts/{post.slug}/like/', None, token),
+            ('auth post save toggle', 'post', f'{BLOG}/posts/{post.slug}/save/', None, token),
+            ('auth comment like toggle', 'post', f'{BLOG}/comments/{comment.pk}/like/', None, token),
+            ('auth comment create', 'post', f'{BLOG}/comments/',
+             lambda i: {'post': post.pk, 'text': f'Benchmark comment {i}'}, token),
+            ('auth post create', 'post', f'{BLOG}/posts/',
+             lambda i: {'title': f'Benchmark post {i}', 'content': 'Benchmark content', 'status': 'draft'},
+             author_token),
+            ('anon login', 'post', f'{ACCOUNTS}/auth/login/',
+             {'username': 'author', 'password': 'author123'}, None),
+            ('anon token refresh', 'post', f'{ACCOUNTS}/auth/token/refresh/', refresh_data, None),
+            ('auth logout', 'post', f'{ACCOUNTS}/auth/logout/', None, logout_token),
+            ('anon register', 'post', f'{ACCOUNTS}/auth/register/', lambda i: {
+                'username': f'bench_user_{i}', 'email': f'bench_user_{i}@example.com',
+                'password': 'Bench-pass-123', 'password_confirm': 'Bench-pass-123',
+            }, None),
+        ]
+        return scenarios
+
+    def run_scenarios(self, options):
+        scenarios = self.build_scenarios()
+        if options['only']:
+            scenarios = [s for s in scenarios if options['only'] in s[0]]
+        else:
+            self.check_coverage(scenarios)
+
+        client = Client()
+        requests = max(options['requests'], 1)
+        warmup = max(options['warmup'], 0)
+        results = {}
+        counter = 0
+        for name, method, path, data, token in scenarios:
+            latencies, queries, sql_times, errors = [], [], [], 0
+            for i in range(warmup + requests):
+                counter += 1
+                payload = data(counter) if callable(data) else data
+                bearer = token(counter) if callable(token) else token
+                headers = {'HTTP_AUTHORIZATION': f'Bearer {bearer}'} if bearer else {}
+                kwargs = {'data': payload, 'content_type': 'application/json'} if method == 'post' else {}
+                recorder = QueryRecorder()
+                with connection.execute_wrapper(recorder):
+                    started = time.perf_counter()
+                    response = getattr(client, method)(path, **kwargs, **headers)
+                    elapsed = time.perf_counter() - started
+                if response.status_code >= 400:
+                    errors += 1
+                if i < warmup:
+                    continue
+                latencies.append(elapsed * 1000)
+                queries.append(recorder.count)
+                sql_times.append(recorder.seconds * 1000)
+
+            results[name] = {
+                'method': method.upper(),
+                'path': path,
+                'requests': requests,
+                'errors': errors,
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p95_ms': round(percentile(latencies, 95), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+                'queries': percentile(queries, 50),
+                'max_queries': max(queries),
+                'sql_ms': round(percentile(sql_times, 50), 3),
+            }
+            if errors:
+                self.stdout.write(self.style.WARNING(
+                    f'⚠️ {name}: {errors} of {warmup + requests} requests failed '
+                    f'(last status {response.status_code})'
+                ))
+        return results
+
+    def check_coverage(self, scenarios):
+        """Warn about routes of blog.urls and accounts.urls that no scenario requests"""
+        routes = set()
+        for module in ('blog.urls', 'accounts.urls'):
+            routes |= route_names(get_resolver(module).url_patterns)
+        requested = {resolve(path.split('?')[0]).url_name for _, _, path, _, _ in scenarios}
+        missing = sorted(routes - requested)
+        if missing:
+            self.stdout.write(self.style.WARNING(f'⚠️ Routes not benchmarked: {", ".join(missing)}'))
+
+    def print_results(self, results):
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"endpoint":<32} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"queries":>8} {"sql ms":>8}'
+        )
+        for name, row in results.items():
+            queries = str(row['queries'])
+            if row['max_queries'] != row['queries']:
+                queries += f'-{row["max_queries"]}'
+            self.stdout.write(
+                f'{name:<32} {row["p50_ms"]:>9.2f} {row["p95_ms"]:>9.2f} {row["p99_ms"]:>9.2f} '
+                f'{queries:>8} {row["sql_ms"]:>8.2f}'
+            )
+
+    def compare(self, report, baseline, threshold):
+        """Print changes against ``baseline`` and return the regressed endpoints.
+
+        An endpoint regresses when its p95 latency grows by more than
+        ``threshold`` percent or it runs more queries than before.
+        """
+        results = report['results']
+        previous = baseline.get('results', {})
+        self.stdout.write('')
+        differing = [
+            key for key in ('users', 'posts', 'comments', 'seed', 'response_cache')
+            if baseline.get('meta', {}).get(key) != report['meta'][key]
+        ]
+        if differing:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ Baseline was run with a different {", ".join(differing)}; numbers are not comparable'
+            ))
+        self.stdout.write(f'📊 Compared with baseline ({len(previous)} endpoints)')
+        regressions = []
+        for name, row in results.items():
+            old = previous.get(name)
+            if old is None:
+                self.stdout.write(f'   {name:<32} new endpoint')
+                continue
+            changes = []
+            for metric in METRICS:
+                if not old.get(metric):
+                    continue
+                delta = (row[metric] - old[metric]) / old[metric] * 100
+                changes.append(f'{metric} {delta:+.0f}%')
+            if 'queries' in old:
+                changes.append(f'queries {old["queries"]}→{row["queries"]}')
+            slower = old.get('p95_ms') and row['p95_ms'] > old['p95_ms'] * (1 + threshold / 100)
+            more_queries = row['queries'] > old.get('queries', row['queries'])
+            line = f'   {name:<32} {", ".join(changes)}'
+            if slower or more_queries:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f'{line}  ❌ regression'))
+            else:
+                self.stdout.write(line)
+        if regressions:
+            self.stdout.write(self.style.ERROR(f'❌ {len(regressions)} regression(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ No regressions'))
+        return regressions
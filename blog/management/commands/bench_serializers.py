@@ -0,0 +1,132 @@
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from accounts.tokens import ClaimsRefreshToken
+from blog.middleware import QueryRecorder
+from blog.renderers import StreamingJSONRenderer, orjson
+from .bench_api import BLOG, percentile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark post list rendering with PostListSerializer against the values()-based '
+        'fast path (BLOG_FAST_SERIALIZERS), and DRF\'s JSONRenderer against StreamingJSONRenderer, '
+        'on a seeded test database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=1000,
+            help='Number of posts in the benchmark dataset (default: 1000)'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=42,
+            help='Random seed of the dataset (default: 42)'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=30,
+            help='Measured requests per page size and mode (default: 30)'
+        )
+        parser.add_argument(
+            '--page-sizes', default='10,50,100',
+            help='Comma separated page sizes to measure (default: 10,50,100)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            page_sizes = [int(size) for size in options['page_sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--page-sizes must be comma separated integers')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Every request renders; the response cache would measure nothing
+            with override_settings(BLOG_RESPONSE_CACHE={}):
+                self.stdout.write(f'🌱 Seeding {options["posts"]} posts (seed {options["seed"]})...')
+                call_command(
+                    'create_extensive_data', bulk=True, users=50, posts=options['posts'],
+                    comments=options['posts'] * 2, seed=options['seed'], stdout=StringIO()
+                )
+                self.run_benchmark(page_sizes, max(options['requests'], 1))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def measure(self, client, path, headers, requests, fast):
+        """``(content, p50 ms, p50 SQL ms, queries)`` of ``GET path``"""
+        latencies, sql_times = [], []
+        with override_settings(BLOG_FAST_SERIALIZERS=fast):
+            for i in range(requests + 1):
+                recorder = QueryRecorder()
+                with connection.execute_wrapper(recorder):
+                    started = time.perf_counter()
+                    response = client.get(path, **headers)
+                    if response.streaming:
+                        content = b''.join(response.streaming_content)
+                    else:
+                        content = response.content
+                    elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    raise CommandError(f'GET {path} returned {response.status_code}')
+                if i:  # the first request warms up
+                    latencies.append(elapsed * 1000)
+                    sql_times.append(recorder.seconds * 1000)
+        return content, percentile(latencies, 50), percentile(sql_times, 50), recorder.count
+
+    def run_benchmark(self, page_sizes, requests):
+        reader = User.objects.annotate(total=Count('savedpost')).order_by('-total').first()
+        token = str(ClaimsRefreshToken.for_user(reader).access_token)
+        client = Client()
+
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"request":<28} {"drf ms":>9} {"fast ms":>9} {"sql ms":>8} {"queries":>8} {"speedup":>8}  bytes'
+        )
+        for user, headers in (('anon', {}), ('auth', {'HTTP_AUTHORIZATION': f'Bearer {token}'})):
+            for page_size in page_sizes:
+                path = f'{BLOG}/posts/?page_size={page_size}'
+                expected, drf_ms, _, drf_queries = self.measure(client, path, headers, requests, fast=False)
+                content, fast_ms, sql_ms, queries = self.measure(client, path, headers, requests, fast=True)
+                identical = '✅ identical' if content == expected else '❌ differ'
+                self.stdout.write(
+                    f'{user} page_size={page_size:<14} {drf_ms:>9.2f} {fast_ms:>9.2f} {sql_ms:>8.2f} '
+                    f'{f"{drf_queries}→{queries}":>8} {drf_ms / fast_ms:>7.1f}x  {identical}'
+                )
+        self.compare_renderers(client, page_sizes, requests)
+
+    def compare_renderers(self, client, page_sizes, requests):
+        """Time rendering alone: DRF's JSONRenderer against StreamingJSONRenderer"""
+        renderers = {
+            'drf': lambda data: JSONRenderer().render(data),
+            'fast': lambda data: StreamingJSONRenderer().render(data),
+            'streamed': lambda data: b''.join(StreamingJSONRenderer().iter_render(data)),
+        }
+        orjson_state = 'orjson' if orjson else 'json module, orjson not installed'
+        self.stdout.write('')
+        columns = ' '.join(f'{name + " ms":>11}' for name in renderers)
+        self.stdout.write(f'{"render":<28} {columns}  ({orjson_state})')
+        for page_size in page_sizes:
+            # Unstreamed, so the response keeps its data
+            with override_settings(BLOG_STREAMING_JSON={'min_items': float('inf')}):
+                data = client.get(f'{BLOG}/posts/?page_size={page_size}').data
+            timings = []
+            for render in renderers.values():
+                samples = []
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    render(data)
+                    samples.append((time.perf_counter() - started) * 1000)
+                timings.append(percentile(samples, 50))
+            self.stdout.write(f'page_size={page_size:<18} ' + ' '.join(f'{ms:>11.3f}' for ms in timings))
@@ -1,14 +1,50 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from blog.models import Category, Tag, Post, Comment, Like, SavedPost
-from django.utils.text import slugify
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, transaction
+from blog import sample_content
+from blog.cache import GLOBAL_SCOPE, LISTING_SCOPE, TAXONOMY_SCOPE, bump_versions, slug_key
+from blog.management.commands.reconcile_counters import counter_expressions
+from blog.models import Category, Tag, Post, PostTrending, Comment, Like, SavedPost
+from blog.sample_content import generate_comment_text, generate_tech_title
+from blog.search import drop_search_index, install_search_index, search_index_available
+from blog.slugs import assign_slugs
+from blog.trending import analyze_trending, refresh_trending
+from itertools import chain, islice
+from operator import attrgetter
+import multiprocessing
 import random
+import time
 from faker import Faker
-import uuid
 
 User = get_user_model()
 fake = Faker(['en_US', 'ru_RU'])
 
+CATEGORY_NAMES = [
+    'Programming', 'Web Development', 'Mobile Development', 'DevOps', 
+    'Data Science', 'Machine Learning', 'Artificial Intelligence', 
+    'Database', 'Security', 'Cloud Computing', 'UI/UX Design',
+    'Software Architecture', 'Testing', 'Career', 'Tutorials',
+    'News', 'Reviews', 'Open Source', 'Frameworks', 'Tools'
+]
+
+TAG_NAMES = [
+    'python', 'javascript', 'react', 'django', 'flask', 'nodejs', 
+    'vue', 'angular', 'typescript', 'css', 'html', 'sass', 'bootstrap',
+    'jquery', 'php', 'laravel', 'java', 'spring', 'kotlin', 'swift',
+    'ios', 'android', 'flutter', 'react-native', 'docker', 'kubernetes',
+    'aws', 'azure', 'gcp', 'terraform', 'ansible', 'jenkins', 'git',
+    'github', 'gitlab', 'mongodb', 'postgresql', 'mysql', 'redis',
+    'elasticsearch', 'nginx', 'apache', 'linux', 'ubuntu', 'centos',
+    'vim', 'vscode', 'pycharm', 'api', 'rest', 'graphql', 'microservices',
+    'testing', 'tdd', 'bdd', 'agile', 'scrum', 'design-patterns',
+    'algorithms', 'data-structures', 'performance', 'optimization',
+    'security', 'authentication', 'oauth', 'jwt', 'blockchain',
+    'cryptocurrency', 'ai', 'ml', 'tensorflow', 'pytorch', 'pandas',
+    'numpy', 'jupyter', 'data-analysis', 'data-visualization'
+]
+
 class Command(BaseCommand):
     help = 'Create extensive sample data for testing'
 
@@ -25,6 +61,22 @@ class Command(BaseCommand):
             '--comments', type=int, default=500,
             help='Number of comments to create (default: 500)'
         )
+        parser.add_argument(
+            '--bulk', action='store_true',
+            help='Insert rows with batched bulk_create (for large load-testing datasets)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Rows per bulk_create batch and transaction in --bulk mode (default: 2000)'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help='Random seed for a reproducible dataset'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes generating text in --bulk mode (default: 1, no pool)'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write('🚀 Creating extensive sample data...')
@@ -33,6 +85,18 @@ class Command(BaseCommand):
         posts_count = options['posts']
         comments_count = options['comments']
         
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+            Faker.seed(options['seed'])
+        
+        if options['bulk']:
+            self.handle_bulk(
+                users_count, posts_count, comments_count,
+                max(options['batch_size'], 1), max(options['workers'], 1), options['seed']
+            )
+            self.print_summary()
+            return
+        
         # Clear existing data
         self.stdout.write('🧹 Clearing existing data...')
         Like.objects.all().delete()
@@ -67,6 +131,9 @@ class Command(BaseCommand):
         # Create saved posts
         self.create_saved_posts(users, posts)
         
+        self.print_summary()
+
+    def print_summary(self):
         self.stdout.write(
             self.style.SUCCESS(f'✅ Successfully created sample data!')
         )
@@ -84,6 +151,266 @@ class Command(BaseCommand):
         self.stdout.write('   author/author123 (Author)')
         self.stdout.write('   reader/reader123 (Reader)')
 
+    def handle_bulk(self, users_count, posts_count, comments_count, batch_size, workers, seed):
+        """Create the dataset with batched inserts, one transaction per batch.
+
+        Model save() and signals are bypassed: counters are recounted, the
+        search index and trending scores are rebuilt and cached responses
+        are invalidated once at the end.
+
+        Text is generated in chunks by ``workers`` processes and streamed back
+        in order to this process, the only one writing to the database. Each
+        chunk has its own seed, so ``--seed`` gives the same dataset for any
+        number of workers.
+        """
+        self.batch_size = batch_size
+        self.base_seed = seed if seed is not None else random.randrange(2 ** 31)
+        started = time.monotonic()
+
+        self.pool = multiprocessing.Pool(workers) if workers > 1 else None
+        try:
+            self.generate_bulk(users_count, posts_count, comments_count)
+        finally:
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool.join()
+
+        self.stdout.write(f'⏱️ Bulk generation took {time.monotonic() - started:.1f}s')
+
+    def generate_bulk(self, users_count, posts_count, comments_count):
+
+        search_index = search_index_available(connection)
+        self.clear_data_bulk()
+        if search_index:
+            # One rebuild at the end beats a trigger firing per inserted post
+            drop_search_index(connection)
+
+        self.create_admin_users()
+        categories = self.create_categories_bulk()
+        tags = self.create_tags_bulk()
+        user_ids, author_ids = self.create_users_bulk(users_count)
+        self.create_posts_bulk(posts_count, comments_count, user_ids, author_ids, categories, tags)
+
+        if search_index:
+            self.stdout.write('🔍 Rebuilding search index...')
+            install_search_index(connection)
+        self.stdout.write('📈 Scoring trending posts...')
+        refresh_trending(chunk_size=self.batch_size)
+        analyze_trending()
+        bump_versions(GLOBAL_SCOPE, LISTING_SCOPE, TAXONOMY_SCOPE)
+
+    def generated(self, stage, func, sizes_or_args):
+        """Run ``func`` over per-chunk tasks, in a worker pool when configured.
+
+        Yields the chunks' rows in task order while later chunks are still
+        being generated.
+        """
+        tasks = [
+            (self.base_seed * 1000003 + stage * 7919 + index, arg)
+            for index, arg in enumerate(sizes_or_args)
+        ]
+        if self.pool is not None:
+            chunks = self.pool.imap(func, tasks)
+        else:
+            chunks = map(func, tasks)
+        return chain.from_iterable(chunks)
+
+    def chunked(self, items):
+        """Split a count (or a list) into batch-sized task arguments"""
+        if isinstance(items, int):
+            return [min(self.batch_size, items - start) for start in range(0, items, self.batch_size)]
+        return [items[start:start + self.batch_size] for start in range(0, len(items), self.batch_size)]
+
+    def report_rate(self, stage, rows, started):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(f'   ⚡ {stage}: {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)')
+
+    def insert_batches(self, model, rows, keep=attrgetter('pk'), prepare=None):
+        """bulk_create ``rows`` (any iterable) in batches, one transaction each.
+
+        ``prepare`` is called on each batch before it is inserted. Returns
+        ``keep(obj)`` of every created object, their primary keys by default,
+        or only their number when ``keep`` is None. Each batch is dropped once
+        inserted, so post contents and comment texts never pile up in memory.
+        """
+        rows = iter(rows)
+        kept = []
+        total = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return kept if keep is not None else total
+            with transaction.atomic():
+                if prepare is not None:
+                    prepare(batch)
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            total += len(batch)
+            if keep is not None:
+                kept.extend(keep(obj) for obj in batch)
+
+    def clear_data_bulk(self):
+        """Clear existing data with plain DELETEs instead of per-row signal handling"""
+        self.stdout.write('🧹 Clearing existing data...')
+        tables = [
+            PostTrending._meta.db_table, Like._meta.db_table, SavedPost._meta.db_table, Comment._meta.db_table,
+            Post.categories.through._meta.db_table, Post.tags.through._meta.db_table,
+            Post._meta.db_table, Tag._meta.db_table, Category._meta.db_table,
+        ]
+        # The DELETEs skip the post_delete signal that forgets each slug's id
+        slugs = Post.objects.values_list('slug', flat=True).iterator(chunk_size=self.batch_size)
+        while batch := list(islice(slugs, self.batch_size)):
+            cache.delete_many([slug_key(slug) for slug in batch])
+        with transaction.atomic(), connection.cursor() as cursor:
+            for table in tables:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(table)}')
+        User.objects.filter(is_superuser=False).delete()
+
+    def create_categories_bulk(self):
+        categories = assign_slugs([Category(name=name) for name in CATEGORY_NAMES], 'name')
+        category_ids = self.insert_batches(Category, categories)
+        self.stdout.write(f'📂 Created {len(category_ids)} categories')
+        return category_ids
+
+    def create_tags_bulk(self):
+        tags = assign_slugs([Tag(name=name) for name in TAG_NAMES], 'name')
+        tag_ids = self.insert_batches(Tag, tags)
+        self.stdout.write(f'🏷️ Created {len(tag_ids)} tags')
+        return tag_ids
+
+    def create_users_bulk(self, count):
+        """Create users sharing one precomputed password hash"""
+        self.stdout.write(f'👥 Creating {count} users...')
+        password = make_password('testpass123')
+        roles = ['reader', 'author', 'reader', 'reader', 'author']
+        taken = set(User.objects.values_list('username', flat=True))
+        started = time.monotonic()
+
+        def rows():
+            generated = self.generated(1, sample_content.generate_user_rows, self.chunked(count))
+            for username, first_name, last_name, bio in generated:
+                base = username
+                while username in taken:
+                    username = f"{base}{random.randint(1, 99999)}"
+                taken.add(username)
+                yield User(
+                    username=username,
+                    # Derived from the unique username so it is unique too
+                    email=f'{username}@example.com',
+                    first_name=first_name,
+                    last_name=last_name,
+                    password=password,
+                    role=random.choice(roles),
+                    bio=bio,
+                )
+
+        users = self.insert_batches(User, rows(), keep=attrgetter('pk', 'role'))
+        user_ids = [pk for pk, _ in users]
+        author_ids = [pk for pk, role in users if role in ['author', 'admin']] + list(
+            User.objects.filter(username__in=['admin', 'author']).values_list('pk', flat=True)
+        )
+        self.stdout.write(f'   ✅ Created {len(user_ids)} users')
+        self.report_rate('users', len(user_ids), started)
+        return user_ids, author_ids
+
+    def create_posts_bulk(self, count, comments_count, user_ids, author_ids, categories, tags):
+        """Create posts, comments, likes and saved posts.
+
+        Comments, likes and saves are generated one batch at a time against
+        the ids already inserted, so no plan of the whole dataset is held in
+        memory; the counter columns are recounted once at the end.
+        """
+        status_choices = ['published', 'published', 'published', 'draft']
+        statuses = [random.choice(status_choices) for _ in range(count)]
+
+        self.stdout.write(f'📝 Creating {count} posts...')
+        started = time.monotonic()
+        author_names = dict(
+            User.objects.filter(pk__in=set(author_ids)).values_list('pk', 'first_name')
+        )
+        post_authors = [random.choice(author_ids) for _ in statuses]
+
+        def posts():
+            generated = self.generated(2, sample_content.generate_post_rows, self.chunked(
+                [author_names.get(author_id, '') for author_id in post_authors]
+            ))
+            for index, (title, content) in enumerate(generated):
+                yield Post(title=title, content=content, author_id=post_authors[index], status=statuses[index])
+
+        post_ids = self.insert_batches(Post, posts(), prepare=lambda batch: assign_slugs(batch, 'title'))
+        published = [pk for pk, status in zip(post_ids, statuses) if status == 'published']
+        if not published or not user_ids:
+            comments_count = 0
+        self.report_rate('posts', len(post_ids), started)
+
+        started = time.monotonic()
+        PostCategory = Post.categories.through
+        PostTag = Post.tags.through
+        links = self.insert_batches(PostCategory, (
+            PostCategory(post_id=post_id, category_id=category_id)
+            for post_id in post_ids
+            for category_id in random.sample(categories, random.randint(1, 3))
+        ), keep=None)
+        links += self.insert_batches(PostTag, (
+            PostTag(post_id=post_id, tag_id=tag_id)
+            for post_id in post_ids
+            for tag_id in random.sample(tags, random.randint(2, 8))
+        ), keep=None)
+        self.stdout.write(f'   ✅ Created {len(post_ids)} posts')
+        self.report_rate('categories/tags', links, started)
+
+        self.stdout.write(f'💬 Creating {comments_count} comments...')
+        started = time.monotonic()
+        texts = self.generated(3, sample_content.generate_comment_rows, self.chunked(comments_count))
+        comment_ids = []
+        top_level_by_post = {}
+        while batch := list(islice(texts, self.batch_size)):
+            comments = []
+            for text in batch:
+                post_id = random.choice(published)
+                # Replies point at top-level comments of the same post from
+                # earlier batches, like the regular mode
+                candidates = top_level_by_post.get(post_id)
+                parent_id = random.choice(candidates) if candidates and random.random() < 0.2 else None
+                comments.append(Comment(
+                    user_id=random.choice(user_ids), post_id=post_id, parent_id=parent_id, text=text,
+                ))
+            comment_ids += self.insert_batches(Comment, comments)
+            for comment in comments:
+                if comment.parent_id is None:
+                    top_level_by_post.setdefault(comment.post_id, []).append(comment.pk)
+        self.stdout.write(f'   ✅ Created {comments_count} comments')
+        self.report_rate('comments', comments_count, started)
+
+        def likes(user_id):
+            for post_id in random.sample(published, random.randint(min(5, len(published)), min(20, len(published)))):
+                yield Like(user_id=user_id, post_id=post_id)
+            k = random.randint(min(2, len(comment_ids)), min(10, len(comment_ids)))
+            for comment_id in random.sample(comment_ids, k):
+                yield Like(user_id=user_id, comment_id=comment_id)
+
+        def saves(user_id):
+            for post_id in random.sample(published, random.randint(min(2, len(published)), min(10, len(published)))):
+                yield SavedPost(user_id=user_id, post_id=post_id)
+
+        engaged = user_ids if published else []
+
+        self.stdout.write('❤️ Creating likes...')
+        started = time.monotonic()
+        like_count = self.insert_batches(Like, chain.from_iterable(map(likes, engaged)), keep=None)
+        self.stdout.write(f'   ✅ Created {like_count} likes')
+        self.report_rate('likes', like_count, started)
+
+        self.stdout.write('🔖 Creating saved posts...')
+        started = time.monotonic()
+        save_count = self.insert_batches(SavedPost, chain.from_iterable(map(saves, engaged)), keep=None)
+        self.stdout.write(f'   ✅ Created {save_count} saved posts')
+        self.report_rate('saved posts', save_count, started)
+
+        self.stdout.write('🔢 Counting likes and comments...')
+        for model, expressions in counter_expressions():
+            with transaction.atomic():
+                model.objects.update(**expressions)
+
     def create_admin_users(self):
         """Create default admin users"""
         admin_user, created = User.objects.get_or_create(
@@ -135,20 +462,9 @@ class Command(BaseCommand):
 
     def create_categories(self):
         """Create blog categories"""
-        categories_data = [
-            'Programming', 'Web Development', 'Mobile Development', 'DevOps', 
-            'Data Science', 'Machine Learning', 'Artificial Intelligence', 
-            'Database', 'Security', 'Cloud Computing', 'UI/UX Design',
-            'Software Architecture', 'Testing', 'Career', 'Tutorials',
-            'News', 'Reviews', 'Open Source', 'Frameworks', 'Tools'
-        ]
-        
         categories = []
-        for cat_name in categories_data:
-            category, created = Category.objects.get_or_create(
-                name=cat_name,
-                defaults={'slug': slugify(cat_name)}
-            )
+        for cat_name in CATEGORY_NAMES:
+            category, created = Category.objects.get_or_create(name=cat_name)
             categories.append(category)
             if created:
                 self.stdout.write(f'📂 Created category: {cat_name}')
@@ -157,28 +473,9 @@ class Command(BaseCommand):
 
     def create_tags(self):
         """Create blog tags"""
-        tags_data = [
-            'python', 'javascript', 'react', 'django', 'flask', 'nodejs', 
-            'vue', 'angular', 'typescript', 'css', 'html', 'sass', 'bootstrap',
-            'jquery', 'php', 'laravel', 'java', 'spring', 'kotlin', 'swift',
-            'ios', 'android', 'flutter', 'react-native', 'docker', 'kubernetes',
-            'aws', 'azure', 'gcp', 'terraform', 'ansible', 'jenkins', 'git',
-            'github', 'gitlab', 'mongodb', 'postgresql', 'mysql', 'redis',
-            'elasticsearch', 'nginx', 'apache', 'linux', 'ubuntu', 'centos',
-            'vim', 'vscode', 'pycharm', 'api', 'rest', 'graphql', 'microservices',
-            'testing', 'tdd', 'bdd', 'agile', 'scrum', 'design-patterns',
-            'algorithms', 'data-structures', 'performance', 'optimization',
-            'security', 'authentication', 'oauth', 'jwt', 'blockchain',
-            'cryptocurrency', 'ai', 'ml', 'tensorflow', 'pytorch', 'pandas',
-            'numpy', 'jupyter', 'data-analysis', 'data-visualization'
-        ]
-        
         tags = []
-        for tag_name in tags_data:
-            tag, created = Tag.objects.get_or_create(
-                name=tag_name,
-                defaults={'slug': slugify(tag_name)}
-            )
+        for tag_name in TAG_NAMES:
+            tag, created = Tag.objects.get_or_create(name=tag_name)
             tags.append(tag)
             if created:
                 self.stdout.write(f'🏷️ Created tag: {tag_name}')
@@ -227,16 +524,10 @@ class Command(BaseCommand):
         status_choices = ['published', 'published', 'published', 'draft']  # More published
         
         # Sample tech content templates
-        content_templates = [
-            self.get_programming_content(),
-            self.get_tutorial_content(),
-            self.get_review_content(),
-            self.get_news_content(),
-            self.get_guide_content()
-        ]
+        content_templates = sample_content.CONTENT_TEMPLATES
         
         for i in range(count):
-            title = self.generate_tech_title()
+            title = generate_tech_title()
             content = random.choice(content_templates).format(
                 title=title,
                 author=random.choice(authors).get_full_name(),
@@ -247,7 +538,6 @@ class Command(BaseCommand):
             
             post = Post.objects.create(
                 title=title,
-                slug=slugify(title) + f"-{uuid.uuid4().hex[:8]}",
                 content=content,
                 author=random.choice(authors),
                 status=random.choice(status_choices)
@@ -285,7 +575,7 @@ class Command(BaseCommand):
                 if existing_comments.exists():
                     parent = random.choice(existing_comments)
             
-            comment_text = self.generate_comment_text()
+            comment_text = generate_comment_text()
             
             Comment.objects.create(
                 user=user,
@@ -336,313 +626,3 @@ class Command(BaseCommand):
                 saved_count += 1
         
         self.stdout.write(f'   ✅ Created {saved_count} saved posts')
-
-    def generate_tech_title(self):
-        """Generate realistic tech blog titles"""
-        templates = [
-            "Getting Started with {tech}",
-            "10 Best Practices for {tech} Development", 
-            "Building {concept} with {tech}",
-            "Complete Guide to {tech} in 2025",
-            "{tech} vs Other Frameworks: A Comparison",
-            "Advanced {tech} Techniques You Should Know",
-            "How to Build a {concept} Using {tech}",
-            "Understanding {concept} in {tech}",
-            "Top {tech} Libraries You Should Try",
-            "Mastering {concept} with {tech}",
-            "Common {tech} Mistakes and How to Avoid Them",
-            "Why {tech} is Perfect for {concept}",
-            "{tech} Tutorial: From Beginner to Expert",
-            "Performance Optimization in {tech}",
-            "Testing Strategies for {tech} Applications"
-        ]
-        
-        tech_options = [
-            'React', 'Django', 'Python', 'JavaScript', 'Node.js', 'Vue.js',
-            'Angular', 'TypeScript', 'Docker', 'Kubernetes', 'AWS', 'MongoDB',
-            'PostgreSQL', 'GraphQL', 'REST API', 'Machine Learning', 'AI'
-        ]
-        
-        concept_options = [
-            'Web Apps', 'APIs', 'Microservices', 'Authentication', 'Databases',
-            'User Interfaces', 'Backend Systems', 'Mobile Apps', 'Cloud Solutions',
-            'Data Analysis', 'Real-time Features', 'E-commerce Sites', 'Dashboards'
-        ]
-        
-        template = random.choice(templates)
-        return template.format(
-            tech=random.choice(tech_options),
-            concept=random.choice(concept_options)
-        )
-
-    def get_programming_content(self):
-        return """# {title}
-
-Welcome to this comprehensive guide on programming concepts and best practices.
-
-## Introduction
-
-In this article, we'll explore the fundamentals and advanced techniques that every developer should know. Whether you're a beginner or an experienced programmer, you'll find valuable insights here.
-
-## Key Concepts
-
-### 1. Code Organization
-```python
-class ExampleClass:
-    def __init__(self):
-        self.data = []
-    
-    def process_data(self, input_data):
-        # Process the data
-        return processed_data
-```
-
-### 2. Best Practices
-- Write clean, readable code
-- Use meaningful variable names
-- Add proper documentation
-- Implement error handling
-
-## Performance Considerations
-
-When building applications, performance is crucial:
-
-1. **Optimize database queries**
-2. **Use caching strategies**  
-3. **Minimize resource usage**
-4. **Profile your code regularly**
-
-## Conclusion
-
-{example}
-
-Happy coding!
-"""
-
-    def get_tutorial_content(self):
-        return """# {title}
-
-## Step-by-Step Tutorial
-
-This tutorial will walk you through creating a complete application from scratch.
-
-### Prerequisites
-- Basic knowledge of programming
-- Development environment setup
-- Understanding of web technologies
-
-### Step 1: Project Setup
-```bash
-mkdir my-project
-cd my-project
-npm init -y
-```
-
-### Step 2: Installation
-Install the required dependencies:
-
-```bash
-npm install express mongoose cors
-npm install -D nodemon
-```
-
-### Step 3: Basic Configuration
-Create the main application file:
-
-```javascript
-const express = require('express');
-const app = express();
-
-app.use(express.json());
-app.use(cors());
-
-app.get('/', (req, res) => {{
-    res.json({{ message: 'Hello World!' }});
-}});
-
-const PORT = process.env.PORT || 3000;
-app.listen(PORT, () => {{
-    console.log(`Server running on port ${{PORT}}`);
-}});
-```
-
-### Step 4: Testing
-Run your application and test the endpoints.
-
-## Next Steps
-- Add authentication
-- Implement error handling
-- Add data validation
-- Deploy to production
-
-{example}
-"""
-
-    def get_review_content(self):
-        return """# {title}
-
-## Product Review
-
-In this comprehensive review, we'll examine the features, pros, and cons of this technology.
-
-### Overview
-This tool has gained significant popularity in the developer community due to its ease of use and powerful features.
-
-### Key Features
-- **Feature 1**: Excellent performance
-- **Feature 2**: Great documentation
-- **Feature 3**: Active community support
-- **Feature 4**: Regular updates
-
-### Pros
-✅ Easy to learn and use
-✅ Great performance
-✅ Excellent documentation
-✅ Strong community
-✅ Regular updates
-
-### Cons
-❌ Limited customization options
-❌ Learning curve for advanced features
-❌ Some compatibility issues
-
-### Rating: 4.5/5 Stars
-
-### Conclusion
-Overall, this is an excellent choice for developers looking for a reliable and efficient solution.
-
-{example}
-"""
-
-    def get_news_content(self):
-        return """# {title}
-
-## Latest Tech News
-
-Breaking news in the world of technology and software development.
-
-### What's New
-The latest update brings several exciting features and improvements:
-
-- Enhanced performance
-- New API endpoints
-- Improved security
-- Better error handling
-- Updated documentation
-
-### Industry Impact
-This development is expected to have a significant impact on:
-1. Developer productivity
-2. Application performance
-3. Security standards
-4. Industry best practices
-
-### Community Response
-The developer community has responded positively to these changes:
-
-> "This is exactly what we needed. The new features will make our development process much more efficient." - {author}
-
-### Looking Forward
-Upcoming features in the roadmap include:
-- Advanced analytics
-- Machine learning integration
-- Enhanced mobile support
-- Cloud-native features
-
-{example}
-"""
-
-    def get_guide_content(self):
-        return """# {title}
-
-## Complete Developer Guide
-
-This comprehensive guide covers everything you need to know about modern development practices.
-
-### Table of Contents
-1. Getting Started
-2. Core Concepts
-3. Advanced Techniques
-4. Best Practices
-5. Troubleshooting
-
-### Getting Started
-
-Before diving into the technical details, let's set up our development environment:
-
-```bash
-# Install required tools
-curl -o- https://example.com/install.sh | bash
-```
-
-### Core Concepts
-
-Understanding the fundamental concepts is crucial for success:
-
-#### Concept 1: Architecture
-Modern applications follow specific architectural patterns for scalability and maintainability.
-
-#### Concept 2: Data Flow
-Understanding how data flows through your application is essential.
-
-#### Concept 3: Security
-Implementing proper security measures from the beginning.
-
-### Advanced Techniques
-
-Once you master the basics, you can explore advanced techniques:
-
-- Performance optimization
-- Caching strategies
-- Database optimization
-- Code splitting
-- Lazy loading
-
-### Best Practices Checklist
-
-- [ ] Code is properly documented
-- [ ] Tests are comprehensive
-- [ ] Security measures are in place
-- [ ] Performance is optimized
-- [ ] Error handling is robust
-
-### Troubleshooting Common Issues
-
-**Issue 1**: Application not starting
-- Check dependencies
-- Verify configuration
-- Review logs
-
-**Issue 2**: Performance problems
-- Profile the application
-- Check database queries
-- Optimize critical paths
-
-{example}
-"""
-
-    def generate_comment_text(self):
-        """Generate realistic comment text"""
-        comments = [
-            "Great article! Very informative and well-written.",
-            "Thanks for sharing this. I learned something new today.",
-            "This is exactly what I was looking for. Bookmarked!",
-            "Excellent explanation. The examples really helped me understand.",
-            "Could you add more details about the implementation?",
-            "I followed this tutorial and it worked perfectly. Thanks!",
-            "This approach solved my problem. Much appreciated!",
-            "Very helpful post. Looking forward to more content like this.",
-            "The code examples are clear and easy to follow.",
-            "I had the same issue and this fixed it. Thank you!",
-            "Interesting perspective. I hadn't thought of it this way.",
-            "Well explained! This will definitely help other developers.",
-            "Great tutorial! Step-by-step instructions were perfect.",
-            "This is a common problem and your solution is elegant.",
-            "Thanks for taking the time to write this detailed explanation.",
-            "The performance improvements are impressive!",
-            "I implemented this in my project and it works great.",
-            "Could you also cover the security aspects?",
-            "This saved me hours of debugging. Much appreciated!",
-            "Clear and concise explanation. Perfect for beginners."
-        ]
-        return random.choice(comments)
\ No newline at end of file
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.cache import LISTING_SCOPE, bump_versions
+from blog.trending import analyze_trending, get_trending_settings, refresh_trending
+
+
+class Command(BaseCommand):
+    help = 'Recompute trending scores of all published posts from their engagement'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of posts scored per transaction (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        config = get_trending_settings()
+        self.stdout.write(
+            f"📈 Half-life {config['half_life_hours']}h, weights "
+            + ', '.join(f'{kind} {weight:g}' for kind, weight in config['weights'].items())
+        )
+        started = time.monotonic()
+        written = refresh_trending(chunk_size=max(options['chunk_size'], 1))
+        analyze_trending()
+        bump_versions(LISTING_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Scored {written} posts in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from blog.models import Post, Comment, Like
+
+
+def count_subquery(queryset, field):
+    """Correlated COUNT(*) over ``queryset`` grouped by ``field``, 0 when empty"""
+    counted = queryset.order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def counter_expressions():
+    """``(model, {counter field: recount expression})`` of every denormalized counter"""
+    return [
+        (Post, {
+            'likes_count': count_subquery(Like.objects.filter(post=OuterRef('pk')), 'post'),
+            'comments_count': count_subquery(Comment.objects.filter(post=OuterRef('pk')), 'post'),
+        }),
+        (Comment, {
+            'likes_count': count_subquery(Like.objects.filter(comment=OuterRef('pk')), 'comment'),
+        }),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized like/comment counters and repair drifted rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of rows checked per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drifted counters without writing them'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+        dry_run = options['dry_run']
+
+        for model, expressions in counter_expressions():
+            checked, repaired = self.reconcile(model, expressions, chunk_size, dry_run)
+            verb = 'drifted' if dry_run else 'repaired'
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: checked {checked}, {verb} {repaired}'
+            )
+
+        self.stdout.write(self.style.SUCCESS('✅ Counters reconciled'))
+
+    def reconcile(self, model, expressions, chunk_size, dry_run):
+        fields = list(expressions)
+        actual_names = {field: f'actual_{field}' for field in fields}
+        checked = repaired = 0
+        last_pk = 0
+
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    model.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .annotate(**{actual_names[f]: expr for f, expr in expressions.items()})
+                    .values('pk', *fields, *actual_names.values())[:chunk_size]
+                )
+                if not rows:
+                    break
+
+                drifted = [
+                    row['pk'] for row in rows
+                    if any(row[f] != row[actual_names[f]] for f in fields)
+                ]
+                if drifted and not dry_run:
+                    # Recount inside the UPDATE itself so concurrent likes and
+                    # comments committed since the SELECT are not overwritten
+                    model.objects.filter(pk__in=drifted).update(**expressions)
+
+            checked += len(rows)
+            repaired += len(drifted)
+            last_pk = rows[-1]['pk']
+
+        return checked, repaired
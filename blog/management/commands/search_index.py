@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from blog.search import (
+    install_search_index, optimize_search_index, rebuild_search_index,
+    search_index_available, supports_search_index,
+)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or optimize the SQLite FTS5 full-text index used by post search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--optimize', action='store_true',
+            help='Merge index segments instead of rebuilding'
+        )
+        parser.add_argument(
+            '--database', default='default',
+            help='Database alias to operate on (default: default)'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not supports_search_index(connection):
+            raise CommandError(
+                'The full-text index needs SQLite with FTS5; search uses the icontains fallback.'
+            )
+
+        if install_search_index(connection):
+            self.stdout.write('🔧 Installed missing search index objects')
+
+        if options['optimize']:
+            optimize_search_index(connection)
+            self.stdout.write(self.style.SUCCESS('✅ Search index optimized'))
+        else:
+            rebuild_search_index(connection)
+            self.stdout.write(self.style.SUCCESS('✅ Search index rebuilt'))
+
+        if not search_index_available(connection):
+            raise CommandError('Search index is incomplete after the operation')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from blog.replicas import get_replica_settings
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the default SQLite database over local replica files (BLOG_READ_REPLICAS), '
+        'standing in for replication when testing replica reads locally'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Replica aliases to refresh (default: every alias in BLOG_READ_REPLICAS)'
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or get_replica_settings()['replicas']
+        if not aliases:
+            raise CommandError('No replicas configured in BLOG_READ_REPLICAS')
+        source = connections[DEFAULT_DB_ALIAS]
+        for alias in aliases:
+            if alias not in connections.settings:
+                raise CommandError(f'Unknown database alias {alias!r}')
+            if alias == DEFAULT_DB_ALIAS:
+                raise CommandError('The default database is the primary, not a replica')
+            target = connections[alias]
+            if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+                raise CommandError(
+                    f'Only SQLite databases can be copied; {alias!r} must be kept up to date '
+                    'by the database\'s own replication'
+                )
+
+            source.ensure_connection()
+            target.ensure_connection()
+            # SQLite's online backup: a consistent snapshot, schema included
+            source.connection.backup(target.connection)
+            self.stdout.write(self.style.SUCCESS(f'✅ {alias} refreshed from {DEFAULT_DB_ALIAS}'))
@@ -0,0 +1,193 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_INSTRUMENTATION = {
+    'sample_rate': 0.01,        # fraction of requests instrumented
+    'slow_request_ms': 500,     # log requests slower than this
+    'max_queries': 30,          # log requests running more queries than this
+    'duplicate_threshold': 5,   # same query shape this often in one request is an N+1
+}
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+def get_instrumentation_settings():
+    config = dict(DEFAULT_QUERY_INSTRUMENTATION)
+    config.update(getattr(settings, 'BLOG_QUERY_INSTRUMENTATION', {}))
+    return config
+
+
+def query_shape(sql):
+    """SQL with literals and ``IN`` list lengths removed.
+
+    Parameters are already placeholders, so queries differing only in their
+    values (``WHERE post_id = %s`` for each post of a page) share a shape.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _NUMBER.sub('?', sql)
+
+
+class QueryRecorder:
+    """Database execute wrapper counting queries, their time and their shapes"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.shapes[sql] += 1
+
+    def duplicates(self, threshold):
+        """``{shape: count}`` of shapes run at least ``threshold`` times"""
+        shapes = Counter()
+        for sql, count in self.shapes.items():
+            shapes[query_shape(sql)] += count
+        return {shape: count for shape, count in shapes.most_common() if count >= threshold}
+
+
+class QueryStats:
+    """Per-view aggregates of instrumented requests, kept in process memory"""
+
+    max_shapes = 10
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, duration, recorder, duplicates):
+        with self.lock:
+            entry = self.views.setdefault(view, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'sql_ms': 0.0,
+                'duration_ms': 0.0,
+                'max_duration_ms': 0.0,
+                'n_plus_one_requests': 0,
+                'n_plus_one_shapes': Counter(),
+            })
+            entry['requests'] += 1
+            entry['queries'] += recorder.count
+            entry['max_queries'] = max(entry['max_queries'], recorder.count)
+            entry['sql_ms'] += recorder.seconds * 1000
+            entry['duration_ms'] += duration * 1000
+            entry['max_duration_ms'] = max(entry['max_duration_ms'], duration * 1000)
+            if duplicates:
+                entry['n_plus_one_requests'] += 1
+                shapes = entry['n_plus_one_shapes']
+                for shape in duplicates:
+                    if shape in shapes or len(shapes) < self.max_shapes:
+                        shapes[shape] += 1
+
+    def snapshot(self):
+        """Per-view averages and totals, the most SQL time first"""
+        with self.lock:
+            views = {
+                view: {**entry, 'n_plus_one_shapes': Counter(entry['n_plus_one_shapes'])}
+                for view, entry in self.views.items()
+            }
+        rows = []
+        for view, entry in views.items():
+            requests = entry['requests']
+            rows.append({
+                'view': view,
+                'requests': requests,
+                'avg_queries': round(entry['queries'] / requests, 2),
+                'max_queries': entry['max_queries'],
+                'avg_sql_ms': round(entry['sql_ms'] / requests, 3),
+                'total_sql_ms': round(entry['sql_ms'], 3),
+                'avg_duration_ms': round(entry['duration_ms'] / requests, 3),
+                'max_duration_ms': round(entry['max_duration_ms'], 3),
+                'n_plus_one_requests': entry['n_plus_one_requests'],
+                'n_plus_one_shapes': [
+                    {'shape': shape, 'requests': count}
+                    for shape, count in entry['n_plus_one_shapes'].most_common()
+                ],
+            })
+        return sorted(rows, key=lambda row: row['total_sql_ms'], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+query_stats = QueryStats()
+
+
+class QueryInstrumentationMiddleware:
+    """Record query count, SQL time and repeated query shapes per request.
+
+    Configured by ``BLOG_QUERY_INSTRUMENTATION`` (see
+    ``DEFAULT_QUERY_INSTRUMENTATION``); only a ``sample_rate`` fraction of
+    requests is instrumented, the rest pay nothing but a random draw.
+    Instrumented requests are aggregated per view into ``query_stats``.
+    Outliers and N+1 patterns are logged. With ``DEBUG`` or for staff users the
+    numbers are also sent as ``X-Query-Count``, ``X-SQL-Time-Ms`` and
+    ``X-Query-Duplicates`` headers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_instrumentation_settings()
+        if random.random() >= config['sample_rate']:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        duplicates = recorder.duplicates(config['duplicate_threshold'])
+        view = self.view_name(request)
+        query_stats.record(view, duration, recorder, duplicates)
+
+        sql_ms = recorder.seconds * 1000
+        if duplicates:
+            shape, count = next(iter(duplicates.items()))
+            logger.warning(
+                f'Possible N+1 in {view}: {count} queries shaped like {shape[:200]!r} '
+                f'({recorder.count} queries, {sql_ms:.1f}ms SQL)'
+            )
+        elif recorder.count > config['max_queries'] or duration * 1000 > config['slow_request_ms']:
+            logger.warning(
+                f'Slow request {view}: {duration * 1000:.1f}ms, '
+                f'{recorder.count} queries, {sql_ms:.1f}ms SQL'
+            )
+
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or getattr(user, 'is_staff', False):
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-SQL-Time-Ms'] = f'{sql_ms:.2f}'
+            response['X-Query-Duplicates'] = str(sum(duplicates.values()))
+        return response
+
+    def view_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return f'{request.method} <unresolved>'
+        return f'{request.method} {match.view_name}'
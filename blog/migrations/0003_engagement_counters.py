@@ -0,0 +1,49 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:03
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, field):
+    counted = queryset.order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def populate_counters(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    Like = apps.get_model('blog', 'Like')
+    Post.objects.update(
+        likes_count=_count(Like.objects.filter(post=OuterRef('pk')), 'post'),
+        comments_count=_count(Comment.objects.filter(post=OuterRef('pk')), 'post'),
+    )
+    Comment.objects.update(
+        likes_count=_count(Like.objects.filter(comment=OuterRef('pk')), 'comment'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_savedpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
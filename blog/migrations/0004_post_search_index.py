@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from blog.search import drop_search_index, install_search_index
+
+
+def create_search_index(apps, schema_editor):
+    # Only SQLite builds with FTS5 get the index; other backends keep the
+    # icontains search fallback
+    install_search_index(schema_editor.connection)
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, remove_search_index),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:23
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, field):
+    counted = queryset.order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def remove_duplicate_likes(apps, schema_editor):
+    """Keep the oldest of any duplicated likes and recount their targets"""
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    Like = apps.get_model('blog', 'Like')
+    for target, model, other in (('post', Post, 'comment'), ('comment', Comment, 'post')):
+        duplicates = (
+            Like.objects.filter(**{f'{other}__isnull': True, f'{target}__isnull': False})
+            .values('user', target).annotate(keep=Min('pk'), total=Count('pk'))
+            .filter(total__gt=1)
+        )
+        target_ids = set()
+        for row in duplicates:
+            Like.objects.filter(
+                user=row['user'], **{target: row[target], f'{other}__isnull': True}
+            ).exclude(pk=row['keep']).delete()
+            target_ids.add(row[target])
+        if target_ids:
+            model.objects.filter(pk__in=target_ids).update(
+                likes_count=_count(Like.objects.filter(**{target: OuterRef('pk')}), target),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_likes, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='like',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='like',
+            constraint=models.UniqueConstraint(condition=models.Q(('comment__isnull', True)), fields=('user', 'post'), name='unique_post_like'),
+        ),
+        migrations.AddConstraint(
+            model_name='like',
+            constraint=models.UniqueConstraint(condition=models.Q(('post__isnull', True)), fields=('user', 'comment'), name='unique_comment_like'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def analyze(apps, schema_editor):
+    """Collect SQLite planner statistics so the new indexes are chosen for
+    ordered listings (without them an OR filter is planned as index lookups
+    plus a sort)"""
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('ANALYZE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_like_unique_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created_at'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at'], name='comment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'created_at'], name='post_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'created_at'], name='post_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['created_at'], name='post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedpost',
+            index=models.Index(fields=['user', 'saved_at'], name='savedpost_user_saved_idx'),
+        ),
+        migrations.RunPython(analyze, migrations.RunPython.noop),
+    ]
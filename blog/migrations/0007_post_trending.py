@@ -0,0 +1,51 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+from blog.trending import age_boost, get_trending_settings, trending_score
+
+
+def score_published_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    PostTrending = apps.get_model('blog', 'PostTrending')
+    config = get_trending_settings()
+    weights = config['weights']
+    posts = Post.objects.filter(status='published').annotate(saves=Count('savedpost')).values_list(
+        'pk', 'created_at', 'likes_count', 'comments_count', 'saves'
+    )
+    rows = []
+    for pk, created_at, likes, comments, saves in posts.iterator():
+        engagement = weights['like'] * likes + weights['comment'] * comments + weights['save'] * saves
+        boost = age_boost(created_at, config['half_life_hours'])
+        rows.append(PostTrending(
+            post_id=pk, engagement=engagement, boost=boost, score=trending_score(engagement, boost),
+        ))
+    PostTrending.objects.bulk_create(rows, batch_size=1000)
+    if schema_editor.connection.vendor == 'sqlite':
+        # Statistics let the planner read popular posts from the score index
+        schema_editor.execute('ANALYZE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_comment_savedpost_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTrending',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='blog.post')),
+                ('engagement', models.FloatField(default=0)),
+                ('boost', models.FloatField(default=0)),
+                ('score', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['score', 'post'], name='trending_score_idx')],
+            },
+        ),
+        migrations.RunPython(score_published_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-17 08:02
+
+import blog.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchIndex',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='blog.post')),
+                ('document', blog.search.SearchDocumentField(db_column='blog_post_fts')),
+            ],
+            options={
+                'db_table': 'blog_post_fts',
+                'managed': False,
+            },
+        ),
+    ]
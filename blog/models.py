@@ -1,15 +1,15 @@
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Value
 from django.conf import settings
-from django.utils.text import slugify
+from .search import SEARCH_TABLE, SearchDocumentField
+from .slugs import save_with_slug
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True, blank=True)
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        save_with_slug(self, self.name, lambda: super(Category, self).save(*args, **kwargs))
 
     def __str__(self):
         return self.name
@@ -19,13 +19,47 @@ class Tag(models.Model):
     slug = models.SlugField(unique=True, blank=True)
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        save_with_slug(self, self.name, lambda: super(Tag, self).save(*args, **kwargs))
 
     def __str__(self):
         return self.name
 
+class PostQuerySet(models.QuerySet):
+    def with_engagement(self, user=None, flags=('is_liked', 'is_saved')):
+        """Annotate the given user's like/save state (only the given ``flags``).
+
+        Counts are read from the denormalized ``likes_count``/``comments_count``
+        columns and the flags are ``EXISTS`` subqueries of the main SELECT, so a
+        page of posts costs the same number of queries regardless of its size.
+        """
+        if user is not None and user.is_authenticated:
+            subqueries = {
+                # comment IS NULL lets the lookup use the unique_post_like index
+                'is_liked': Like.objects.filter(post=OuterRef('pk'), user=user, comment__isnull=True),
+                'is_saved': SavedPost.objects.filter(post=OuterRef('pk'), user=user),
+            }
+            return self.annotate(**{flag: Exists(subqueries[flag]) for flag in flags})
+        return self.annotate(**{flag: Value(False) for flag in flags})
+
+    def saved_by(self, user):
+        """Posts saved by ``user``, annotated with ``saved_at`` and ``saved_id``.
+
+        Joins through SavedPost in SQL so the feed can be ordered, sliced and
+        keyset-paginated without loading the user's whole history.
+        """
+        return self.filter(savedpost__user=user).annotate(
+            saved_at=F('savedpost__saved_at'), saved_id=F('savedpost__id'),
+        )
+
+    def trending(self):
+        """Posts with a trending row, highest ``trending_score`` first.
+
+        Reads the score index from the top instead of ranking every post.
+        """
+        return self.filter(trending__isnull=False).annotate(
+            trending_score=F('trending__score'), trending_id=F('trending__post'),
+        ).order_by('-trending_score', '-trending_id')
+
 class Post(models.Model):
     STATUS_CHOICES = (
         ('draft', 'Draft'),
@@ -35,36 +69,76 @@ class Post(models.Model):
     slug = models.SlugField(unique=True, blank=True)
     content = models.TextField()
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    # Resized copies of the image, rendered by blog.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
     categories = models.ManyToManyField(Category, blank=True)
     tags = models.ManyToManyField(Tag, blank=True)
+    # Denormalized counters, maintained by blog.signals
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        # Listings are newest first, for everyone (status) or per author
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='post_status_created_idx'),
+            models.Index(fields=['author', 'created_at'], name='post_author_created_idx'),
+            models.Index(fields=['created_at'], name='post_created_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            
-            # Ensure slug is unique
-            while Post.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            
-            self.slug = slug
-        super().save(*args, **kwargs)
+        # Unique slug from the title: "title", then "title-1", "title-2"...
+        save_with_slug(self, self.title, lambda: super(Post, self).save(*args, **kwargs))
 
     def __str__(self):
         return self.title
 
+class PostTrending(models.Model):
+    """Trending rank of a published post, maintained by ``blog.trending``"""
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    engagement = models.FloatField(default=0)   # weighted likes, comments and saves
+    boost = models.FloatField(default=0)        # creation time in half-lives
+    score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['score', 'post'], name='trending_score_idx')]
+
+    def __str__(self):
+        return f"{self.post} trending {self.score:.2f}"
+
+class PostSearchIndex(models.Model):
+    """A post's row in the FTS5 index (``blog.search``), joined on its rowid.
+
+    Unmanaged: migration 0004 creates the table and the triggers that keep
+    it in sync with ``Post``.
+    """
+    post = models.OneToOneField(
+        Post, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='search_index'
+    )
+    document = SearchDocumentField(db_column=SEARCH_TABLE)
+
+    class Meta:
+        managed = False
+        db_table = SEARCH_TABLE
+
 class Comment(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     parent = models.ForeignKey('self', on_delete=models.CASCADE, blank=True, null=True, related_name='replies')
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created_at'], name='comment_post_created_idx'),
+            models.Index(fields=['created_at'], name='comment_created_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user} on {self.post}"
@@ -75,7 +149,18 @@ class Like(models.Model):
     comment = models.ForeignKey(Comment, on_delete=models.CASCADE, blank=True, null=True)
 
     class Meta:
-        unique_together = ('user', 'post', 'comment')
+        # A like targets either a post or a comment. NULLs never conflict in a
+        # unique index, so each kind needs its own partial constraint.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], condition=models.Q(comment__isnull=True),
+                name='unique_post_like',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'comment'], condition=models.Q(post__isnull=True),
+                name='unique_comment_like',
+            ),
+        ]
 
 class SavedPost(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -85,6 +170,9 @@ class SavedPost(models.Model):
     class Meta:
         unique_together = ('user', 'post')
         ordering = ['-saved_at']
+        indexes = [
+            models.Index(fields=['user', 'saved_at'], name='savedpost_user_saved_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} saved {self.post}"
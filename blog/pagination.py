@@ -0,0 +1,158 @@
+import base64
+import binascii
+import datetime
+import decimal
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError as RequestValidationError
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def approximate_count(queryset, timeout=None):
+    """Return ``queryset.count()``, cached for ``timeout`` seconds.
+
+    The total may lag behind writes by up to the timeout, which is enough for
+    "about N results" displays and keeps COUNT(*) off the hot path.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'BLOG_APPROXIMATE_COUNT_TIMEOUT', 60)
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+    key = f'blog:approx-count:{digest}'
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, timeout)
+    return total
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Passing ``?cursor=`` (empty for the first page) switches to keyset
+    pagination over the view's ``get_cursor_ordering()``, e.g.
+    ``('-created_at', '-id')``: each page is a ``WHERE (created_at, id) < (...)``
+    range read instead of ``OFFSET``, and no ``COUNT(*)`` is run unless
+    ``?with_total=1`` asks for an approximate total. Views without a cursor
+    ordering always use page numbers. Cursor pages always follow the cursor
+    ordering, so ``?cursor=`` with an ``?ordering=`` or ``?search=`` the view
+    applies is rejected (400) rather than silently reordered.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    total_query_param = 'with_total'
+    invalid_cursor_message = 'Invalid cursor'
+    cursor_conflict_message = 'Cursor pages follow the default order; use ?page= with ?{param}='
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.uses_cursor(request, view)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        self.total = None
+        if request.query_params.get(self.total_query_param) in ('1', 'true'):
+            self.total = approximate_count(queryset)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.position_filter(position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page_results = results[:page_size]
+        return self.page_results
+
+    def uses_cursor(self, request, view):
+        self.ordering = ()
+        if self.cursor_query_param not in request.query_params:
+            return False
+        if view is not None and hasattr(view, 'get_cursor_ordering'):
+            self.ordering = tuple(view.get_cursor_ordering() or ())
+        if self.ordering:
+            self.check_cursor_order(request, view)
+        return bool(self.ordering)
+
+    def check_cursor_order(self, request, view):
+        """Reject the ordering and search parameters the view's filters would apply"""
+        backends = getattr(view, 'filter_backends', ())
+        checks = ((OrderingFilter, api_settings.ORDERING_PARAM), (SearchFilter, api_settings.SEARCH_PARAM))
+        for backend, param in checks:
+            if request.query_params.get(param) and any(issubclass(b, backend) for b in backends):
+                message = self.cursor_conflict_message.format(param=param)
+                raise RequestValidationError({self.cursor_query_param: [message]})
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        payload = {'next': self.get_next_link()}
+        if self.total is not None:
+            payload['count'] = self.total
+        payload['results'] = data
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.total_query_param)
+        last = self.page_results[-1]
+        values = [self.position_value(last, field.lstrip('-')) for field in self.ordering]
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    def position_value(self, obj, field):
+        # Pages are model instances or values() rows
+        value = obj[field] if isinstance(obj, dict) else getattr(obj, field)
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, decimal.Decimal):
+            return str(value)
+        return value
+
+    def position_filter(self, position):
+        """Lexicographic "after ``position``" filter for the cursor ordering"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
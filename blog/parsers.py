@@ -0,0 +1,31 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import StreamingJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` decoding with orjson when it is installed.
+
+    orjson only reads UTF-8, so other request encodings are decoded first.
+    Non-strict JSON (``NaN``/``Infinity``, allowed when ``STRICT_JSON`` is
+    off) and a missing orjson use ``JSONParser`` itself.
+    """
+    renderer_class = StreamingJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,147 @@
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import orjson
+except ImportError:  # the stdlib json module is used instead
+    orjson = None
+
+# Datetimes go through DRF's encoder so they keep its "Z" suffix
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+# JSONRenderer escapes these so the output stays a strict JavaScript subset
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+DEFAULT_STREAMING_JSON = {
+    'min_items': 100,
+    'chunk_items': 25,
+}
+
+
+def get_streaming_settings():
+    config = dict(DEFAULT_STREAMING_JSON)
+    config.update(getattr(settings, 'BLOG_STREAMING_JSON', {}))
+    return config
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in ``JSONRenderer`` encoding with orjson when it is installed.
+
+    The output is byte-identical to ``JSONRenderer``: types orjson doesn't
+    know (datetimes, decimals, lazy translation strings, querysets...) are
+    handed to the same ``encoder_class``. The one difference is float
+    exponents, which orjson writes unpadded (``1e16``, not ``1e+16``); no
+    serializer of the API returns floats. Indented output (``; indent=`` in
+    Accept, the browsable API) is left to ``JSONRenderer``; non-compact or
+    ASCII-only settings and a missing orjson encode with the json module.
+    """
+    encoder = JSONRenderer.encoder_class()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return self.dumps(data)
+
+    def dumps(self, data):
+        """Compact JSON of ``data``, including ``None`` as ``null``"""
+        if orjson is None or not self.compact or self.ensure_ascii:
+            separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+            ret = json.dumps(
+                data, cls=self.encoder_class, ensure_ascii=self.ensure_ascii,
+                allow_nan=not self.strict, separators=separators
+            )
+            return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+        ret = orjson.dumps(data, default=self.encoder.default, option=ORJSON_OPTIONS)
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+class StreamingJSONRenderer(FastJSONRenderer):
+    """``FastJSONRenderer`` that can also render a list response in chunks.
+
+    :meth:`iter_render` yields the same bytes as :meth:`render`, encoding
+    ``chunk_items`` list items at a time, so a large page is never held
+    in memory as one JSON string. See :class:`StreamingListMixin`.
+    """
+
+    def iter_render(self, data, accepted_media_type=None, renderer_context=None):
+        items = list_items(data)
+        if items is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            yield self.render(data, accepted_media_type, renderer_context)
+            return
+        if items is data:
+            yield from self.iter_list(items)
+            return
+
+        head = b'{'
+        for index, (key, value) in enumerate(data.items()):
+            head += (b',' if index else b'') + self.dumps(str(key)) + b':'
+            if value is items:
+                yield head
+                yield from self.iter_list(items)
+                head = b''
+            else:
+                head += self.dumps(value)
+        yield head + b'}'
+
+    def iter_list(self, items):
+        size = max(get_streaming_settings()['chunk_items'], 1)
+        if not items:
+            yield b'[]'
+            return
+        for start in range(0, len(items), size):
+            chunk = self.dumps(items[start:start + size])[1:-1]
+            opening = b'[' if start == 0 else b','
+            closing = b']' if start + size >= len(items) else b''
+            yield opening + chunk + closing
+
+
+def list_items(data):
+    """The list a response is made of: itself or its paginated ``results``"""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return data['results']
+    return None
+
+
+class StreamingListMixin:
+    """Send GET responses listing at least ``min_items`` items (settings
+    ``BLOG_STREAMING_JSON``) as a ``StreamingHttpResponse`` rendered by
+    ``StreamingJSONRenderer.iter_render``.
+
+    The view has already built the response data; streaming only avoids
+    encoding the whole body into one buffer before sending it.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        renderer = getattr(response, 'accepted_renderer', None)
+        if (
+            request.method != 'GET'
+            or not isinstance(response, Response)
+            or response.status_code != 200
+            or not hasattr(renderer, 'iter_render')
+        ):
+            return response
+        items = list_items(response.data)
+        if items is None or len(items) < get_streaming_settings()['min_items']:
+            return response
+
+        streaming = StreamingHttpResponse(
+            renderer.iter_render(response.data, response.accepted_media_type, response.renderer_context),
+            status=response.status_code,
+            content_type=renderer.media_type,
+        )
+        for header, value in response.items():
+            if header.lower() != 'content-type':
+                streaming[header] = value
+        return streaming
@@ -0,0 +1,160 @@
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULT_READ_REPLICAS = {
+    'replicas': [],         # DATABASES aliases replicating the default database
+    'sticky_seconds': 5,    # reads stay on the primary this long after a change; above the replication lag
+}
+
+
+def get_replica_settings():
+    config = dict(DEFAULT_READ_REPLICAS)
+    config.update(getattr(settings, 'BLOG_READ_REPLICAS', {}))
+    return config
+
+
+def _pin_key(user_id):
+    return f'blog:primary-pin:{user_id}'
+
+
+class RequestRouting:
+    """Where the current request reads from: ``replica`` (None for the
+    primary) until the request writes, then the primary"""
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+_routing = ContextVar('blog_request_routing', default=None)
+
+
+class ReplicaRouter:
+    """Send the reads of replica-enabled requests to their replica.
+
+    Reads go to the primary unless a :class:`ReplicaReadMixin` view picked
+    a replica for the current request, and go back to it for the rest of a
+    request once it writes. Writes, management commands and background
+    threads always use the primary. Replicas are never migrated; they
+    replicate the primary's schema.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or routing.wrote:
+            return None
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *get_replica_settings()['replicas']}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replica_settings()['replicas']:
+            return False
+        return None
+
+
+def pick_replica(user=None, changed_at=None):
+    """A replica alias for a read, or None for the primary.
+
+    The primary serves ``user`` for ``sticky_seconds`` after their last
+    write (read-your-writes), and everyone for ``sticky_seconds`` after
+    ``changed_at``, the last change of the data read: cached responses
+    and ETags are tagged with the current versions and must not be built
+    from a replica that hasn't caught up with that change yet.
+    """
+    config = get_replica_settings()
+    if not config['replicas']:
+        return None
+    window = config['sticky_seconds']
+    if changed_at is not None and time.time() - changed_at < window:
+        return None
+    if user is not None and user.is_authenticated and cache.get(_pin_key(user.pk)):
+        return None
+    return random.choice(config['replicas'])
+
+
+def pin_to_primary(user):
+    """Read ``user``'s requests from the primary for the next ``sticky_seconds``"""
+    window = get_replica_settings()['sticky_seconds']
+    if window > 0:
+        cache.set(_pin_key(user.pk), True, window)
+
+
+class ReplicaReadMixin:
+    """Read the ``replica_actions`` of a viewset from a ``BLOG_READ_REPLICAS`` replica.
+
+    The replica is picked after authentication, permission and conditional
+    GET checks, which stay on the primary; see :func:`pick_replica` for
+    when the primary serves the request instead. Needs
+    :class:`ReplicaRoutingMiddleware` and :class:`ReplicaRouter`.
+    """
+    replica_actions = ('list', 'retrieve', 'popular', 'saved')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        routing = _routing.get()
+        if routing is None or request.method not in SAFE_METHODS or self.action not in self.replica_actions:
+            return
+        # Set by ConditionalGetMixin from the versions the response depends on
+        routing.replica = pick_replica(request.user, getattr(self, 'data_changed_at', None))
+
+
+class ReplicaRoutingMiddleware:
+    """Track each request's reads and writes for :class:`ReplicaRouter`,
+    and pin users who wrote to the primary (:func:`pin_to_primary`)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = RequestRouting()
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        if routing.wrote:
+            self.pin_writer(request)
+        return response
+
+    async def __acall__(self, request):
+        routing = RequestRouting()
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        if routing.wrote:
+            # request.user may still be the lazy session user, loaded from the database
+            await sync_to_async(self.pin_writer)(request)
+        return response
+
+    def pin_writer(self, request):
+        # DRF sets request.user to the user its authentication found
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user)
@@ -0,0 +1,383 @@
+"""Text generators for the sample data commands.
+
+Kept free of Django imports so worker processes can generate rows without
+setting up Django. Every ``generate_*_rows`` function takes a
+``(seed, ...)`` task and is deterministic for its seed, so datasets do not
+depend on how chunks are spread across workers.
+"""
+import random
+
+from faker import Faker
+
+fake = Faker(['en_US', 'ru_RU'])
+
+TECH_NAMES = ['Python', 'JavaScript', 'React', 'Django', 'Node.js']
+
+
+def generate_tech_title(rng=random):
+    """Generate realistic tech blog titles"""
+    templates = [
+        "Getting Started with {tech}",
+        "10 Best Practices for {tech} Development", 
+        "Building {concept} with {tech}",
+        "Complete Guide to {tech} in 2025",
+        "{tech} vs Other Frameworks: A Comparison",
+        "Advanced {tech} Techniques You Should Know",
+        "How to Build a {concept} Using {tech}",
+        "Understanding {concept} in {tech}",
+        "Top {tech} Libraries You Should Try",
+        "Mastering {concept} with {tech}",
+        "Common {tech} Mistakes and How to Avoid Them",
+        "Why {tech} is Perfect for {concept}",
+        "{tech} Tutorial: From Beginner to Expert",
+        "Performance Optimization in {tech}",
+        "Testing Strategies for {tech} Applications"
+    ]
+
+    tech_options = [
+        'React', 'Django', 'Python', 'JavaScript', 'Node.js', 'Vue.js',
+        'Angular', 'TypeScript', 'Docker', 'Kubernetes', 'AWS', 'MongoDB',
+        'PostgreSQL', 'GraphQL', 'REST API', 'Machine Learning', 'AI'
+    ]
+
+    concept_options = [
+        'Web Apps', 'APIs', 'Microservices', 'Authentication', 'Databases',
+        'User Interfaces', 'Backend Systems', 'Mobile Apps', 'Cloud Solutions',
+        'Data Analysis', 'Real-time Features', 'E-commerce Sites', 'Dashboards'
+    ]
+
+    template = rng.choice(templates)
+    return template.format(
+        tech=rng.choice(tech_options),
+        concept=rng.choice(concept_options)
+    )
+
+
+PROGRAMMING_CONTENT = """# {title}
+
+Welcome to this comprehensive guide on programming concepts and best practices.
+
+## Introduction
+
+In this article, we'll explore the fundamentals and advanced techniques that every developer should know. Whether you're a beginner or an experienced programmer, you'll find valuable insights here.
+
+## Key Concepts
+
+### 1. Code Organization
+```python
+class ExampleClass:
+    def __init__(self):
+        self.data = []
+    
+    def process_data(self, input_data):
+        # Process the data
+        return processed_data
+```
+
+### 2. Best Practices
+- Write clean, readable code
+- Use meaningful variable names
+- Add proper documentation
+- Implement error handling
+
+## Performance Considerations
+
+When building applications, performance is crucial:
+
+1. **Optimize database queries**
+2. **Use caching strategies**  
+3. **Minimize resource usage**
+4. **Profile your code regularly**
+
+## Conclusion
+
+{example}
+
+Happy coding!
+"""
+
+
+TUTORIAL_CONTENT = """# {title}
+
+## Step-by-Step Tutorial
+
+This tutorial will walk you through creating a complete application from scratch.
+
+### Prerequisites
+- Basic knowledge of programming
+- Development environment setup
+- Understanding of web technologies
+
+### Step 1: Project Setup
+```bash
+mkdir my-project
+cd my-project
+npm init -y
+```
+
+### Step 2: Installation
+Install the required dependencies:
+
+```bash
+npm install express mongoose cors
+npm install -D nodemon
+```
+
+### Step 3: Basic Configuration
+Create the main application file:
+
+```javascript
+const express = require('express');
+const app = express();
+
+app.use(express.json());
+app.use(cors());
+
+app.get('/', (req, res) => {{
+    res.json({{ message: 'Hello World!' }});
+}});
+
+const PORT = process.env.PORT || 3000;
+app.listen(PORT, () => {{
+    console.log(`Server running on port ${{PORT}}`);
+}});
+```
+
+### Step 4: Testing
+Run your application and test the endpoints.
+
+## Next Steps
+- Add authentication
+- Implement error handling
+- Add data validation
+- Deploy to production
+
+{example}
+"""
+
+
+REVIEW_CONTENT = """# {title}
+
+## Product Review
+
+In this comprehensive review, we'll examine the features, pros, and cons of this technology.
+
+### Overview
+This tool has gained significant popularity in the developer community due to its ease of use and powerful features.
+
+### Key Features
+- **Feature 1**: Excellent performance
+- **Feature 2**: Great documentation
+- **Feature 3**: Active community support
+- **Feature 4**: Regular updates
+
+### Pros
+✅ Easy to learn and use
+✅ Great performance
+✅ Excellent documentation
+✅ Strong community
+✅ Regular updates
+
+### Cons
+❌ Limited customization options
+❌ Learning curve for advanced features
+❌ Some compatibility issues
+
+### Rating: 4.5/5 Stars
+
+### Conclusion
+Overall, this is an excellent choice for developers looking for a reliable and efficient solution.
+
+{example}
+"""
+
+
+NEWS_CONTENT = """# {title}
+
+## Latest Tech News
+
+Breaking news in the world of technology and software development.
+
+### What's New
+The latest update brings several exciting features and improvements:
+
+- Enhanced performance
+- New API endpoints
+- Improved security
+- Better error handling
+- Updated documentation
+
+### Industry Impact
+This development is expected to have a significant impact on:
+1. Developer productivity
+2. Application performance
+3. Security standards
+4. Industry best practices
+
+### Community Response
+The developer community has responded positively to these changes:
+
+> "This is exactly what we needed. The new features will make our development process much more efficient." - {author}
+
+### Looking Forward
+Upcoming features in the roadmap include:
+- Advanced analytics
+- Machine learning integration
+- Enhanced mobile support
+- Cloud-native features
+
+{example}
+"""
+
+
+GUIDE_CONTENT = """# {title}
+
+## Complete Developer Guide
+
+This comprehensive guide covers everything you need to know about modern development practices.
+
+### Table of Contents
+1. Getting Started
+2. Core Concepts
+3. Advanced Techniques
+4. Best Practices
+5. Troubleshooting
+
+### Getting Started
+
+Before diving into the technical details, let's set up our development environment:
+
+```bash
+# Install required tools
+curl -o- https://example.com/install.sh | bash
+```
+
+### Core Concepts
+
+Understanding the fundamental concepts is crucial for success:
+
+#### Concept 1: Architecture
+Modern applications follow specific architectural patterns for scalability and maintainability.
+
+#### Concept 2: Data Flow
+Understanding how data flows through your application is essential.
+
+#### Concept 3: Security
+Implementing proper security measures from the beginning.
+
+### Advanced Techniques
+
+Once you master the basics, you can explore advanced techniques:
+
+- Performance optimization
+- Caching strategies
+- Database optimization
+- Code splitting
+- Lazy loading
+
+### Best Practices Checklist
+
+- [ ] Code is properly documented
+- [ ] Tests are comprehensive
+- [ ] Security measures are in place
+- [ ] Performance is optimized
+- [ ] Error handling is robust
+
+### Troubleshooting Common Issues
+
+**Issue 1**: Application not starting
+- Check dependencies
+- Verify configuration
+- Review logs
+
+**Issue 2**: Performance problems
+- Profile the application
+- Check database queries
+- Optimize critical paths
+
+{example}
+"""
+
+
+def generate_comment_text(rng=random):
+    """Generate realistic comment text"""
+    comments = [
+        "Great article! Very informative and well-written.",
+        "Thanks for sharing this. I learned something new today.",
+        "This is exactly what I was looking for. Bookmarked!",
+        "Excellent explanation. The examples really helped me understand.",
+        "Could you add more details about the implementation?",
+        "I followed this tutorial and it worked perfectly. Thanks!",
+        "This approach solved my problem. Much appreciated!",
+        "Very helpful post. Looking forward to more content like this.",
+        "The code examples are clear and easy to follow.",
+        "I had the same issue and this fixed it. Thank you!",
+        "Interesting perspective. I hadn't thought of it this way.",
+        "Well explained! This will definitely help other developers.",
+        "Great tutorial! Step-by-step instructions were perfect.",
+        "This is a common problem and your solution is elegant.",
+        "Thanks for taking the time to write this detailed explanation.",
+        "The performance improvements are impressive!",
+        "I implemented this in my project and it works great.",
+        "Could you also cover the security aspects?",
+        "This saved me hours of debugging. Much appreciated!",
+        "Clear and concise explanation. Perfect for beginners."
+    ]
+    return rng.choice(comments)
+
+
+CONTENT_TEMPLATES = [
+    PROGRAMMING_CONTENT,
+    TUTORIAL_CONTENT,
+    REVIEW_CONTENT,
+    NEWS_CONTENT,
+    GUIDE_CONTENT,
+]
+
+
+def _seeded(seed):
+    # Faker picks the locale of each call from its shared generator, which
+    # only the class-level seed resets
+    Faker.seed(seed)
+    fake.seed_instance(seed)
+    return random.Random(seed)
+
+
+def generate_user_rows(task):
+    """``(seed, count)`` -> ``[(username, first_name, last_name, bio), ...]``"""
+    seed, count = task
+    rng = _seeded(seed)
+    return [
+        (
+            fake.user_name(),
+            fake.first_name(),
+            fake.last_name(),
+            fake.text(max_nb_chars=200) if rng.choice([True, False]) else '',
+        )
+        for _ in range(count)
+    ]
+
+
+def generate_post_rows(task):
+    """``(seed, author_names)`` -> ``[(title, content), ...]``, one per author name"""
+    seed, author_names = task
+    rng = _seeded(seed)
+    rows = []
+    for author in author_names:
+        title = generate_tech_title(rng)
+        content = rng.choice(CONTENT_TEMPLATES).format(
+            title=title,
+            author=author,
+            tech=rng.choice(TECH_NAMES),
+            concept=fake.word(),
+            example=fake.sentence()
+        )
+        rows.append((title, content))
+    return rows
+
+
+def generate_comment_rows(task):
+    """``(seed, count)`` -> ``[text, ...]``"""
+    seed, count = task
+    rng = random.Random(seed)
+    return [generate_comment_text(rng) for _ in range(count)]
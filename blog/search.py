@@ -0,0 +1,185 @@
+import re
+
+from django.db import connection as default_connection, connections, models
+from django.db.models import F, FloatField, Func, Lookup, TextField, Value
+from django.db.utils import OperationalError
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+SEARCH_TABLE = 'blog_post_fts'
+SNIPPET_START = '<mark>'
+SNIPPET_END = '</mark>'
+
+# External-content FTS5 index over blog_post: the index stores only tokens and
+# reads title/content back from blog_post, kept in sync by the triggers below.
+SEARCH_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, content, content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON blog_post BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON blog_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF title, content ON blog_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {SEARCH_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+]
+SEARCH_TRIGGERS = [f'{SEARCH_TABLE}_ai', f'{SEARCH_TABLE}_ad', f'{SEARCH_TABLE}_au']
+
+# Title matches weigh more than body matches in the BM25 rank
+RANK_WEIGHTS = (10.0, 1.0)
+
+
+class Match(Lookup):
+    """``document MATCH query``, the FTS5 full-text filter"""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class SearchDocumentField(models.TextField):
+    """The hidden column FTS5 names after its table: the operand of MATCH and
+    of the bm25()/snippet() auxiliary functions"""
+
+
+SearchDocumentField.register_lookup(Match)
+
+
+def supports_search_index(connection=default_connection):
+    """Whether the database is SQLite with the FTS5 extension compiled in"""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def _existing_objects(connection, names):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT name FROM sqlite_master WHERE name IN (%s)' % ', '.join(['%s'] * len(names)),
+            names,
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def search_index_available(connection=default_connection):
+    """Whether the FTS5 table and all of its sync triggers exist"""
+    if connection.vendor != 'sqlite':
+        return False
+    names = [SEARCH_TABLE, *SEARCH_TRIGGERS]
+    return len(_existing_objects(connection, names)) == len(names)
+
+
+def restore_search_index(connection=default_connection):
+    """Recreate missing sync triggers, if the index itself has been installed.
+
+    SQLite drops triggers along with their table, so migrations that remake
+    ``blog_post`` silently disable syncing; this runs after every ``migrate``.
+    """
+    if connection.vendor == 'sqlite' and _existing_objects(connection, [SEARCH_TABLE]):
+        return install_search_index(connection)
+    return False
+
+
+def install_search_index(connection=default_connection):
+    """Create the index and triggers if missing and rebuild it when they were.
+
+    Idempotent; returns True if anything had to be (re)created.
+    """
+    if not supports_search_index(connection) or search_index_available(connection):
+        return False
+    with connection.cursor() as cursor:
+        for statement in SEARCH_INDEX_SQL:
+            cursor.execute(statement)
+    rebuild_search_index(connection)
+    return True
+
+
+def drop_search_index(connection=default_connection):
+    with connection.cursor() as cursor:
+        for trigger in SEARCH_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+def rebuild_search_index(connection=default_connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def optimize_search_index(connection=default_connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+
+
+def build_match_query(terms):
+    """Turn free-text terms into an FTS5 query: every word, as a prefix, must match.
+
+    Words are quoted so user input can never be parsed as FTS5 syntax.
+    """
+    words = []
+    for term in terms:
+        words.extend(re.findall(r'\w+', term))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_posts(queryset, match):
+    """Restrict ``queryset`` to posts matching ``match``, annotated with
+    ``search_rank`` (lower is better) and a highlighted ``search_snippet``.
+
+    The index is joined once: its MATCH drives the query and both functions
+    read the current match, so the search runs once per query, not per post.
+    """
+    document = F('search_index__document')
+    return queryset.filter(search_index__document__match=match).annotate(
+        search_rank=Func(document, *map(Value, RANK_WEIGHTS), function='bm25', output_field=FloatField()),
+        search_snippet=Func(
+            document, Value(-1), Value(SNIPPET_START), Value(SNIPPET_END), Value('…'), Value(24),
+            function='snippet', output_field=TextField(),
+        ),
+    )
+
+
+class PostSearchFilter(filters.SearchFilter):
+    """``?search=`` backed by the FTS5 index, ranked by BM25.
+
+    Results are ordered by relevance unless ``?ordering=`` is given, so this
+    backend must come after ``OrderingFilter``. Databases without the index
+    fall back to the ``icontains`` search over ``view.search_fields``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        match = build_match_query(terms)
+        if not match or not self.index_available(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = search_posts(queryset, match)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('search_rank', '-created_at')
+        return queryset
+
+    def index_available(self, alias):
+        # Probed once per connection and database file
+        connection = connections[alias]
+        name = connection.settings_dict['NAME']
+        cached = getattr(connection, '_blog_search_index', None)
+        if cached is None or cached[0] != name:
+            try:
+                cached = (name, search_index_available(connection))
+            except OperationalError:
+                cached = (name, False)
+            connection._blog_search_index = cached
+        return cached[1]
@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from .models import Post, Category, Tag, Comment, Like, SavedPost
 from accounts.serializers import UserListSerializer
+from .comment_tree import build_comment_tree, get_tree_limits
+from .engagement import pending_likes_delta, pending_state
+from .images import ImageVariantsField
+from .sparse import SparseFieldsMixin, primary_key, primary_keys
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -14,9 +18,10 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'slug')
         read_only_fields = ('slug',)
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserListSerializer(read_only=True)
     replies = serializers.SerializerMethodField()
+    flat_fields = {'user': primary_key}
     
     class Meta:
         model = Comment
@@ -24,76 +29,109 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'user', 'created_at')
     
     def get_replies(self, obj):
+        if hasattr(obj, 'reply_tree'):
+            # Replies follow the same ?fields=/?expand= selection
+            return CommentSerializer(obj.reply_tree, many=True, context=self.context).data
         if obj.replies.exists():
             return CommentSerializer(obj.replies.all(), many=True).data
         return []
 
-class PostListSerializer(serializers.ModelSerializer):
+def apply_pending_likes(data, post):
+    """Add likes still in the write-behind buffer to a post's ``likes_count``"""
+    delta = pending_likes_delta('post_like', post.pk)
+    if delta and 'likes_count' in data:
+        data['likes_count'] = max(data['likes_count'] + delta, 0)
+
+# Posts nest their author, categories and tags unless ?fields=/?expand= say otherwise
+POST_FLAT_FIELDS = {'author': primary_key, 'categories': primary_keys, 'tags': primary_keys}
+
+class PostListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Simplified serializer for listing posts"""
+    image_variants = ImageVariantsField('image', 'image_variants')
     author = UserListSerializer(read_only=True)
     categories = CategorySerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
-    comments_count = serializers.SerializerMethodField()
-    likes_count = serializers.SerializerMethodField()
+    comments_count = serializers.IntegerField(read_only=True)
+    likes_count = serializers.IntegerField(read_only=True)
     is_saved = serializers.SerializerMethodField()
+    flat_fields = POST_FLAT_FIELDS
     
     class Meta:
         model = Post
-        fields = ('id', 'title', 'slug', 'image', 'author', 'created_at', 'updated_at', 
+        fields = ('id', 'title', 'slug', 'image', 'image_variants', 'author', 'created_at', 'updated_at',
                  'status', 'categories', 'tags', 'comments_count', 'likes_count', 'is_saved')
     
-    def get_comments_count(self, obj):
-        return obj.comments.count()
-    
-    def get_likes_count(self, obj):
-        return obj.like_set.filter(post=obj).count()
-    
     def get_is_saved(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            buffered = pending_state('save', request.user.pk, obj.pk)
+            if buffered is not None:
+                return buffered
+            if hasattr(obj, 'is_saved'):
+                return obj.is_saved
             return obj.savedpost_set.filter(user=request.user).exists()
         return False
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        apply_pending_likes(data, instance)
+        # Highlighted match excerpt, present on ?search= results
+        if getattr(instance, 'search_snippet', None) is not None and self.field_selection.includes('snippet'):
+            data['snippet'] = instance.search_snippet
+        return data
 
-class PostDetailSerializer(serializers.ModelSerializer):
+class PostDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Detailed serializer for single post view"""
+    image_variants = ImageVariantsField('image', 'image_variants')
     author = UserListSerializer(read_only=True)
     categories = CategorySerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     comments = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
-    likes_count = serializers.SerializerMethodField()
+    comments_count = serializers.IntegerField(read_only=True)
+    likes_count = serializers.IntegerField(read_only=True)
     is_liked = serializers.SerializerMethodField()
     is_saved = serializers.SerializerMethodField()
+    flat_fields = POST_FLAT_FIELDS
     
     class Meta:
         model = Post
-        fields = ('id', 'title', 'slug', 'content', 'image', 'author', 'created_at', 
+        fields = ('id', 'title', 'slug', 'content', 'image', 'image_variants', 'author', 'created_at',
                  'updated_at', 'status', 'categories', 'tags', 'comments', 
                  'comments_count', 'likes_count', 'is_liked', 'is_saved')
         read_only_fields = ('slug', 'author', 'created_at', 'updated_at')
     
     def get_comments(self, obj):
-        # Only get top-level comments (no parent)
-        top_level_comments = obj.comments.filter(parent=None).order_by('-created_at')
+        # Only top-level comments, with the reply tree assembled in memory
+        max_depth, max_replies = get_tree_limits(self.context.get('request'))
+        top_level_comments = build_comment_tree(obj, max_depth, max_replies)
         return CommentSerializer(top_level_comments, many=True).data
     
-    def get_comments_count(self, obj):
-        return obj.comments.count()
-    
-    def get_likes_count(self, obj):
-        return obj.like_set.filter(post=obj).count()
-    
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            buffered = pending_state('post_like', request.user.pk, obj.pk)
+            if buffered is not None:
+                return buffered
+            if hasattr(obj, 'is_liked'):
+                return obj.is_liked
             return obj.like_set.filter(user=request.user, post=obj).exists()
         return False
     
     def get_is_saved(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            buffered = pending_state('save', request.user.pk, obj.pk)
+            if buffered is not None:
+                return buffered
+            if hasattr(obj, 'is_saved'):
+                return obj.is_saved
             return obj.savedpost_set.filter(user=request.user).exists()
         return False
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        apply_pending_likes(data, instance)
+        return data
 
 class PostCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating and updating posts"""
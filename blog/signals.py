@@ -0,0 +1,214 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import GLOBAL_SCOPE, LISTING_SCOPE, TAXONOMY_SCOPE, bump_versions, post_scope, slug_key, user_scope
+from .images import image_field, needs_variants, schedule_variant_deletion, schedule_variants
+from .models import Category, Tag, Post, Comment, Like, SavedPost
+from .search import restore_search_index
+from .trending import adjust_trending, refresh_trending
+
+
+def adjust_counter(model, pk, field, delta):
+    """Atomically add ``delta`` to a counter column in a single UPDATE"""
+    if pk is None or not delta:
+        return
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        # Never go below zero if the column has drifted; reconcile_counters repairs it
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def _like_targets(post_id, comment_id):
+    return ((Post, post_id), (Comment, comment_id))
+
+
+def _liked_post_id(post_id, comment_id):
+    """The post whose responses show a like: the liked post or the liked comment's"""
+    if post_id is not None or comment_id is None:
+        return post_id
+    return Comment.objects.filter(pk=comment_id).values_list('post_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Like)
+@receiver(pre_save, sender=Comment)
+def remember_counter_targets(sender, instance, raw=False, **kwargs):
+    # Updates may move a like/comment to another target; keep the old one so
+    # post_save can shift the counters. Inserts don't need the extra query.
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    fields = ('post_id', 'comment_id') if sender is Like else ('post_id',)
+    instance._counter_origin = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def invalidate_posts(*post_ids):
+    """Bump the response cache versions of the given posts and of all listings"""
+    bump_versions(LISTING_SCOPE, *(post_scope(pk) for pk in post_ids if pk is not None))
+
+
+def invalidate_engagement(user_id, *post_ids):
+    """Bump the versions a like or save shows up in: its posts, all listings
+    and the user's own is_liked/is_saved flags"""
+    bump_versions(LISTING_SCOPE, user_scope(user_id), *(post_scope(pk) for pk in post_ids if pk is not None))
+
+
+@receiver(post_save, sender=Like)
+def like_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        for model, pk in _like_targets(instance.post_id, instance.comment_id):
+            adjust_counter(model, pk, 'likes_count', 1)
+        adjust_trending([instance.post_id], 'like', 1)
+        invalidate_engagement(instance.user_id, _liked_post_id(instance.post_id, instance.comment_id))
+        return
+    origin = getattr(instance, '_counter_origin', None)
+    if origin:
+        old_targets = _like_targets(origin['post_id'], origin['comment_id'])
+        new_targets = _like_targets(instance.post_id, instance.comment_id)
+        for (model, old_pk), (_, new_pk) in zip(old_targets, new_targets):
+            if old_pk != new_pk:
+                adjust_counter(model, old_pk, 'likes_count', -1)
+                adjust_counter(model, new_pk, 'likes_count', 1)
+        if origin['post_id'] != instance.post_id:
+            adjust_trending([origin['post_id']], 'like', -1)
+            adjust_trending([instance.post_id], 'like', 1)
+        invalidate_engagement(
+            instance.user_id,
+            _liked_post_id(origin['post_id'], origin['comment_id']),
+            _liked_post_id(instance.post_id, instance.comment_id),
+        )
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, **kwargs):
+    for model, pk in _like_targets(instance.post_id, instance.comment_id):
+        adjust_counter(model, pk, 'likes_count', -1)
+    adjust_trending([instance.post_id], 'like', -1)
+    invalidate_engagement(instance.user_id, _liked_post_id(instance.post_id, instance.comment_id))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        adjust_counter(Post, instance.post_id, 'comments_count', 1)
+        adjust_trending([instance.post_id], 'comment', 1)
+        invalidate_posts(instance.post_id)
+        return
+    origin = getattr(instance, '_counter_origin', None)
+    if origin and origin['post_id'] != instance.post_id:
+        adjust_counter(Post, origin['post_id'], 'comments_count', -1)
+        adjust_counter(Post, instance.post_id, 'comments_count', 1)
+        adjust_trending([origin['post_id']], 'comment', -1)
+        adjust_trending([instance.post_id], 'comment', 1)
+    # Edited text shows up in the post's comment tree
+    invalidate_posts(origin['post_id'] if origin else None, instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # Also fired for each reply removed by the parent's cascade
+    adjust_counter(Post, instance.post_id, 'comments_count', -1)
+    adjust_trending([instance.post_id], 'comment', -1)
+    invalidate_posts(instance.post_id)
+
+
+@receiver(post_save, sender=SavedPost)
+def saved_post_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_trending([instance.post_id], 'save', 1)
+        # Saves reorder /posts/popular/ and change the user's is_saved
+        invalidate_engagement(instance.user_id, instance.post_id)
+
+
+@receiver(post_delete, sender=SavedPost)
+def saved_post_deleted(sender, instance, **kwargs):
+    adjust_trending([instance.post_id], 'save', -1)
+    invalidate_engagement(instance.user_id, instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # Publishing adds the post to trending, unpublishing removes it
+        refresh_trending([instance.pk])
+        invalidate_posts(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    cache.delete(slug_key(instance.slug))
+    invalidate_posts(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_taxonomy_changed(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        if reverse:
+            bump_versions(GLOBAL_SCOPE)
+        else:
+            invalidate_posts(instance.pk)
+
+
+# Users, categories and tags are embedded in post responses
+USER_DISPLAY_FIELDS = {'username', 'first_name', 'last_name', 'avatar', 'role'}
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Logins only touch last_login; don't flush every cached post for them
+    if raw or created or (update_fields and not USER_DISPLAY_FIELDS & set(update_fields)):
+        return
+    bump_versions(GLOBAL_SCOPE)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, **kwargs):
+    bump_versions(GLOBAL_SCOPE)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def image_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Rendered after commit, off the request; the serializers show no variants until then.
+    # The previous image's variant files are deleted once the new ones are recorded.
+    kind = 'posts' if sender is Post else 'avatars'
+    _, field, variants_field = image_field(kind)
+    if raw or (update_fields and field not in update_fields):
+        return
+    if needs_variants(kind, instance):
+        schedule_variants(kind, instance.pk, getattr(instance, field).name, getattr(instance, variants_field))
+    elif not getattr(instance, field) and variants_field not in instance.get_deferred_fields():
+        # Image removed: nothing replaces its variants
+        schedule_variant_deletion(kind, getattr(instance, variants_field))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def image_deleted(sender, instance, **kwargs):
+    kind = 'posts' if sender is Post else 'avatars'
+    variants_field = image_field(kind)[2]
+    if variants_field not in instance.get_deferred_fields():
+        schedule_variant_deletion(kind, getattr(instance, variants_field))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def taxonomy_changed(sender, raw=False, **kwargs):
+    if not raw:
+        bump_versions(GLOBAL_SCOPE, TAXONOMY_SCOPE)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    if sender.name == 'blog':
+        restore_search_index(connections[using])
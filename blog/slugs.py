@@ -0,0 +1,112 @@
+import re
+from collections import defaultdict
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Slugs taken by one base are the base itself and "<base>-<n>". The range
+# ["<base>-", "<base>.") reads the unique index for every slug starting with
+# "<base>-"; the regex keeps only numeric suffixes, so "python-tips-3" is
+# never loaded for "python".
+_NEXT_AFTER_DASH = '.'
+SAVE_ATTEMPTS = 3
+BASES_PER_QUERY = 200
+
+
+def _candidates(base):
+    suffixed = Q(slug__gte=f'{base}-', slug__lt=base + _NEXT_AFTER_DASH, slug__regex=rf'^{re.escape(base)}-[0-9]+$')
+    return Q(slug=base) | suffixed
+
+
+def _suffixes(base, slugs):
+    """Numeric suffixes in use for ``base``; 0 stands for the bare base"""
+    pattern = re.compile(rf'{re.escape(base)}(?:-(\d+))?')
+    used = set()
+    for slug in slugs:
+        match = pattern.fullmatch(slug)
+        if match:
+            used.add(int(match.group(1) or 0))
+    return used
+
+
+def _first_free(used, start=0):
+    suffix = start
+    while suffix in used:
+        suffix += 1
+    return suffix
+
+
+def _with_suffix(base, suffix):
+    return f'{base}-{suffix}' if suffix else base
+
+
+def allocate_slug(model, source, exclude_pk=None, using=None):
+    """Return a free slug for ``source``: its slugified form or the first
+    free ``-1``, ``-2``... suffix, found with one index range query"""
+    base = slugify(source)
+    taken = model._default_manager.db_manager(using).filter(_candidates(base))
+    if exclude_pk is not None:
+        taken = taken.exclude(pk=exclude_pk)
+    used = _suffixes(base, taken.values_list('slug', flat=True))
+    return _with_suffix(base, _first_free(used))
+
+
+def allocate_slugs(model, sources):
+    """Bulk :func:`allocate_slug`: free slugs for ``sources``, unique among
+    themselves too, with one query per ``BASES_PER_QUERY`` distinct bases"""
+    bases = [slugify(source) for source in sources]
+    distinct = list(dict.fromkeys(bases))
+    used = defaultdict(set)
+    for start in range(0, len(distinct), BASES_PER_QUERY):
+        chunk = distinct[start:start + BASES_PER_QUERY]
+        condition = Q()
+        for base in chunk:
+            condition |= _candidates(base)
+        slugs = list(model._default_manager.filter(condition).values_list('slug', flat=True))
+        for base in chunk:
+            used[base] = _suffixes(base, slugs)
+
+    slugs = []
+    for base in bases:
+        suffix = _first_free(used[base])
+        used[base].add(suffix)
+        slugs.append(_with_suffix(base, suffix))
+    return slugs
+
+
+def assign_slugs(instances, source_field):
+    """Fill in the empty ``slug`` of unsaved ``instances`` before a bulk_create"""
+    pending = [instance for instance in instances if not instance.slug]
+    if pending:
+        model = type(pending[0])
+        sources = [getattr(instance, source_field) for instance in pending]
+        for instance, slug in zip(pending, allocate_slugs(model, sources)):
+            instance.slug = slug
+    return instances
+
+
+def save_with_slug(instance, source, save):
+    """Run ``save()`` after allocating a slug for ``instance`` if it has none.
+
+    Two concurrent saves can allocate the same slug; the loser hits the
+    unique constraint, which is rolled back to a savepoint and retried with a
+    fresh allocation.
+    """
+    if instance.slug:
+        return save()
+    model = type(instance)
+    using = router.db_for_write(model, instance=instance)
+    for attempt in range(SAVE_ATTEMPTS):
+        instance.slug = allocate_slug(model, source, exclude_pk=instance.pk, using=using)
+        try:
+            with transaction.atomic(using=using):
+                return save()
+        except IntegrityError:
+            conflict = (
+                model._default_manager.using(using)
+                .filter(slug=instance.slug).exclude(pk=instance.pk).exists()
+            )
+            instance.slug = ''
+            if not conflict or attempt == SAVE_ATTEMPTS - 1:
+                raise
@@ -0,0 +1,85 @@
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _names(request, param):
+    if param not in request.query_params:
+        return None
+    raw = ','.join(request.query_params.getlist(param))
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class FieldSelection:
+    """The fields a client asked for with ``?fields=`` and ``?expand=``.
+
+    Without either parameter every field is rendered as before. Once one is
+    given the response is *sparse*: only the fields listed in ``?fields=``
+    (all of them if it is absent) are rendered, and relations are nested
+    objects only when listed in ``?expand=``, otherwise their ids.
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand or set()
+        self.sparse = fields is not None or expand is not None
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def nests(self, name):
+        return self.includes(name) and (not self.sparse or name in self.expand)
+
+
+FULL = FieldSelection()
+
+
+def get_field_selection(request):
+    """Parse (once per request) the field selection of a read request"""
+    if request is None or request.method != 'GET':
+        return FULL
+    selection = getattr(request, '_field_selection', None)
+    if selection is None:
+        selection = FieldSelection(_names(request, FIELDS_PARAM), _names(request, EXPAND_PARAM))
+        request._field_selection = selection
+    return selection
+
+
+class SparseFieldsMixin:
+    """Apply the request's field selection to a top-level serializer.
+
+    ``flat_fields`` maps expandable relations to a factory of the field
+    rendering them unexpanded (their ids). Serializers nested in another
+    serializer keep all their fields.
+    """
+    flat_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.field_selection
+        if not selection.sparse:
+            return fields
+        for name in list(fields):
+            if not selection.includes(name):
+                del fields[name]
+            elif name in self.flat_fields and not selection.nests(name):
+                fields[name] = self.flat_fields[name]()
+        return fields
+
+    @property
+    def field_selection(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return FULL
+        return get_field_selection(self.context.get('request'))
+
+
+def primary_key():
+    return serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+def primary_keys():
+    return serializers.PrimaryKeyRelatedField(many=True, read_only=True)
@@ -1,3 +1,1447 @@
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from io import BytesIO, StringIO
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from .cache import slug_key
+from .management.commands.create_extensive_data import Command as BulkDataCommand
+from .engagement import EngagementBuffer, _insert, set_like, set_saved
+from .slugs import _candidates, allocate_slug, allocate_slugs
+from .search import PostSearchFilter, drop_search_index, search_index_available, supports_search_index
+from .images import FORMATS, store_variants
+from .models import Category, Comment, Like, Post, PostTrending, SavedPost, Tag
+from .renderers import StreamingJSONRenderer
+from .trending import refresh_trending
+
+User = get_user_model()
+
+# "SCAN <table>" without "USING ... INDEX" reads the whole table
+FULL_SCAN = re.compile(r'^SCAN (\S+)$')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTests(APITestCase):
+    """Every SELECT behind the hot read endpoints must be answered from an
+    index: no full table scan and no temporary B-tree for ORDER BY."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'pass')
+        others = [
+            User.objects.create_user(f'writer{i}', f'writer{i}@example.com', 'pass', role='author')
+            for i in range(4)
+        ]
+        categories = [Category.objects.create(name=f'Category {i}') for i in range(30)]
+        tags = [Tag.objects.create(name=f'Tag {i}') for i in range(30)]
+        cls.posts = []
+        for i in range(80):
+            post = Post.objects.create(
+                title=f'Post {i}', content='Content', author=([cls.author] + others)[i % 5],
+                status='draft' if i % 8 == 0 else 'published',
+            )
+            post.categories.add(categories[i % 30])
+            post.tags.add(tags[i % 30], tags[(i + 7) % 30])
+            cls.posts.append(post)
+        for post in cls.posts[:20]:
+            comment = Comment.objects.create(user=cls.reader, post=post, text='Comment')
+            Comment.objects.create(user=cls.author, post=post, parent=comment, text='Reply')
+            Like.objects.create(user=cls.reader, post=post)
+            Like.objects.create(user=cls.author, comment=comment)
+            SavedPost.objects.create(user=cls.reader, post=post)
+        cls.post = cls.posts[1]
+        cls.comment = Comment.objects.filter(post=cls.post, parent=None).get()
+        # Plans as on a database with statistics (see migration 0006)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def explain(self, url, user=None):
+        """``[(sql, plan lines)]`` of the SELECTs run by ``GET url``"""
+        executed = []
+
+        def record(execute, sql, params, many, context):
+            executed.append((sql, params))
+            return execute(sql, params, many, context)
+
+        self.client.force_authenticate(user)
+        with connection.execute_wrapper(record):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for sql, params in executed:
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plans.append((sql, [row[3] for row in cursor.fetchall()]))
+        self.assertTrue(plans, url)
+        return plans
+
+    def assertIndexed(self, url, user=None, allow_scan=()):
+        for sql, plan in self.explain(url, user):
+            for line in plan:
+                scan = FULL_SCAN.match(line)
+                if 'USE TEMP B-TREE' in line or (scan and scan.group(1) not in allow_scan):
+                    self.fail(f'{url}: "{line}" in plan of\n{sql}\n' + '\n'.join(plan))
+
+    def test_post_list(self):
+        self.assertIndexed('/api/v1/blog/posts/')
+        self.assertIndexed('/api/v1/blog/posts/?cursor=')
+        self.assertIndexed('/api/v1/blog/posts/?page=2')
+
+    def test_post_list_authenticated(self):
+        # Page numbers COUNT every visible post either way; the page itself is an index walk
+        self.assertIndexed('/api/v1/blog/posts/?cursor=', self.reader)
+        self.assertIndexed('/api/v1/blog/posts/', self.reader, allow_scan=('blog_post',))
+
+    def test_post_list_filtered(self):
+        self.assertIndexed(f'/api/v1/blog/posts/?author={self.author.pk}')
+        self.assertIndexed(f'/api/v1/blog/posts/?status=published&author={self.author.pk}&cursor=')
+
+    def test_post_detail(self):
+        self.assertIndexed(f'/api/v1/blog/posts/{self.post.slug}/')
+        self.assertIndexed(f'/api/v1/blog/posts/{self.post.slug}/', self.reader)
+
+    def test_batch_and_engagement(self):
+        slugs = ','.join(post.slug for post in self.posts[:20])
+        ids = ','.join(str(post.pk) for post in self.posts[:20])
+        self.assertIndexed(f'/api/v1/blog/posts/batch/?slugs={slugs}', self.reader)
+        self.assertIndexed(f'/api/v1/blog/posts/batch/?ids={ids}')
+        self.assertIndexed(f'/api/v1/blog/posts/engagement/?ids={ids}', self.reader)
+
+    def test_my_posts(self):
+        self.assertIndexed('/api/v1/blog/posts/my_posts/', self.author)
+        self.assertIndexed('/api/v1/blog/posts/my_posts/?cursor=', self.author)
+
+    def test_saved_posts(self):
+        self.assertIndexed('/api/v1/blog/posts/saved/', self.reader)
+        self.assertIndexed('/api/v1/blog/posts/saved/?cursor=', self.reader)
+        self.assertIndexed('/api/v1/blog/saved-posts/?cursor=', self.reader)
+
+    def test_popular(self):
+        self.assertIndexed('/api/v1/blog/posts/popular/')
+        self.assertIndexed('/api/v1/blog/posts/popular/?cursor=', self.reader)
+
+    def test_comments(self):
+        self.assertIndexed('/api/v1/blog/comments/?cursor=')
+        self.assertIndexed(f'/api/v1/blog/comments/?post={self.post.pk}')
+        self.assertIndexed(f'/api/v1/blog/comments/?post={self.post.pk}&cursor=')
+        self.assertIndexed(f'/api/v1/blog/comments/{self.comment.pk}/')
+
+    def test_likes(self):
+        self.assertIndexed('/api/v1/blog/likes/', self.reader)
+
+    def test_categories_and_tags(self):
+        # Small lookup tables: listing them reads the table, a detail must not
+        self.assertIndexed('/api/v1/blog/categories/', allow_scan=('blog_category',))
+        self.assertIndexed('/api/v1/blog/categories/category-1/')
+        self.assertIndexed('/api/v1/blog/tags/', allow_scan=('blog_tag',))
+        self.assertIndexed('/api/v1/blog/tags/tag-1/')
+
+
+class TrendingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'pass')
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.author, status='published')
+
+    def scores(self):
+        return dict(PostTrending.objects.values_list('post_id', 'score'))
+
+    def test_events_match_recompute(self):
+        Like.objects.create(user=self.reader, post=self.post)
+        SavedPost.objects.create(user=self.reader, post=self.post)
+        comment = Comment.objects.create(user=self.reader, post=self.post, text='Comment')
+        Comment.objects.create(user=self.author, post=self.post, parent=comment, text='Reply')
+        Like.objects.filter(user=self.reader).delete()
+        incremental = self.scores()
+
+        refresh_trending()
+        recomputed = self.scores()
+        self.assertEqual(incremental.keys(), {self.post.pk})
+        self.assertAlmostEqual(incremental[self.post.pk], recomputed[self.post.pk])
+
+    def test_only_published_posts_rank(self):
+        draft = Post.objects.create(title='Draft', content='Content', author=self.author)
+        self.assertNotIn(draft.pk, self.scores())
+        draft.status = 'published'
+        draft.save()
+        self.assertIn(draft.pk, self.scores())
+        self.post.status = 'draft'
+        self.post.save()
+        self.assertNotIn(self.post.pk, self.scores())
+
+    def test_engagement_outweighs_age_by_half_lives(self):
+        older = Post.objects.create(title='Older', content='Content', author=self.author, status='published')
+        Post.objects.filter(pk=older.pk).update(created_at=self.post.created_at - timedelta(hours=24))
+        refresh_trending()
+        self.assertLess(self.scores()[older.pk], self.scores()[self.post.pk])
+        # Three likes: log2(1 + 3) = 2 half-lives, more than the one-day head start
+        for i in range(3):
+            user = User.objects.create_user(f'fan{i}', f'fan{i}@example.com', 'pass')
+            Like.objects.create(user=user, post=older)
+        self.assertGreater(self.scores()[older.pk], self.scores()[self.post.pk])
+        response = self.client.get('/api/v1/blog/posts/popular/')
+        self.assertEqual([post['id'] for post in response.json()['results']], [older.pk, self.post.pk])
+
+
+class SparseFieldsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.author, status='published')
+        cls.post.categories.add(Category.objects.create(name='Python'))
+        cls.post.tags.add(Tag.objects.create(name='Django'))
+        cls.comment = Comment.objects.create(user=cls.author, post=cls.post, text='Comment')
+        Comment.objects.create(user=cls.author, post=cls.post, parent=cls.comment, text='Reply')
+
+    def get(self, url):
+        with self.settings(BLOG_RESPONSE_CACHE={}):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_full_representation_by_default(self):
+        post = self.get('/api/v1/blog/posts/')['results'][0]
+        self.assertEqual(post['author']['username'], 'author')
+        self.assertEqual(post['categories'][0]['name'], 'Python')
+        self.assertIn('is_saved', post)
+
+    def test_fields_trim_post_list_and_its_queries(self):
+        with self.assertNumQueries(2):  # COUNT and the page; no prefetches or joins
+            post = self.get('/api/v1/blog/posts/?fields=id,title,likes_count')['results'][0]
+        self.assertEqual(post, {'id': self.post.pk, 'title': 'Post', 'likes_count': 0})
+
+    def test_relations_render_ids_unless_expanded(self):
+        post = self.get('/api/v1/blog/posts/?fields=id,author,tags&expand=tags')['results'][0]
+        self.assertEqual(post['author'], self.author.pk)
+        self.assertEqual(post['tags'][0]['name'], 'Django')
+        post = self.get('/api/v1/blog/posts/?expand=author')['results'][0]
+        self.assertEqual(post['author']['username'], 'author')
+        self.assertEqual(post['categories'], [self.post.categories.get().pk])
+
+    def test_post_detail_without_comment_tree(self):
+        with self.assertNumQueries(1):
+            post = self.get(f'/api/v1/blog/posts/{self.post.slug}/?fields=id,content')
+        self.assertEqual(post, {'id': self.post.pk, 'content': 'Content'})
+
+    def test_comment_replies_follow_the_selection(self):
+        comment = self.get(f'/api/v1/blog/comments/{self.comment.pk}/?fields=id,user,replies')
+        self.assertEqual(comment['user'], self.author.pk)
+        self.assertEqual(comment['replies'][0].keys(), {'id', 'user', 'replies'})
+        with self.assertNumQueries(1):
+            comment = self.get(f'/api/v1/blog/comments/{self.comment.pk}/?fields=id,text')
+        self.assertEqual(comment, {'id': self.comment.pk, 'text': 'Comment'})
+
+
+class FastSerializerParityTests(APITestCase):
+    """The values()-based list renderer must produce the same bytes as
+    PostListSerializer, in no more queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'pass')
+        User.objects.filter(pk=cls.author.pk).update(
+            avatar='avatars/author.png', first_name='Ada',
+            avatar_variants={'source': 'avatars/author.png', 'sizes': {
+                'small': {'width': 64, 'height': 64, 'webp': 'avatars/author.small.webp'},
+            }},
+        )
+        categories = [Category.objects.create(name=f'Category {i}') for i in range(3)]
+        tags = [Tag.objects.create(name=f'Tag {i}') for i in range(4)]
+        cls.posts = []
+        for i in range(12):
+            post = Post.objects.create(
+                title=f'Post {i}', content=f'Content about python {i}', author=cls.author,
+                status='draft' if i % 5 == 0 else 'published',
+            )
+            post.categories.add(*categories[:i % 3 + 1])
+            post.tags.add(*tags[i % 2:])
+            cls.posts.append(post)
+        Post.objects.filter(pk__in=[post.pk for post in cls.posts[::3]]).update(
+            image='posts/cover.jpg',
+            image_variants={'source': 'posts/cover.jpg', 'sizes': {
+                'card': {'width': 480, 'height': 270, 'webp': 'posts/cover.card.webp', 'jpeg': 'posts/cover.card.jpg'},
+            }},
+        )
+        # Variants of a replaced image are not shown
+        Post.objects.filter(pk=cls.posts[1].pk).update(
+            image='posts/new.jpg', image_variants={'source': 'posts/old.jpg', 'sizes': {'card': {}}},
+        )
+        for post in cls.posts[1:6]:
+            Like.objects.create(user=cls.reader, post=post)
+            SavedPost.objects.create(user=cls.reader, post=post)
+            Comment.objects.create(user=cls.reader, post=post, text='Comment')
+
+    def get(self, url, user, fast):
+        self.client.force_authenticate(user)
+        with self.settings(BLOG_RESPONSE_CACHE={}, BLOG_FAST_SERIALIZERS=fast):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.content, len(queries)
+
+    def assertParity(self, url, user=None):
+        expected, serializer_queries = self.get(url, user, fast=False)
+        content, fast_queries = self.get(url, user, fast=True)
+        self.assertEqual(content, expected, url)
+        self.assertLessEqual(fast_queries, serializer_queries, url)
+
+    def test_post_list(self):
+        for user in (None, self.reader, self.author):
+            for url in (
+                '/api/v1/blog/posts/',
+                '/api/v1/blog/posts/?page_size=5',
+                '/api/v1/blog/posts/?page_size=5&page=2',
+                '/api/v1/blog/posts/?cursor=&page_size=4',
+                '/api/v1/blog/posts/?search=python',
+                f'/api/v1/blog/posts/?author={self.author.pk}&ordering=title',
+            ):
+                self.assertParity(url, user)
+
+    def test_post_list_actions(self):
+        slugs = ','.join(post.slug for post in reversed(self.posts))
+        ids = ','.join(str(post.pk) for post in self.posts)
+        for user in (None, self.reader):
+            self.assertParity('/api/v1/blog/posts/popular/', user)
+            self.assertParity(f'/api/v1/blog/posts/batch/?slugs={slugs}', user)
+            self.assertParity(f'/api/v1/blog/posts/batch/?ids={ids},999', user)
+        self.assertParity('/api/v1/blog/posts/my_posts/', self.author)
+        self.assertParity('/api/v1/blog/posts/saved/', self.reader)
+        self.assertParity('/api/v1/blog/posts/saved/?cursor=', self.reader)
+
+    def test_sparse_requests_keep_the_serializer(self):
+        self.assertParity('/api/v1/blog/posts/?fields=id,title,author&expand=author')
+
+
+class JSONRendererTests(APITestCase):
+    """StreamingJSONRenderer, whole or streamed, must match DRF's JSONRenderer byte for byte"""
+
+    data = OrderedDict([
+        ('count', 2),
+        ('next', None),
+        ('results', [
+            {
+                'created': datetime(2024, 5, 1, 12, 30, 15, 250, tzinfo=timezone.utc),
+                'naive': datetime(2024, 5, 1, 12, 30),
+                'day': date(2024, 5, 1),
+                'elapsed': timedelta(minutes=90),
+                'price': Decimal('12.50'),
+                'label': gettext_lazy('Published'),
+                'uuid': uuid.UUID(int=7),
+                'text': 'Ünïcode \u2028 and \u2029 "quoted"',
+                'ids': (1, 2, 3),
+                'scores': {1: 0.5, 'x': 1 / 3, 'y': 12345.678},
+            },
+            {'empty': [], 'nested': {'deep': [None, True, -1]}},
+        ]),
+        ('missing', ['gone']),
+    ])
+
+    def test_render_matches_drf(self):
+        renderer = StreamingJSONRenderer()
+        self.assertEqual(renderer.render(self.data), JSONRenderer().render(self.data))
+        self.assertEqual(renderer.render(self.data['results']), JSONRenderer().render(self.data['results']))
+        self.assertEqual(renderer.render(None), b'')
+        # Same value, orjson doesn't pad exponents
+        self.assertEqual(json.loads(renderer.render([1e16, 1e-7])), [1e16, 1e-7])
+        indented = 'application/json; indent=4'
+        self.assertEqual(
+            renderer.render(self.data, indented, {}), JSONRenderer().render(self.data, indented, {})
+        )
+
+    def test_stdlib_fallback(self):
+        renderer = StreamingJSONRenderer()
+        with mock.patch('blog.renderers.orjson', None), mock.patch('blog.parsers.orjson', None):
+            self.assertEqual(renderer.render(self.data), JSONRenderer().render(self.data))
+            self.assertEqual(b''.join(renderer.iter_render(self.data)), renderer.render(self.data))
+            self.test_parser()
+
+    def test_iter_render_matches_render(self):
+        renderer = StreamingJSONRenderer()
+        for chunk_items in (1, 2, 25):
+            with self.settings(BLOG_STREAMING_JSON={'chunk_items': chunk_items}):
+                for data in (self.data, self.data['results'], [], {'results': [], 'next': None}):
+                    self.assertEqual(b''.join(renderer.iter_render(data)), renderer.render(data), data)
+
+    def test_large_lists_are_streamed(self):
+        author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        for i in range(5):
+            Post.objects.create(title=f'Post {i}', content='Content', author=author, status='published')
+        with self.settings(BLOG_RESPONSE_CACHE={}):
+            expected = self.client.get('/api/v1/blog/posts/')
+            with self.settings(BLOG_STREAMING_JSON={'min_items': 5, 'chunk_items': 2}):
+                response = self.client.get('/api/v1/blog/posts/')
+                small = self.client.get('/api/v1/blog/posts/?page_size=4')
+        self.assertFalse(expected.streaming)
+        self.assertFalse(small.streaming)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['Vary'], expected['Vary'])
+        self.assertEqual(b''.join(response.streaming_content), expected.content)
+
+    def test_parser(self):
+        author, _ = User.objects.get_or_create(username='author', defaults={'role': 'author'})
+        Post.objects.all().delete()
+        self.client.force_authenticate(author)
+        response = self.client.post(
+            '/api/v1/blog/posts/', '{"title": "Ünïcode", "content": "Content"}', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Post.objects.get().title, 'Ünïcode')
+        response = self.client.post('/api/v1/blog/posts/', '{"title": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+
+class ConditionalGetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'pass')
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.author, status='published')
+        cls.comment = Comment.objects.create(user=cls.author, post=cls.post, text='Comment')
+        cls.category = Category.objects.create(name='Python')
+
+    def setUp(self):
+        # Slug to id mappings and versions must not leak between tests
+        cache.clear()
+        self.user = None
+
+    def get(self, url, user=None, **headers):
+        if user != self.user:
+            self.client.force_authenticate(user)
+            self.user = user
+        return self.client.get(url, headers=headers)
+
+    def assertRevalidates(self, url, user=None):
+        """GET ``url`` and return its ETag, checking a repeat is a query-free 304"""
+        response = self.get(url, user)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.get(url, user, If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        return etag
+
+    def test_post_detail(self):
+        url = f'/api/v1/blog/posts/{self.post.slug}/'
+        self.assertFalse(self.get(url).has_header('ETag'))  # slug not mapped to its id yet
+        etag = self.assertRevalidates(url)
+        Like.objects.create(user=self.reader, comment=self.comment)
+        self.assertNotEqual(self.assertRevalidates(url), etag)
+
+    def test_post_list_and_actions(self):
+        for url in ('/api/v1/blog/posts/', '/api/v1/blog/posts/popular/', '/api/v1/blog/posts/?page_size=5'):
+            etag = self.assertRevalidates(url)
+            Comment.objects.create(user=self.reader, post=self.post, text='Another')
+            self.assertEqual(self.get(url, If_None_Match=etag).status_code, 200)
+        self.assertRevalidates('/api/v1/blog/posts/my_posts/', self.author)
+
+    def test_validators_are_per_user(self):
+        url = '/api/v1/blog/posts/'
+        anonymous = self.assertRevalidates(url)
+        etag = self.assertRevalidates(url, self.reader)
+        self.assertNotEqual(etag, anonymous)
+        response = self.get(url, self.reader)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Authorization', response['Vary'])
+
+        saved_url = '/api/v1/blog/posts/saved/'
+        saved = self.assertRevalidates(saved_url, self.reader)
+        author_etag = self.assertRevalidates(url, self.author)
+        SavedPost.objects.create(user=self.reader, post=self.post)
+        self.assertEqual(self.get(url, self.reader, If_None_Match=etag).status_code, 200)
+        self.assertEqual(self.get(saved_url, self.reader, If_None_Match=saved).status_code, 200)
+        # Saves reorder popular posts, so every listing changes
+        self.assertEqual(self.get(url, self.author, If_None_Match=author_etag).status_code, 200)
+
+    def test_last_modified(self):
+        url = '/api/v1/blog/posts/'
+        second = math.floor(time.time())
+        now = [second + 0.3]
+        with mock.patch('blog.cache.time', time=lambda: now[0], time_ns=time.time_ns):
+            self.get(url)  # records the scopes' changes at second + 0.3
+            now[0] = second + 1.5
+            response = self.get(url)
+            self.assertIn('no-cache', response['Cache-Control'])
+            self.assertEqual(response['Last-Modified'], http_date(second + 1))
+            self.assertEqual(
+                self.get(url, If_Modified_Since=response['Last-Modified']).status_code, 304
+            )
+            self.assertEqual(
+                self.get(url, If_Modified_Since='Mon, 01 Jan 2001 00:00:00 GMT').status_code, 200
+            )
+
+            # A change whose truncated time equals the date is not hidden...
+            now[0] = second + 1.7
+            Comment.objects.create(user=self.reader, post=self.post, text='Another')
+            self.assertEqual(
+                self.get(url, If_Modified_Since=response['Last-Modified']).status_code, 200
+            )
+            # ...and gets no Last-Modified of its own until its second is over
+            self.assertFalse(self.get(url).has_header('Last-Modified'))
+            now[0] = second + 2.1
+            self.assertEqual(self.get(url)['Last-Modified'], http_date(second + 2))
+
+    def test_categories_and_tags(self):
+        for url in ('/api/v1/blog/categories/', '/api/v1/blog/categories/python/', '/api/v1/blog/tags/'):
+            etag = self.assertRevalidates(url)
+            # Posts don't change taxonomy responses; taxonomy changes do
+            Post.objects.create(title='Other', content='Content', author=self.author, status='published')
+            self.assertEqual(self.get(url, If_None_Match=etag).status_code, 304)
+            Tag.objects.create(name=f'Tag for {url}')
+            self.assertEqual(self.get(url, If_None_Match=etag).status_code, 200)
+
+
+class ReadReplicaTests(APITransactionTestCase):
+    """Reads against a replica copied by sync_replicas and left stale on purpose.
+
+    Transactions can't be used: the replica is a snapshot of committed data.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        self.reader = User.objects.create_user('reader', 'reader@example.com', 'pass')
+        self.post = Post.objects.create(title='Old', content='Content', author=self.author, status='published')
+        self.replicas(sticky_seconds=30)
+        call_command('sync_replicas', stdout=StringIO())
+
+    def replicas(self, **config):
+        override = self.settings(BLOG_READ_REPLICAS={'replicas': ['replica'], **config})
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def get(self, url, user=None):
+        self.client.force_authenticate(user)
+        return self.client.get(url)
+
+    def titles(self, user=None):
+        return [post['title'] for post in self.get('/api/v1/blog/posts/', user).data['results']]
+
+    def test_reads_use_the_replica_and_writes_the_primary(self):
+        self.replicas(sticky_seconds=0)
+        Post.objects.create(title='New', content='Content', author=self.author, status='published')
+        self.assertEqual(self.titles(), ['Old'])
+        self.assertEqual(self.get('/api/v1/blog/posts/new/').status_code, 404)
+
+        self.client.force_authenticate(self.author)
+        response = self.client.post('/api/v1/blog/posts/', {'title': 'Posted', 'content': 'Content'})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Post.objects.filter(title='Posted').exists())
+        self.assertFalse(Post.objects.using('replica').filter(title='Posted').exists())
+
+        call_command('sync_replicas', 'replica', stdout=StringIO())
+        self.assertEqual(self.titles(), ['New', 'Old'])
+
+    def test_writers_read_their_writes(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.post('/api/v1/blog/comments/', {'post': self.post.pk, 'text': 'First'})
+        self.assertEqual(response.status_code, 201)
+        url = f'/api/v1/blog/comments/?post={self.post.pk}'
+        self.assertEqual([c['text'] for c in self.get(url, self.author).data['results']], ['First'])
+        # Comment lists have no validators: other users read the replica
+        self.assertEqual(self.get(url, self.reader).data['results'], [])
+
+    def test_recently_changed_data_is_read_from_the_primary(self):
+        Post.objects.create(title='New', content='Content', author=self.author, status='published')
+        # The listing version just changed: a replica read would be cached and ETagged as current
+        self.assertEqual(self.titles(), ['New', 'Old'])
+        self.assertEqual(self.titles(self.reader), ['New', 'Old'])
+
+    def test_requests_that_write_read_the_primary_afterwards(self):
+        self.replicas(sticky_seconds=0)
+
+        def flush(user):
+            # Stands in for the write-behind buffer writing the reader's pending save
+            SavedPost.objects.create(user=user, post=self.post)
+
+        with mock.patch('blog.views.flush_pending_for', side_effect=flush):
+            response = self.get('/api/v1/blog/posts/saved/', self.reader)
+        self.assertEqual([post['title'] for post in response.data['results']], ['Old'])
+
+    def test_replicas_are_not_migrated(self):
+        from .replicas import ReplicaRouter
+        self.assertIs(ReplicaRouter().allow_migrate('replica', 'blog'), False)
+        self.assertIsNone(ReplicaRouter().allow_migrate('default', 'blog'))
+
+
+def image_bytes(size, mode='RGB', format='PNG'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, format)
+    return buffer.getvalue()
+
+
+class ImageVariantTests(APITestCase):
+    """Post images and avatars get resized WebP/JPEG copies after commit,
+    listed by the serializers once rendered."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        variants = {
+            'sizes': {'posts': {'card': 480, 'large': 1200}, 'avatars': {'small': 64}},
+            'formats': ['webp', 'jpeg'], 'quality': 80, 'background': False,
+        }
+        override = self.settings(MEDIA_ROOT=media, BLOG_IMAGE_VARIANTS=variants, BLOG_RESPONSE_CACHE={})
+        override.enable()
+        self.addCleanup(override.disable)
+        self.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        self.storage = Post._meta.get_field('image').storage
+
+    def open_image(self, url):
+        path = url.split('/media/', 1)[1]
+        with Post._meta.get_field('image').storage.open(path) as file:
+            image = Image.open(file)
+            image.load()
+        return image
+
+    def test_uploaded_post_images_get_variants(self):
+        self.client.force_authenticate(self.author)
+        upload = SimpleUploadedFile('cover.png', image_bytes((2000, 1000), 'RGBA'), 'image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/v1/blog/posts/',
+                {'title': 'Photo', 'content': 'Content', 'status': 'published', 'image': upload},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 201)
+        # Rendered after the response was built
+        self.assertEqual(response.data['image_variants'], {})
+
+        for url in ('/api/v1/blog/posts/', '/api/v1/blog/posts/photo/'):
+            data = self.client.get(url).data
+            post = data['results'][0] if 'results' in data else data
+            variants = post['image_variants']
+            self.assertEqual(set(variants), {'card', 'large'}, url)
+            self.assertEqual((variants['card']['width'], variants['card']['height']), (480, 240))
+            self.assertEqual((variants['large']['width'], variants['large']['height']), (1200, 600))
+            self.assertTrue(variants['card']['webp'].endswith('/media/posts/cover.card.webp'))
+            webp, jpeg = self.open_image(variants['card']['webp']), self.open_image(variants['card']['jpeg'])
+            self.assertEqual((webp.format, webp.size), ('WEBP', (480, 240)))
+            self.assertEqual((jpeg.format, jpeg.mode), ('JPEG', 'RGB'))
+
+    def test_small_images_are_not_enlarged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post(title='Small', content='Content', author=self.author, status='published')
+            post.image.save('small.png', ContentFile(image_bytes((300, 200))))
+        post.refresh_from_db()
+        sizes = post.image_variants['sizes']
+        self.assertEqual({size: (v['width'], v['height']) for size, v in sizes.items()},
+                         {'card': (300, 200), 'large': (300, 200)})
+
+    def test_avatars_get_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.avatar.save('me.png', ContentFile(image_bytes((500, 500))))
+        Post.objects.create(title='Post', content='Content', author=self.author, status='published')
+        author = self.client.get('/api/v1/blog/posts/').data['results'][0]['author']
+        self.assertEqual(author['avatar_variants']['small']['width'], 64)
+        self.assertTrue(author['avatar_variants']['small']['jpeg'].endswith('/media/avatars/me.small.jpg'))
+
+    def test_variants_of_a_replaced_image_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            post = Post(title='Post', content='Content', author=self.author, status='published')
+            post.image.save('first.png', ContentFile(image_bytes((800, 800))))
+            Post.objects.filter(pk=post.pk).update(image='posts/second.png')
+        self.assertEqual(len(callbacks), 1)
+        post.refresh_from_db()
+        # The render of the first image finished after it was replaced, and deleted its files
+        self.assertEqual(post.image_variants, {})
+        self.assertFalse(store_variants('posts', post.pk, {'source': 'posts/first.png', 'sizes': {}}))
+        self.assertFalse(self.storage.exists('posts/first.card.webp'))
+
+    def variant_files(self, record):
+        paths = {value for variant in record['sizes'].values() for key, value in variant.items() if key in FORMATS}
+        self.assertEqual(len(paths), 4)
+        return {path for path in paths if self.storage.exists(path)}
+
+    def test_replacing_or_removing_an_image_deletes_its_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post(title='Post', content='Content', author=self.author, status='published')
+            post.image.save('first.png', ContentFile(image_bytes((800, 800))))
+        post.refresh_from_db()
+        first = post.image_variants
+        with self.captureOnCommitCallbacks(execute=True):
+            post.image.save('second.png', ContentFile(image_bytes((800, 800))))
+        post.refresh_from_db()
+        second = post.image_variants
+        self.assertEqual(self.variant_files(first), set())
+        self.assertEqual(len(self.variant_files(second)), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.image = None
+            post.save()
+        self.assertEqual(self.variant_files(second), set())
+
+    def test_deleting_a_row_deletes_its_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post(title='Post', content='Content', author=self.author, status='published')
+            post.image.save('cover.png', ContentFile(image_bytes((800, 800))))
+            self.author.avatar.save('me.png', ContentFile(image_bytes((500, 500))))
+        post.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertTrue(self.storage.exists(self.author.avatar_variants['sizes']['small']['webp']))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.delete()  # and their post
+        self.assertEqual(self.variant_files(post.image_variants), set())
+        self.assertFalse(self.storage.exists(self.author.avatar_variants['sizes']['small']['webp']))
+
+    def test_saves_without_a_new_image_render_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post(title='Post', content='Content', author=self.author, status='published')
+            post.image.save('cover.png', ContentFile(image_bytes((800, 800))))
+        post.refresh_from_db()
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.title = 'Renamed'
+            post.save()
+            self.author.save(update_fields=['last_login'])
+        self.assertEqual(callbacks, [])
+
+    def test_backfill_renders_existing_images(self):
+        storage = Post._meta.get_field('image').storage
+        names = [storage.save(f'posts/old-{i}.png', ContentFile(image_bytes((1000, 500)))) for i in range(3)]
+        # Stored before variants existed: no signal
+        for i, name in enumerate(names):
+            post = Post.objects.create(title=f'Old {i}', content='Content', author=self.author)
+            Post.objects.filter(pk=post.pk).update(image=name)
+        Post.objects.filter(title='Old 2').update(image='posts/missing.png')
+        out = StringIO()
+        call_command('backfill_image_variants', 'posts', workers=2, stdout=out)
+        self.assertIn('posts: 2 rendered, 1 unreadable', out.getvalue())
+        for post in Post.objects.exclude(image='posts/missing.png'):
+            self.assertEqual(post.image_variants['source'], post.image.name)
+            self.assertEqual(post.image_variants['sizes']['card']['height'], 240)
+
+        out = StringIO()
+        call_command('backfill_image_variants', 'posts', workers=2, stdout=out)
+        self.assertIn('posts: 0 rendered, 1 unreadable', out.getvalue())
+
+
+@mock.patch.object(EngagementBuffer, 'start')  # flushed by the tests, not a background thread
+class EngagementBufferTests(TestCase):
+    """Likes and saves, written directly or through the write-behind buffer,
+    keep exactly one row per user and target and exact counters."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.readers = [User.objects.create_user(f'reader{i}', f'reader{i}@example.com', 'pass') for i in range(3)]
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.author, status='published')
+        cls.comment = Comment.objects.create(user=cls.author, post=cls.post, text='Comment')
+
+    def buffered(self, **options):
+        buffer = EngagementBuffer(flush_interval=3600, **options)
+        patcher = mock.patch('blog.engagement._buffer', buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return buffer
+
+    def assertCounters(self, post_likes, comment_likes=0, saves=0):
+        self.post.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual(Like.objects.filter(post=self.post).count(), post_likes)
+        self.assertEqual(self.post.likes_count, post_likes)
+        self.assertEqual(self.comment.likes_count, comment_likes)
+        self.assertEqual(SavedPost.objects.filter(post=self.post).count(), saves)
+        weights = {'like': 1.0, 'save': 3.0, 'comment': 2.0}
+        self.assertEqual(
+            PostTrending.objects.get(post=self.post).engagement,
+            post_likes * weights['like'] + saves * weights['save'] + self.post.comments_count * weights['comment'],
+        )
+
+    def test_duplicate_likes_are_idempotent(self, start):
+        reader = self.readers[0]
+        self.assertEqual(set_like(reader, Post, self.post.pk, True), 1)
+        self.assertEqual(set_like(reader, Post, self.post.pk, True), 1)
+        # The conflict rolled back to its savepoint; the transaction goes on
+        self.assertFalse(_insert(Like, user=reader, post=self.post))
+        set_saved(reader, self.post.pk, True)
+        set_saved(reader, self.post.pk, True)
+        self.assertCounters(post_likes=1, saves=1)
+        self.assertEqual(set_like(reader, Post, self.post.pk, False), 0)
+        self.assertEqual(set_like(reader, Post, self.post.pk, False), 0)
+        set_saved(reader, self.post.pk, False)
+        self.assertCounters(post_likes=0)
+
+    def test_like_and_unlike_in_one_window_write_nothing(self, start):
+        buffer = self.buffered()
+        reader = self.readers[0]
+        self.assertEqual(set_like(reader, Post, self.post.pk, True), 1)
+        self.assertEqual(set_like(reader, Post, self.post.pk, False), 0)
+        self.assertIs(buffer.state('post_like', reader.pk, self.post.pk), False)
+        self.assertEqual(buffer.pending_delta('post_like', self.post.pk), 0)
+        with self.assertNumQueries(1):  # the likes_count read; already the pending state
+            set_like(reader, Post, self.post.pk, False)
+        buffer.flush()
+        self.assertCounters(post_likes=0)
+
+    def test_flush_keeps_counters_exact(self, start):
+        Like.objects.create(user=self.readers[2], post=self.post)
+        Like.objects.create(user=self.readers[2], comment=self.comment)
+        buffer = self.buffered()
+        for reader in self.readers[:2]:
+            set_like(reader, Post, self.post.pk, True)
+            set_like(reader, Comment, self.comment.pk, True)
+            set_saved(reader, self.post.pk, True)
+        set_like(self.readers[2], Post, self.post.pk, False)
+        set_like(self.readers[2], Comment, self.comment.pk, False)
+        self.assertEqual(buffer.pending_delta('post_like', self.post.pk), 1)
+        # Nothing is written until the flush
+        self.assertCounters(post_likes=1, comment_likes=1)
+
+        self.assertEqual(buffer.flush(), 8)
+        self.assertCounters(post_likes=2, comment_likes=2, saves=2)
+        self.assertEqual(buffer.pending_delta('post_like', self.post.pk), 0)
+        self.assertIsNone(buffer.state('post_like', self.readers[0].pk, self.post.pk))
+        self.assertFalse(Like.objects.filter(user=self.readers[2]).exists())
+        # Writing the same events again (a journal replay) changes nothing
+        buffer.pending = {('post_like', self.readers[0].pk, self.post.pk): True,
+                          ('post_like', self.readers[2].pk, self.post.pk): False}
+        buffer.flush()
+        self.assertCounters(post_likes=2, comment_likes=2, saves=2)
+
+    def dead_pid(self):
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        return process.pid
+
+    def test_journal_is_replayed_after_a_crash(self, start):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        journal = f'{directory}/engagement-{{pid}}.log'
+        crashed_pid = self.dead_pid()
+        with mock.patch('blog.engagement.os.getpid', return_value=crashed_pid):
+            buffer = self.buffered(journal=journal)
+            set_like(self.readers[0], Post, self.post.pk, True)
+            set_saved(self.readers[1], self.post.pk, True)
+            set_saved(self.readers[1], self.post.pk, False)
+        with open(buffer.journal_path, 'a', encoding='utf-8') as file:
+            file.write('["post_like", ')  # torn by the crash
+
+        # The restarted worker has a new pid and adopts the dead one's journal
+        restarted = self.buffered(journal=journal)
+        self.assertNotEqual(restarted.journal_path, buffer.journal_path)
+        self.assertEqual(restarted.pending, {
+            ('post_like', self.readers[0].pk, self.post.pk): True,
+            ('save', self.readers[1].pk, self.post.pk): False,
+        })
+        self.assertEqual(os.listdir(directory), [os.path.basename(restarted.journal_path)])
+        # Adopted once: another worker starting now finds nothing to replay
+        with mock.patch('blog.engagement.os.getpid', return_value=self.dead_pid()):
+            self.assertEqual(self.buffered(journal=journal).pending, {})
+        restarted.flush()
+        self.assertCounters(post_likes=1)
+        with open(restarted.journal_path, encoding='utf-8') as file:
+            self.assertEqual(file.read(), '')  # written events leave the journal
+
+    def test_journals_of_live_workers_are_left_alone(self, start):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        journal = f'{directory}/engagement-{{pid}}.log'
+        with mock.patch('blog.engagement.os.getpid', return_value=os.getppid()):
+            other = self.buffered(journal=journal)
+            set_like(self.readers[0], Post, self.post.pk, True)
+        self.assertEqual(self.buffered(journal=journal).pending, {})
+        self.assertEqual(other.state('post_like', self.readers[0].pk, self.post.pk), True)
+        self.assertTrue(os.path.exists(other.journal_path))
+
+
+class IdempotentEngagementTests(APITestCase):
+    """POST sets and DELETE unsets a like or save; repeats and lost races
+    leave one row and the same response."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'pass')
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.author, status='published')
+        cls.draft = Post.objects.create(title='Draft', content='Content', author=cls.author, status='draft')
+        cls.comment = Comment.objects.create(user=cls.author, post=cls.post, text='Comment')
+
+    def setUp(self):
+        self.client.force_authenticate(self.reader)
+        self.like_url = f'/api/v1/blog/posts/{self.post.slug}/like/'
+        self.save_url = f'/api/v1/blog/posts/{self.post.slug}/save/'
+
+    def test_repeated_likes(self):
+        for _ in range(2):
+            response = self.client.post(self.like_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {'liked': True, 'likes_count': 1})
+        for _ in range(2):
+            response = self.client.delete(self.like_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {'liked': False, 'likes_count': 0})
+        self.assertFalse(Like.objects.exists())
+
+    def test_repeated_saves(self):
+        for _ in range(2):
+            self.assertEqual(self.client.post(self.save_url).json(), {'saved': True})
+        self.assertEqual(SavedPost.objects.filter(user=self.reader).count(), 1)
+        for _ in range(2):
+            self.assertEqual(self.client.delete(self.save_url).json(), {'saved': False})
+        self.assertFalse(SavedPost.objects.exists())
+
+    def test_repeated_comment_likes(self):
+        url = f'/api/v1/blog/comments/{self.comment.pk}/like/'
+        for _ in range(2):
+            self.assertEqual(self.client.post(url).json(), {'liked': True, 'likes_count': 1})
+        self.assertEqual(Like.objects.filter(comment=self.comment).count(), 1)
+        for _ in range(2):
+            self.assertEqual(self.client.delete(url).json(), {'liked': False, 'likes_count': 0})
+
+    def test_lost_race_answers_like_the_winner(self):
+        # A concurrent request inserted the row after this one began: the
+        # insert hits the unique constraint instead of a stale read
+        Like.objects.create(user=self.reader, post=self.post)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.like_url)
+        self.assertEqual(response.json(), {'liked': True, 'likes_count': 1})
+        self.assertFalse(any(query['sql'].lstrip().upper().startswith('SELECT') and 'blog_like' in query['sql']
+                             for query in queries), 'set_like read the like before inserting it')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+        SavedPost.objects.create(user=self.reader, post=self.post)
+        self.assertEqual(self.client.post(self.save_url).json(), {'saved': True})
+        self.assertEqual(SavedPost.objects.count(), 1)
+
+    def test_unknown_or_hidden_targets(self):
+        self.assertEqual(self.client.post('/api/v1/blog/posts/missing/like/').status_code, 404)
+        self.assertEqual(self.client.post(f'/api/v1/blog/posts/{self.draft.slug}/save/').status_code, 404)
+        self.assertEqual(self.client.post('/api/v1/blog/comments/0/like/').status_code, 404)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post(self.like_url).status_code, 401)
+        self.assertFalse(Like.objects.exists() or SavedPost.objects.exists())
+
+
+@mock.patch.object(EngagementBuffer, 'start')
+class BufferedEngagementAPITests(APITestCase):
+    """With the write-behind buffer on, responses show pending likes and
+    saves right away: the user's own state and every reader's counts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'pass')
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.author, status='published')
+
+    def setUp(self):
+        cache.clear()
+        self.buffer = EngagementBuffer(flush_interval=3600)
+        patcher = mock.patch('blog.engagement._buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_authenticate(self.reader)
+
+    def engagement(self):
+        response = self.client.get(f'/api/v1/blog/posts/engagement/?ids={self.post.pk}')
+        return response.json()['results'][0]
+
+    def test_reads_see_pending_writes(self, start):
+        detail_url = f'/api/v1/blog/posts/{self.post.slug}/'
+        self.client.get(detail_url)  # maps the slug to its id
+        etag = self.client.get(detail_url)['ETag']
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.post(f'{detail_url}like/').json(), {'liked': True, 'likes_count': 1})
+        self.client.post(f'{detail_url}save/')
+        self.assertFalse(Like.objects.exists())
+
+        # The version the ETag was built from is stale now
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        detail = response.json()
+        self.assertEqual((detail['likes_count'], detail['is_liked'], detail['is_saved']), (1, True, True))
+        listed = self.client.get('/api/v1/blog/posts/').json()['results'][0]
+        self.assertEqual((listed['likes_count'], listed['is_saved']), (1, True))
+        self.assertEqual(self.engagement(), {
+            'id': self.post.pk, 'likes_count': 1, 'comments_count': 0, 'is_liked': True, 'is_saved': True,
+        })
+        # Other readers see the pending count, not the reader's own state
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.engagement()['likes_count'], 1)
+        self.assertFalse(self.engagement()['is_liked'])
+
+    def test_direct_reads_flush_the_user_first(self, start):
+        self.client.post(f'/api/v1/blog/posts/{self.post.slug}/save/')
+        self.client.post(f'/api/v1/blog/posts/{self.post.slug}/like/')
+        saved = self.client.get('/api/v1/blog/posts/saved/').json()['results']
+        self.assertEqual([post['id'] for post in saved], [self.post.pk])
+        self.assertFalse(self.buffer.has_pending(self.reader.pk))
+        self.assertEqual(Like.objects.filter(user=self.reader).count(), 1)
+
+    def test_repeats_within_a_window_coalesce(self, start):
+        url = f'/api/v1/blog/posts/{self.post.slug}/like/'
+        for method in (self.client.post, self.client.post, self.client.delete, self.client.post):
+            method(url)
+        self.assertEqual(self.client.delete(url).json(), {'liked': False, 'likes_count': 0})
+        # Five requests, one coalesced event, back at the stored state
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self.client.post(url).json(), {'liked': True, 'likes_count': 1})
+        self.buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual((Like.objects.count(), self.post.likes_count), (1, 1))
+        self.assertEqual(self.engagement()['likes_count'], 1)
+
+
+class CounterTests(TestCase):
+    """likes_count and comments_count follow every write path, and
+    reconcile_counters repairs drift"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'pass')
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.author, status='published')
+        cls.other = Post.objects.create(title='Other', content='Content', author=cls.author, status='published')
+
+    def counts(self, obj, *fields):
+        obj.refresh_from_db(fields=fields)
+        return tuple(getattr(obj, field) for field in fields)
+
+    def test_likes(self):
+        comment = Comment.objects.create(user=self.reader, post=self.post, text='Comment')
+        like = Like.objects.create(user=self.reader, post=self.post)
+        comment_like = Like.objects.create(user=self.author, comment=comment)
+        self.assertEqual(self.counts(self.post, 'likes_count'), (1,))
+        self.assertEqual(self.counts(comment, 'likes_count'), (1,))
+
+        # Moving a like shifts both counters
+        like.post = self.other
+        like.save()
+        self.assertEqual((self.counts(self.post, 'likes_count'), self.counts(self.other, 'likes_count')), ((0,), (1,)))
+        like.delete()
+        comment_like.delete()
+        self.assertEqual(self.counts(self.other, 'likes_count'), (0,))
+        self.assertEqual(self.counts(comment, 'likes_count'), (0,))
+
+    def test_comments_and_cascades(self):
+        parent = Comment.objects.create(user=self.reader, post=self.post, text='Parent')
+        reply = Comment.objects.create(user=self.author, post=self.post, parent=parent, text='Reply')
+        Comment.objects.create(user=self.reader, post=self.post, parent=reply, text='Reply to reply')
+        Like.objects.create(user=self.reader, post=self.post)
+        self.assertEqual(self.counts(self.post, 'comments_count', 'likes_count'), (3, 1))
+
+        parent.delete()  # cascades to both replies
+        self.assertEqual(self.counts(self.post, 'comments_count'), (0,))
+        self.reader.delete()  # cascades to the reader's like
+        self.assertEqual(self.counts(self.post, 'likes_count'), (0,))
+
+    def test_counters_never_go_below_zero(self):
+        like = Like.objects.create(user=self.reader, post=self.post)
+        Post.objects.filter(pk=self.post.pk).update(likes_count=0)  # drifted
+        like.delete()
+        self.assertEqual(self.counts(self.post, 'likes_count'), (0,))
+
+    def test_reconcile_counters_repairs_drift(self):
+        Like.objects.create(user=self.reader, post=self.post)
+        Comment.objects.create(user=self.reader, post=self.post, text='Comment')
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7, comments_count=0)
+
+        out = StringIO()
+        call_command('reconcile_counters', dry_run=True, chunk_size=1, stdout=out)
+        self.assertIn('checked 2, drifted 1', out.getvalue())
+        self.assertEqual(self.counts(self.post, 'likes_count', 'comments_count'), (7, 0))
+
+        out = StringIO()
+        call_command('reconcile_counters', chunk_size=1, stdout=out)
+        self.assertIn('checked 2, repaired 1', out.getvalue())
+        self.assertEqual(self.counts(self.post, 'likes_count', 'comments_count'), (1, 1))
+
+
+class KeysetPaginationTests(APITestCase):
+    """?cursor= pages walk the default order exactly once, without COUNT(*)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'pass')
+        cls.posts = [
+            Post.objects.create(title=f'Post {i}', content='Content about python', author=cls.author, status='published')
+            for i in range(8)
+        ]
+        # Ties on created_at are broken by id
+        Post.objects.filter(pk__in=[post.pk for post in cls.posts[2:6]]).update(
+            created_at=datetime(2024, 1, 1, tzinfo=timezone.utc)
+        )
+        for post in cls.posts[:5]:
+            SavedPost.objects.create(user=cls.reader, post=post)
+            Comment.objects.create(user=cls.reader, post=cls.posts[0], text=f'Comment on {post.pk}')
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url):
+        """Ids of every page from ``url`` on, following ``next``"""
+        ids = []
+        while url:
+            with self.settings(BLOG_RESPONSE_CACHE={}):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def page_numbers(self, url):
+        return [item['id'] for item in self.client.get(url).data['results']]
+
+    def test_cursor_pages_match_page_numbers(self):
+        expected = self.page_numbers('/api/v1/blog/posts/?page_size=100')
+        self.assertEqual(len(expected), 8)
+        self.assertEqual(self.walk('/api/v1/blog/posts/?cursor=&page_size=3'), expected)
+
+        self.client.force_authenticate(self.reader)
+        expected = self.page_numbers('/api/v1/blog/posts/saved/?page_size=100')
+        self.assertEqual(self.walk('/api/v1/blog/posts/saved/?cursor=&page_size=2'), expected)
+        url = f'/api/v1/blog/comments/?post={self.posts[0].pk}'
+        self.assertEqual(self.walk(f'{url}&cursor=&page_size=2'), self.page_numbers(f'{url}&page_size=100'))
+
+    def test_no_count_unless_asked(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/v1/blog/posts/?cursor=&page_size=3')
+        self.assertFalse([q for q in queries if 'COUNT(' in q['sql']])
+
+        response = self.client.get('/api/v1/blog/posts/?cursor=&page_size=3&with_total=1')
+        self.assertEqual(response.data['count'], 8)
+        self.assertNotIn('with_total', response.data['next'])
+        # Approximate: cached, not recounted on every page
+        Post.objects.create(title='New', content='Content', author=self.author, status='published')
+        response = self.client.get('/api/v1/blog/posts/?cursor=&page_size=4&with_total=1')
+        self.assertEqual(response.data['count'], 8)
+
+    def test_invalid_cursors_are_not_found(self):
+        for cursor in ('garbage', 'WzFd', 'WyJ4IiwieSJd'):  # not base64 JSON, one value, bad date
+            response = self.client.get(f'/api/v1/blog/posts/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_cursor_with_ordering_or_search_is_rejected(self):
+        for query in ('ordering=title', 'search=python'):
+            response = self.client.get(f'/api/v1/blog/posts/?cursor=&{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('cursor', response.data)
+        response = self.client.get(f'/api/v1/blog/comments/?post={self.posts[0].pk}&cursor=&ordering=created_at')
+        self.assertEqual(response.status_code, 400)
+        # Page numbers follow them
+        self.assertEqual(self.client.get('/api/v1/blog/posts/?ordering=title').status_code, 200)
+
+
+@skipUnless(supports_search_index(connection), 'needs SQLite with FTS5')
+class SearchIndexTests(APITestCase):
+    """?search= reads the FTS5 index, kept in sync by triggers and ranked by BM25"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.body = Post.objects.create(
+            title='Cooking', content='A recipe mentioning python once', author=cls.author, status='published'
+        )
+        cls.title = Post.objects.create(
+            title='Python tips', content='Notes about the language', author=cls.author, status='published'
+        )
+        cls.draft = Post.objects.create(title='Python draft', content='Unpublished', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query, **params):
+        with self.settings(BLOG_RESPONSE_CACHE={}):
+            response = self.client.get('/api/v1/blog/posts/', {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def titles(self, query, **params):
+        return [post['title'] for post in self.search(query, **params)]
+
+    def test_results_are_ranked_with_snippets(self):
+        # Title matches outrank body matches; drafts stay hidden
+        results = self.search('python')
+        self.assertEqual([post['title'] for post in results], ['Python tips', 'Cooking'])
+        self.assertIn('<mark>python</mark>', results[1]['snippet'])
+        self.assertEqual(self.titles('pyth'), ['Python tips', 'Cooking'])  # prefix match
+        self.assertEqual(self.titles('recipe python'), ['Cooking'])  # every word must match
+        self.assertEqual(self.titles('python', ordering='title'), ['Cooking', 'Python tips'])
+
+    def test_the_index_is_matched_once_per_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.search('python')
+        matching = [query['sql'] for query in queries if 'MATCH' in query['sql']]
+        self.assertEqual(len(matching), 2)  # the count and the page
+        for sql in matching:
+            self.assertEqual(sql.count('MATCH'), 1, sql)
+
+    def test_query_syntax_is_not_interpreted(self):
+        for query in ('"python', 'python OR', 'NEAR(python', 'title:python', '*'):
+            self.search(query)
+
+    def test_writes_update_the_index(self):
+        self.body.content = 'A recipe without snakes'
+        self.body.save()
+        self.assertEqual(self.titles('python'), ['Python tips'])
+        Post.objects.filter(pk=self.body.pk).update(title='Python stew')
+        self.assertEqual(self.titles('stew'), ['Python stew'])
+        self.title.delete()
+        self.assertEqual(self.titles('tips'), [])
+
+    def test_icontains_fallback_without_the_index(self):
+        with mock.patch.object(PostSearchFilter, 'index_available', return_value=False):
+            results = self.search('python')
+        self.assertEqual({post['title'] for post in results}, {'Python tips', 'Cooking'})
+        self.assertNotIn('snippet', results[0])
+
+    def test_search_index_command_restores_the_index(self):
+        drop_search_index(connection)
+        self.assertFalse(search_index_available(connection))
+        out = StringIO()
+        call_command('search_index', stdout=out)
+        self.assertIn('Installed missing search index objects', out.getvalue())
+        self.assertEqual(self.titles('python'), ['Python tips', 'Cooking'])
+        call_command('search_index', optimize=True, stdout=StringIO())
+        self.assertTrue(search_index_available(connection))
+
+
+class ResponseCacheTests(APITestCase):
+    """Anonymous post reads are cached until a version they depend on is bumped"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', is_staff=True)
+        cls.category = Category.objects.create(name='News')
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.author, status='published')
+        cls.other = Post.objects.create(title='Other', content='Content', author=cls.author, status='published')
+        cls.post.categories.add(cls.category)
+
+    def setUp(self):
+        cache.clear()
+        self.detail = f'/api/v1/blog/posts/{self.post.slug}/'
+        self.other_detail = f'/api/v1/blog/posts/{self.other.slug}/'
+
+    def x_cache(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.get('X-Cache')
+
+    def warm(self, *urls):
+        for url in urls:
+            # A detail's first request only learns its post id
+            states = [self.x_cache(url) for _ in range(3)]
+            self.assertEqual(states[-1], 'HIT', url)
+
+    def test_list_and_detail_are_cached(self):
+        self.assertEqual(self.x_cache('/api/v1/blog/posts/'), 'MISS')
+        self.assertEqual(self.x_cache('/api/v1/blog/posts/'), 'HIT')
+        self.warm(self.detail)
+        self.client.force_authenticate(self.author)
+        self.assertIsNone(self.x_cache('/api/v1/blog/posts/'))
+
+    def test_writes_invalidate_exactly_what_they_change(self):
+        self.warm('/api/v1/blog/posts/', self.detail, self.other_detail)
+        Like.objects.create(user=self.author, post=self.post)
+        self.assertEqual(self.x_cache('/api/v1/blog/posts/'), 'MISS')
+        self.assertEqual(self.x_cache(self.detail), 'MISS')
+        self.assertEqual(self.x_cache(self.other_detail), 'HIT')
+
+        self.warm('/api/v1/blog/posts/', self.detail)
+        Comment.objects.create(user=self.author, post=self.other, text='Comment')
+        self.assertEqual(self.x_cache(self.detail), 'HIT')
+        self.assertEqual(self.x_cache(self.other_detail), 'MISS')
+        self.assertEqual(self.x_cache('/api/v1/blog/posts/'), 'MISS')
+
+        self.warm('/api/v1/blog/posts/', self.detail, self.other_detail)
+        self.category.name = 'World'
+        self.category.save()  # shown inside every post
+        for url in ('/api/v1/blog/posts/', self.detail, self.other_detail):
+            self.assertEqual(self.x_cache(url), 'MISS', url)
+        data = self.client.get(self.detail).data
+        self.assertEqual(data['categories'][0]['name'], 'World')
+
+    def test_a_reused_slug_is_remapped_before_its_detail_is_cached(self):
+        cache.set(slug_key(self.post.slug), self.other.pk)  # left behind by a delete without signals
+        self.assertEqual(self.x_cache(self.detail), 'MISS')
+        self.assertEqual(cache.get(slug_key(self.post.slug)), self.post.pk)
+        self.assertEqual(self.x_cache(self.detail), 'MISS')  # the first response was built on the wrong scope
+        self.assertEqual(self.x_cache(self.detail), 'HIT')
+        self.post.save()
+        self.assertEqual(self.x_cache(self.detail), 'MISS')
+
+    def test_stale_entries_within_stale_timeout(self):
+        config = {'list': {'timeout': 60, 'stale_timeout': 30}}
+        with self.settings(BLOG_RESPONSE_CACHE=config):
+            self.warm('/api/v1/blog/posts/')
+            self.post.save()
+            self.assertEqual(self.x_cache('/api/v1/blog/posts/'), 'STALE')
+
+    def test_hits_and_misses_are_reported(self):
+        self.client.force_authenticate(self.admin)
+        self.client.delete('/api/v1/blog/stats/queries/')
+        self.client.force_authenticate(None)
+        for _ in range(3):
+            self.x_cache('/api/v1/blog/posts/')
+        self.client.force_authenticate(self.admin)
+        stats = self.client.get('/api/v1/blog/stats/queries/').data['response_cache']
+        self.assertEqual(stats['list'], {'HIT': 2, 'STALE': 0, 'MISS': 1, 'hit_ratio': 0.667})
+        self.client.delete('/api/v1/blog/stats/queries/')
+        self.assertEqual(self.client.get('/api/v1/blog/stats/queries/').data['response_cache'], {})
+
+
+class BulkSeedingTests(TestCase):
+    """create_extensive_data --bulk inserts in batches and keeps only primary keys"""
+
+    def test_bulk_dataset_is_consistent(self):
+        call_command(
+            'create_extensive_data', bulk=True, users=6, posts=25, comments=60, batch_size=7, seed=3,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 25)
+        self.assertEqual(Comment.objects.count(), 60)
+        # Replies point at comments created in earlier batches
+        self.assertTrue(Comment.objects.filter(parent__isnull=False).exists())
+        self.assertEqual(Post.objects.values('slug').distinct().count(), 25)
+        out = StringIO()
+        call_command('reconcile_counters', dry_run=True, stdout=out)
+        self.assertIn('checked 25, drifted 0', out.getvalue())
+        self.assertIn('checked 60, drifted 0', out.getvalue())
+
+    def test_engagement_is_generated_per_batch(self):
+        planned = []
+        insert_batches = BulkDataCommand.insert_batches
+
+        def spy(command, model, rows, **kwargs):
+            if model in (Comment, Like, SavedPost):
+                planned.append((model, len(rows) if isinstance(rows, list) else None))
+            return insert_batches(command, model, rows, **kwargs)
+
+        with mock.patch.object(BulkDataCommand, 'insert_batches', spy):
+            call_command(
+                'create_extensive_data', bulk=True, users=6, posts=25, comments=60, batch_size=7, seed=3,
+                stdout=StringIO(),
+            )
+        # Comments are handed over a batch at a time, likes and saves as generators
+        self.assertTrue(all(size is not None and size <= 7 for model, size in planned if model is Comment))
+        self.assertEqual([size for model, size in planned if model is not Comment], [None, None])
+        self.assertTrue(Like.objects.filter(comment__isnull=False).exists())
+
+    def test_clearing_forgets_slug_mappings(self):
+        post = Post.objects.create(title='Mapped', content='Content', author=User.objects.create_user('author'))
+        cache.set(slug_key(post.slug), post.pk)
+        call_command('create_extensive_data', bulk=True, users=2, posts=3, comments=0, stdout=StringIO())
+        self.assertIsNone(cache.get(slug_key(post.slug)))
+
+    def test_batches_are_not_kept(self):
+        import gc
+        import weakref
+        from .management.commands.create_extensive_data import Command
+        command = Command(stdout=StringIO())
+        command.batch_size = 2
+        inserted = []
+        rows = (Tag(name=f'Tag {i}', slug=f'tag-{i}') for i in range(5))
+        pks = command.insert_batches(Tag, rows, prepare=lambda batch: inserted.extend(map(weakref.ref, batch)))
+        gc.collect()
+        self.assertEqual(pks, list(Tag.objects.order_by('pk').values_list('pk', flat=True)))
+        self.assertEqual([ref() for ref in inserted], [None] * 5)
+
+
+class QueryInstrumentationTests(APITestCase):
+    """Only sampled requests have their queries wrapped and counted"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', is_staff=True)
+
+    def instrumented(self, sample_rate):
+        self.client.force_authenticate(self.admin)
+        config = {'sample_rate': sample_rate}
+        with self.settings(BLOG_QUERY_INSTRUMENTATION=config, BLOG_RESPONSE_CACHE={}):
+            response = self.client.get('/api/v1/blog/posts/')
+        self.assertEqual(response.status_code, 200)
+        return response.get('X-Query-Count')
+
+    def test_sampling(self):
+        self.assertIsNotNone(self.instrumented(1.0))
+        self.assertIsNone(self.instrumented(0.0))
+
+
+class SlugAllocationTests(TestCase):
+    """Unique slugs in one query per save, or per batch of bases"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'pass', role='author')
+
+    def post(self, title, **fields):
+        return Post.objects.create(title=title, content='Content', author=self.author, **fields)
+
+    def test_repeated_titles_get_the_first_free_suffix(self):
+        slugs = [self.post('Getting Started').slug for _ in range(3)]
+        self.assertEqual(slugs, ['getting-started', 'getting-started-1', 'getting-started-2'])
+        Post.objects.filter(slug='getting-started-1').delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(allocate_slug(Post, 'Getting Started'), 'getting-started-1')
+        self.assertEqual(Category.objects.create(name='Getting Started').slug, 'getting-started')
+        self.assertEqual(Tag.objects.create(name='Getting-Started!').slug, 'getting-started')
+
+    def test_only_numeric_suffixes_are_read(self):
+        for title in ('Python', 'Python 2', 'Python tips', 'Python tips 1', 'Pythonic', 'Python-3x'):
+            self.post(title)
+        self.assertEqual(allocate_slug(Post, 'Python'), 'python-1')
+        candidates = Post.objects.filter(_candidates('python')).values_list('slug', flat=True)
+        self.assertEqual(sorted(candidates), ['python', 'python-2'])
+
+    def test_resaving_keeps_the_own_slug(self):
+        post = self.post('Title')
+        post.slug = ''
+        post.save()
+        self.assertEqual(post.slug, 'title')
+
+    def test_bulk_allocation(self):
+        self.post('Django')
+        with self.assertNumQueries(1):
+            slugs = allocate_slugs(Post, ['Django', 'Flask', 'Django', 'Flask', 'django'])
+        self.assertEqual(slugs, ['django-1', 'flask', 'django-2', 'flask-1', 'django-3'])
+
+    def test_a_slug_taken_concurrently_is_allocated_again(self):
+        self.post('Race')
+        # The first allocation ran before the other save committed "race"
+        with mock.patch('blog.slugs.allocate_slug', side_effect=['race', allocate_slug(Post, 'Race')]) as allocate:
+            post = self.post('Race')
+        self.assertEqual(post.slug, 'race-1')
+        self.assertEqual(allocate.call_count, 2)
 
-# Create your tests here.
+    def test_given_slugs_are_kept(self):
+        self.assertEqual(self.post('Title', slug='custom').slug, 'custom')
@@ -0,0 +1,111 @@
+import math
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Log
+
+from .models import Post, PostTrending, SavedPost
+
+DEFAULT_TRENDING = {
+    # A post needs twice the engagement to rank with one this many hours newer
+    'half_life_hours': 24,
+    'weights': {'like': 1.0, 'comment': 2.0, 'save': 3.0},
+}
+
+
+def get_trending_settings():
+    config = dict(DEFAULT_TRENDING)
+    config.update(getattr(settings, 'BLOG_TRENDING', {}))
+    config['weights'] = {**DEFAULT_TRENDING['weights'], **config['weights']}
+    return config
+
+
+def age_boost(created_at, half_life_hours):
+    """Creation time in half-lives since the Unix epoch"""
+    return created_at.timestamp() / (half_life_hours * 3600)
+
+
+def trending_score(engagement, boost):
+    """``boost + log2(1 + engagement)``.
+
+    Each half-life of age is worth a doubling of engagement, so scores
+    decay relative to newer posts without ever being rewritten.
+    """
+    return boost + math.log2(1 + max(engagement, 0))
+
+
+def adjust_trending(post_ids, kind, delta):
+    """Add ``delta`` events of ``kind`` ('like', 'comment' or 'save') to the
+    trending rows of ``post_ids`` in one UPDATE. Posts without a row (drafts)
+    are skipped."""
+    post_ids = [pk for pk in post_ids if pk is not None]
+    change = get_trending_settings()['weights'][kind] * delta
+    if not post_ids or not change:
+        return
+    engagement = Greatest(F('engagement') + change, Value(0.0))
+    PostTrending.objects.filter(post_id__in=post_ids).update(
+        engagement=engagement,
+        score=F('boost') + Log(Value(2.0), engagement + 1),
+    )
+
+
+def analyze_trending(using='default'):
+    """Refresh SQLite's statistics for the trending table after bulk changes;
+    without them the planner ranks by sorting instead of reading the index"""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(PostTrending._meta.db_table)}')
+
+
+def refresh_trending(post_ids=None, chunk_size=1000):
+    """Recompute trending rows from the engagement counters.
+
+    Published posts (of ``post_ids``, or all) get a fresh row and other
+    posts lose theirs. Returns the number of rows written. Events landing
+    between a chunk's read and its write are overwritten; run it again (or
+    let the next event adjust the row) to pick them up.
+    """
+    config = get_trending_settings()
+    weights, half_life = config['weights'], config['half_life_hours']
+    posts = Post.objects.all() if post_ids is None else Post.objects.filter(pk__in=post_ids)
+    stale = PostTrending.objects.exclude(post__status='published')
+    if post_ids is not None:
+        stale = stale.filter(post_id__in=post_ids)
+    stale.delete()
+
+    saves = SavedPost.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(
+        total=Count('pk')
+    ).values('total')
+    published = posts.filter(status='published').annotate(
+        saves=Coalesce(Subquery(saves, output_field=IntegerField()), Value(0))
+    ).order_by('pk')
+
+    written = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(published.filter(pk__gt=last_pk).values(
+                'pk', 'created_at', 'likes_count', 'comments_count', 'saves'
+            )[:chunk_size])
+            if not rows:
+                return written
+            scores = []
+            for row in rows:
+                engagement = (
+                    weights['like'] * row['likes_count']
+                    + weights['comment'] * row['comments_count']
+                    + weights['save'] * row['saves']
+                )
+                boost = age_boost(row['created_at'], half_life)
+                scores.append(PostTrending(
+                    post_id=row['pk'], engagement=engagement, boost=boost,
+                    score=trending_score(engagement, boost),
+                ))
+            PostTrending.objects.bulk_create(
+                scores, update_conflicts=True, unique_fields=['post'],
+                update_fields=['engagement', 'boost', 'score'],
+            )
+        written += len(rows)
+        last_pk = rows[-1]['pk']
@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CategoryViewSet, TagViewSet, CommentViewSet, LikeViewSet, SavedPostViewSet
+from .views import (
+    PostViewSet, CategoryViewSet, TagViewSet, CommentViewSet, LikeViewSet, SavedPostViewSet,
+    QueryStatsView,
+)
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet, basename='post')
@@ -11,5 +14,6 @@ router.register(r'likes', LikeViewSet, basename='like')
 router.register(r'saved-posts', SavedPostViewSet, basename='savedpost')
 
 urlpatterns = [
+    path('stats/queries/', QueryStatsView.as_view(), name='query-stats'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,48 +1,86 @@
 from rest_framework import status, permissions, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Count
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Prefetch
+from django.http import Http404
 from .models import Post, Category, Tag, Comment, Like, SavedPost
+from .replicas import ReplicaReadMixin
+from .cache import (
+    TAXONOMY_SCOPE, AnonymousResponseCacheMixin, ConditionalGetMixin, reset_response_cache_stats,
+    response_cache_stats,
+)
+from .comment_tree import attach_replies, get_tree_limits
+from .fast_serializers import post_rows, render_post_rows
+from .renderers import StreamingListMixin
+from .engagement import flush_pending_for, pending_likes_delta, pending_state, set_like, set_saved
+from .middleware import get_instrumentation_settings, query_stats
+from .search import PostSearchFilter
+from .sparse import FULL, get_field_selection
 from .serializers import (
     PostListSerializer, PostDetailSerializer, PostCreateUpdateSerializer,
     CategorySerializer, TagSerializer, CommentSerializer, CommentCreateSerializer,
     LikeSerializer, SavedPostSerializer
 )
 
-class CategoryViewSet(ModelViewSet):
+class CategoryViewSet(ReplicaReadMixin, ConditionalGetMixin, ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'slug'
     
+    def get_validator_scopes(self):
+        if self.action in ['list', 'retrieve']:
+            return (TAXONOMY_SCOPE,)
+        return None
+    
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
-class TagViewSet(ModelViewSet):
+class TagViewSet(ReplicaReadMixin, ConditionalGetMixin, ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     lookup_field = 'slug'
     
+    def get_validator_scopes(self):
+        if self.action in ['list', 'retrieve']:
+            return (TAXONOMY_SCOPE,)
+        return None
+    
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
-class PostViewSet(ModelViewSet):
+class PostViewSet(ReplicaReadMixin, ConditionalGetMixin, StreamingListMixin, AnonymousResponseCacheMixin, ModelViewSet):
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Search runs last so it can rank by relevance when no ?ordering= is given
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, PostSearchFilter]
     filterset_fields = ['status', 'categories', 'tags', 'author']
     search_fields = ['title', 'content']
     ordering_fields = ['created_at', 'updated_at', 'title']
     ordering = ['-created_at']
+    read_actions = ('list', 'retrieve', 'popular', 'my_posts', 'saved', 'batch')
     
     def get_queryset(self):
-        queryset = Post.objects.select_related('author').prefetch_related(
-            'categories', 'tags', 'comments'
-        )
+        queryset = Post.objects.all()
+        selection = get_field_selection(self.request) if self.action in self.read_actions else FULL
+        # Only load what the requested fields render
+        if selection.nests('author'):
+            queryset = queryset.select_related('author')
+        relations = [name for name in ('categories', 'tags') if selection.includes(name)]
+        if relations:
+            queryset = queryset.prefetch_related(*relations)
+        if self.action in self.read_actions:
+            flags = [flag for flag in ('is_liked', 'is_saved') if selection.includes(flag)]
+            if flags:
+                queryset = queryset.with_engagement(self.request.user, flags)
         
         # Non-authenticated users and non-authors can only see published posts
         if not self.request.user.is_authenticated:
@@ -56,6 +94,49 @@ class PostViewSet(ModelViewSet):
         
         return queryset
     
+    def get_validator_scopes(self):
+        # The response cache's scopes; None for a slug not seen yet
+        if self.action in self.read_actions:
+            return self.get_response_cache_scopes()
+        return None
+    
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, self.list_posts, *args, **kwargs)
+    
+    def list_posts(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, self.retrieve_post, *args, **kwargs)
+    
+    def retrieve_post(self, request, *args, **kwargs):
+        post = self.get_object()
+        self.remember_post(post)
+        return Response(self.get_serializer(post).data)
+    
+    def use_fast_serializer(self):
+        """Render post lists from values() rows (blog.fast_serializers) instead
+        of PostListSerializer; sparse field selections keep the serializer"""
+        return (
+            getattr(settings, 'BLOG_FAST_SERIALIZERS', True)
+            and self.get_serializer_class() is PostListSerializer
+            and not get_field_selection(self.request).sparse
+        )
+    
+    def serialize_posts(self, posts):
+        if self.use_fast_serializer():
+            return render_post_rows(posts, self.request)
+        return self.get_serializer(posts, many=True).data
+    
+    def list_response(self, posts):
+        """Paginated response of a post queryset in the list representation"""
+        if self.use_fast_serializer():
+            posts = post_rows(posts)
+        page = self.paginate_queryset(posts)
+        if page is not None:
+            return self.get_paginated_response(self.serialize_posts(page))
+        return Response(self.serialize_posts(posts))
+    
     def get_serializer_class(self):
         if self.action in ['update', 'partial_update']:
             return PostCreateUpdateSerializer
@@ -68,6 +149,16 @@ class PostViewSet(ModelViewSet):
             return PostDetailSerializer
         return PostListSerializer
     
+    def get_cursor_ordering(self):
+        # Keyset used by ?cursor= pagination; must end with a unique column
+        if self.action == 'popular':
+            # Both keys from the trending table, so its score index orders the page
+            return ('-trending_score', '-trending_id')
+        if self.action == 'saved':
+            # SavedPost columns, so both keys come from its (user, saved_at) index
+            return ('-saved_at', '-saved_id')
+        return ('-created_at', '-id')
+    
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             return [permissions.AllowAny()]
@@ -99,9 +190,8 @@ class PostViewSet(ModelViewSet):
         obj = super().get_object()
         # Only authors can access their draft posts
         if (obj.status == 'draft' and 
-            self.request.user != obj.author and 
+            self.request.user.pk != obj.author_id and 
             not self.request.user.is_admin_role()):
-            from django.http import Http404
             raise Http404
         return obj
     
@@ -119,38 +209,31 @@ class PostViewSet(ModelViewSet):
             raise PermissionDenied("You can only delete your own posts")
         return super().destroy(request, *args, **kwargs)
     
+    def get_engagement_target(self):
+        """Id of the post to like or save, without loading the post itself"""
+        post = Post.objects.filter(slug=self.kwargs[self.lookup_field]).values(
+            'pk', 'status', 'author_id'
+        ).first()
+        user = self.request.user
+        # Same visibility as get_object(): drafts only for their author and admins
+        if post is None or (
+            post['status'] == 'draft' and post['author_id'] != user.pk and not user.is_admin_role()
+        ):
+            raise Http404
+        return post['pk']
+    
     @action(detail=True, methods=['post', 'delete'])
     def like(self, request, slug=None):
-        """Like or unlike a post"""
-        post = self.get_object()
-        like, created = Like.objects.get_or_create(
-            user=request.user, 
-            post=post,
-            defaults={'comment': None}
-        )
-        
-        if not created:
-            # Unlike
-            like.delete()
-            return Response({'liked': False, 'likes_count': post.like_set.filter(post=post).count()})
-        
-        return Response({'liked': True, 'likes_count': post.like_set.filter(post=post).count()})
+        """Like (POST) or unlike (DELETE) a post; repeating either is a no-op"""
+        liked = request.method == 'POST'
+        likes_count = set_like(request.user, Post, self.get_engagement_target(), liked)
+        return Response({'liked': liked, 'likes_count': likes_count})
     
     @action(detail=True, methods=['post', 'delete'])
     def save(self, request, slug=None):
-        """Save or unsave a post"""
-        post = self.get_object()
-        saved_post, created = SavedPost.objects.get_or_create(
-            user=request.user, 
-            post=post
-        )
-        
-        if not created:
-            # Unsave
-            saved_post.delete()
-            return Response({'saved': False})
-        
-        return Response({'saved': True})
+        """Save (POST) or unsave (DELETE) a post; repeating either is a no-op"""
+        saved = set_saved(request.user, self.get_engagement_target(), request.method == 'POST')
+        return Response({'saved': saved})
     
     @action(detail=False, methods=['get'])
     def saved(self, request):
@@ -158,30 +241,82 @@ class PostViewSet(ModelViewSet):
         if not request.user.is_authenticated:
             return Response({'detail': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        saved_posts = SavedPost.objects.filter(user=request.user).select_related('post')
-        page = self.paginate_queryset([sp.post for sp in saved_posts])
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        posts = [sp.post for sp in saved_posts]
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        flush_pending_for(request.user)
+        posts = self.get_queryset().saved_by(request.user).order_by('-saved_at', '-saved_id')
+        return self.list_response(posts)
+    
+    def visible_posts(self, queryset):
+        """Same visibility as get_object(): published posts, drafts only for their author and admins"""
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.filter(status='published')
+        if user.is_admin_role():
+            return queryset
+        return queryset.filter(Q(status='published') | Q(author=user))
+    
+    def get_lookup_list(self, param, cast=str):
+        """Distinct values of a comma separated ``?param=``, at most ``BLOG_MULTI_GET_LIMIT``"""
+        raw = ','.join(self.request.query_params.getlist(param))
+        try:
+            values = [cast(value.strip()) for value in raw.split(',') if value.strip()]
+        except ValueError:
+            raise ValidationError({param: ['Expected a comma separated list of ids.']})
+        values = list(dict.fromkeys(values))
+        limit = getattr(settings, 'BLOG_MULTI_GET_LIMIT', 100)
+        if not values:
+            raise ValidationError({param: ['This parameter is required.']})
+        if len(values) > limit:
+            raise ValidationError({param: [f'At most {limit} values are allowed.']})
+        return values
+    
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """Several posts by ``?slugs=a,b`` or ``?ids=1,2`` in one request, in the requested order"""
+        if 'slugs' in request.query_params:
+            field, keys = 'slug', self.get_lookup_list('slugs')
+        else:
+            field, keys = 'pk', self.get_lookup_list('ids', int)
+        posts = self.visible_posts(self.get_queryset()).filter(**{f'{field}__in': keys})
+        if self.use_fast_serializer():
+            found = {row['id' if field == 'pk' else field]: row for row in post_rows(posts)}
+        else:
+            found = {getattr(post, field): post for post in posts}
+        return Response({
+            'results': self.serialize_posts([found[key] for key in keys if key in found]),
+            'missing': [key for key in keys if key not in found],
+        })
+    
+    @action(detail=False, methods=['get'])
+    def engagement(self, request):
+        """Counters and the user's like/save flags for ``?ids=1,2``, in one query"""
+        ids = self.get_lookup_list('ids', int)
+        rows = self.visible_posts(Post.objects.filter(pk__in=ids)).with_engagement(request.user).values(
+            'pk', 'likes_count', 'comments_count', 'is_liked', 'is_saved'
+        )
+        user_id = request.user.pk
+        states = {}
+        for row in rows:
+            pk = row['pk']
+            # Events still in the write-behind buffer win over the database
+            liked = pending_state('post_like', user_id, pk)
+            saved = pending_state('save', user_id, pk)
+            states[pk] = {
+                'id': pk,
+                'likes_count': max(row['likes_count'] + pending_likes_delta('post_like', pk), 0),
+                'comments_count': row['comments_count'],
+                'is_liked': row['is_liked'] if liked is None else liked,
+                'is_saved': row['is_saved'] if saved is None else saved,
+            }
+        return Response({
+            'results': [states[pk] for pk in ids if pk in states],
+            'missing': [pk for pk in ids if pk not in states],
+        })
     
     @action(detail=False, methods=['get'])
     def popular(self, request):
-        """Get popular posts sorted by likes count"""
-        posts = self.get_queryset().annotate(
-            likes_count=Count('like', filter=Q(like__post__isnull=False))
-        ).order_by('-likes_count', '-created_at')
-        
-        page = self.paginate_queryset(posts)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        """Published posts ranked by time-decayed engagement (see blog.trending)"""
+        posts = self.get_queryset().filter(status='published').trending()
+        return self.list_response(posts)
     
     @action(detail=False, methods=['get'])
     def my_posts(self, request):
@@ -189,26 +324,56 @@ class PostViewSet(ModelViewSet):
         if not request.user.is_authenticated:
             return Response({'detail': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        posts = self.get_queryset().filter(author=request.user)
-        page = self.paginate_queryset(posts)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        posts = self.get_queryset().filter(author=request.user).order_by('-created_at', '-id')
+        return self.list_response(posts)
 
-class CommentViewSet(ModelViewSet):
-    queryset = Comment.objects.select_related('user', 'post').prefetch_related('replies')
+class CommentViewSet(ReplicaReadMixin, StreamingListMixin, ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['post']
     ordering = ['-created_at']
+    cursor_ordering = ('-created_at', '-id')
+    
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+    
+    def get_queryset(self):
+        selection = get_field_selection(self.request)
+        if not selection.sparse:
+            return Comment.objects.select_related('user', 'post')
+        if selection.nests('user'):
+            return Comment.objects.select_related('user')
+        return Comment.objects.all()
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return CommentCreateSerializer
         return CommentSerializer
     
+    def attach_replies(self, comments):
+        # The reply tree costs a query; skip it when ?fields= leaves replies out
+        if get_field_selection(self.request).includes('replies'):
+            return attach_replies(comments, *get_tree_limits(self.request))
+        return comments
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            self.attach_replies(page)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        comments = self.attach_replies(queryset)
+        serializer = self.get_serializer(comments, many=True)
+        return Response(serializer.data)
+    
+    def retrieve(self, request, *args, **kwargs):
+        comment = self.get_object()
+        self.attach_replies([comment])
+        serializer = self.get_serializer(comment)
+        return Response(serializer.data)
+    
     def create(self, request, *args, **kwargs):
         import logging
         logger = logging.getLogger(__name__)
@@ -292,7 +457,8 @@ class CommentViewSet(ModelViewSet):
         logger.info(f"Creating comment with data: {self.request.data}")
         logger.info(f"User: {self.request.user}")
         logger.info(f"Serializer data: {serializer.validated_data}")
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
     
     def get_object(self):
         obj = super().get_object()
@@ -306,22 +472,23 @@ class CommentViewSet(ModelViewSet):
     
     @action(detail=True, methods=['post', 'delete'])
     def like(self, request, pk=None):
-        """Like or unlike a comment"""
-        comment = self.get_object()
-        like, created = Like.objects.get_or_create(
-            user=request.user, 
-            comment=comment,
-            defaults={'post': None}
-        )
-        
-        if not created:
-            # Unlike
-            like.delete()
-            return Response({'liked': False, 'likes_count': comment.like_set.filter(comment=comment).count()})
-        
-        return Response({'liked': True, 'likes_count': comment.like_set.filter(comment=comment).count()})
+        """Like (POST) or unlike (DELETE) a comment; repeating either is a no-op"""
+        try:
+            comment_id = Comment.objects.filter(pk=pk).values_list('pk', flat=True).get()
+        except (Comment.DoesNotExist, TypeError, ValueError):
+            raise Http404
+        liked = request.method == 'POST'
+        likes_count = set_like(request.user, Comment, comment_id, liked)
+        return Response({'liked': liked, 'likes_count': likes_count})
+
+class BufferedEngagementMixin:
+    """Write the user's buffered likes and saves before touching the rows directly"""
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        flush_pending_for(request.user)
 
-class LikeViewSet(ModelViewSet):
+class LikeViewSet(BufferedEngagementMixin, ModelViewSet):
     serializer_class = LikeSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -329,14 +496,58 @@ class LikeViewSet(ModelViewSet):
         return Like.objects.filter(user=self.request.user)
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        self.save_unique(serializer, user=self.request.user)
+    
+    def perform_update(self, serializer):
+        self.save_unique(serializer)
+    
+    def save_unique(self, serializer, **kwargs):
+        try:
+            with transaction.atomic():
+                serializer.save(**kwargs)
+        except IntegrityError:
+            raise ValidationError('You have already liked this.')
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
-class SavedPostViewSet(ModelViewSet):
+class SavedPostViewSet(BufferedEngagementMixin, ModelViewSet):
     serializer_class = SavedPostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-saved_at', '-id')
+    
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
     
     def get_queryset(self):
-        return SavedPost.objects.filter(user=self.request.user).select_related('post')
+        posts = Post.objects.select_related('author').prefetch_related(
+            'categories', 'tags'
+        ).with_engagement(self.request.user)
+        return SavedPost.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('post', queryset=posts)
+        )
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+class QueryStatsView(APIView):
+    """Per-view SQL statistics collected by QueryInstrumentationMiddleware,
+    and the response cache's hits and misses per action.
+
+    Numbers cover the requests served by this process since it started or
+    since the last DELETE; SQL statistics only the instrumented (sampled) ones.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'sample_rate': get_instrumentation_settings()['sample_rate'],
+            'views': query_stats.snapshot(),
+            'response_cache': response_cache_stats(),
+        })
+
+    def delete(self, request):
+        query_stats.reset()
+        reset_response_cache_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)